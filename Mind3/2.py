@@ -1,74 +1,816 @@
+import argparse
+import atexit
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from multiprocessing import shared_memory
+
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
 
 # Параметры симуляции
 num_bodies = 50
 G = 1.0  # Гравитационная постоянная
 dt = 0.01 # Шаг времени
 iterations = 500
+softening = 0.1  # Добавка к d^2 в законе силы (предотвращает деление на ноль)
+force_block_elems = 1 << 20  # Сколько пар (i, j) обрабатывать за раз в calculate_forces
+force_engine = "direct"  # "direct" — прямое суммирование, "bh" — Barnes–Hut
+force_workers = 0  # Процессов для расчёта сил (0 — один процесс, без пула)
+parallel_min_bodies = 2000  # Меньше тел — считаем в одном процессе: пул не окупается
+integrator = "euler"  # "euler", "leapfrog" (KDK, velocity Verlet) или "yoshida4"
+block_levels = 0  # Шаги по блокам: тело в тесном сближении делит dt до 2**block_levels раз (0 — выкл.)
+block_eta = 0.05  # Точность шагов по блокам: dt_i = block_eta * sqrt(sqrt(softening) / |a_i|)
+walls = True  # Стенки мира [-1, 1]; без них энергия и импульс должны сохраняться
+theta = 0.5  # Угол раскрытия Barnes–Hut: узел размера s на расстоянии d считается точкой при s/d < theta
+bh_leaf_size = 8  # Максимум тел в листе квадродерева
+bh_max_depth = 16  # Максимальная глубина квадродерева (бит на координату в ключе Мортона)
 
 # Начальные условия
-np.random.seed(42)  # Для воспроизводимости
-positions = np.random.rand(num_bodies, 2) * 2 - 1  # Случайные позиции от -1 до 1
-velocities = np.random.rand(num_bodies, 2) * 0.1 - 0.05 # Случайные скорости
-masses = np.random.rand(num_bodies) * 5 + 1 # Случайные массы от 1 до 6
+def init_bodies(n, seed=42):
+    np.random.seed(seed)  # Для воспроизводимости
+    positions = np.random.rand(n, 2) * 2 - 1  # Случайные позиции от -1 до 1
+    velocities = np.random.rand(n, 2) * 0.1 - 0.05 # Случайные скорости
+    masses = np.random.rand(n) * 5 + 1 # Случайные массы от 1 до 6
+    return positions, velocities, masses
+
+positions, velocities, masses = init_bodies(num_bodies)
 
 # Функция для вычисления сил гравитации
-def calculate_forces(positions, masses):
+def calculate_forces(positions, masses, block=None, rows=None, out=None, targets=None):
+    """
+    Прямое суммирование по всем парам: F_ij = G*m_i*m_j/(d^2 + softening) вдоль r_ij/d.
+    Тела обрабатываются блоками строк: блок из B тел против всех N сразу (массивы B x N),
+    поэтому память O(N*B), а не O(N^2). Совпадающие тела (d = 0) друг на друга не действуют.
+    rows=(lo, hi) или targets (массив номеров) — посчитать силы только для этих тел,
+    остальные строки результата не трогаются.
+    """
     num_bodies = len(positions)
-    forces = np.zeros_like(positions)
-    for i in range(num_bodies):
-        for j in range(i + 1, num_bodies):
-            r = positions[j] - positions[i]
-            distance = np.linalg.norm(r)
-            force_magnitude = G * masses[i] * masses[j] / (distance**2 + 0.1)  # Добавлено 0.1 для предотвращения деления на ноль
-            force = force_magnitude * (r / distance)
-            forces[i] += force
-            forces[j] -= force
+    if targets is None:
+        lo, hi = rows if rows is not None else (0, num_bodies)
+        targets = np.arange(lo, hi)
+    if block is None:
+        block = max(1, force_block_elems // max(num_bodies, 1))
+    x = positions[:, 0]
+    y = positions[:, 1]
+    # sum_j k_ij * (p_j - p_i) = (k @ p)_i - p_i * (k @ 1)_i: суммы по j — одно матричное
+    # умножение блока на столбцы G*m_j*(x_j, y_j, 1)
+    gm = G * masses
+    cols = np.column_stack((gm * x, gm * y, gm))
+    forces = np.empty_like(positions) if out is None else out
+    for start in range(0, len(targets), block):
+        sel = targets[start:start + block]
+        xs, ys = x[sel], y[sel]
+        dx = x[np.newaxis, :] - xs[:, np.newaxis]   # r_ij = p_j - p_i, форма (B, N)
+        dy = y[np.newaxis, :] - ys[:, np.newaxis]
+        d2 = np.multiply(dx, dx, out=dx)
+        d2 += np.multiply(dy, dy, out=dy)
+        # k_ij = 1 / ((d^2 + softening) * d)
+        k = np.sqrt(d2, out=dy)
+        k *= d2 + softening
+        k[d2 == 0.0] = np.inf  # сам с собой
+        np.reciprocal(k, out=k)
+        s = k @ cols
+        forces[sel, 0] = (s[:, 0] - xs * s[:, 2]) * masses[sel]
+        forces[sel, 1] = (s[:, 1] - ys * s[:, 2]) * masses[sel]
     return forces
 
-# Функция для обновления позиций и скоростей
-def update(frame):
-    global positions, velocities
+# ----------------- Barnes–Hut -----------------
+def _spread_bits(v):
+    # 16 младших бит v -> чётные биты (для чередования в ключ Мортона)
+    v = (v | (v << 8)) & 0x00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F
+    v = (v | (v << 2)) & 0x33333333
+    v = (v | (v << 1)) & 0x55555555
+    return v
+
+def build_quadtree(positions, masses, leaf_size=None, max_depth=None):
+    """
+    Квадродерево по ключам Мортона: тела сортируются по ключу, и тогда тела любой ячейки
+    лежат подряд — узел хранит только диапазон [start, end) в отсортированном порядке.
+    Дерево строится по уровням целиком в NumPy; делятся узлы, где тел больше leaf_size.
+    Возвращает словарь массивов по узлам (корень — узел 0) и порядок тел.
+    """
+    leaf_size = bh_leaf_size if leaf_size is None else leaf_size
+    max_depth = bh_max_depth if max_depth is None else max_depth
+    n = len(positions)
+    lo = positions.min(axis=0)
+    size = float((positions.max(axis=0) - lo).max()) or 1.0
+    size *= 1.0 + 1e-9  # чтобы крайние тела попали внутрь ячейки
+    cells = 1 << max_depth
+    q = np.minimum(((positions - lo) / size * cells).astype(np.int64), cells - 1)
+    keys = _spread_bits(q[:, 0]) | (_spread_bits(q[:, 1]) << 1)
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+
+    starts, ends, levels, first_child, num_children = [np.array([0])], [np.array([n])], [np.array([0])], [], []
+    count = 1  # всего узлов
+    cur_start, cur_end = starts[0], ends[0]
+    for level in range(max_depth + 1):
+        split = (cur_end - cur_start > leaf_size) & (level < max_depth)
+        fc = np.full(cur_start.size, -1, dtype=np.int64)
+        nc = np.zeros(cur_start.size, dtype=np.int64)
+        if split.any():
+            # границы всех ячеек следующего уровня; дети узла — ячейки внутри его диапазона
+            prefix = keys >> (2 * (max_depth - level - 1))
+            bounds = np.concatenate(([0], np.flatnonzero(prefix[1:] != prefix[:-1]) + 1, [n]))
+            a = np.searchsorted(bounds, cur_start[split])
+            b = np.searchsorted(bounds, cur_end[split])
+            nc[split] = b - a
+            fc[split] = count + np.cumsum(nc[split]) - nc[split]
+            cells_idx = np.repeat(a, b - a) + _ragged_arange(b - a)
+            cur_start, cur_end = bounds[cells_idx], bounds[cells_idx + 1]
+            count += cells_idx.size
+        first_child.append(fc)
+        num_children.append(nc)
+        if not split.any():
+            break
+        starts.append(cur_start)
+        ends.append(cur_end)
+        levels.append(np.full(cur_start.size, level + 1))
+
+    start = np.concatenate(starts)
+    end = np.concatenate(ends)
+    px, py, m = positions[order, 0], positions[order, 1], masses[order]
+    cm = np.concatenate(([0.0], np.cumsum(m)))
+    cx = np.concatenate(([0.0], np.cumsum(m * px)))
+    cy = np.concatenate(([0.0], np.cumsum(m * py)))
+    mass = cm[end] - cm[start]
+    return {
+        "order": order, "x": px, "y": py, "m": m,
+        "start": start, "end": end,
+        "first_child": np.concatenate(first_child), "num_children": np.concatenate(num_children),
+        "mass": mass, "com_x": (cx[end] - cx[start]) / mass, "com_y": (cy[end] - cy[start]) / mass,
+        "size": size / (1 << np.concatenate(levels)),
+    }
+
+def _ragged_arange(counts):
+    # [0..c0-1, 0..c1-1, ...] для массива длин counts
+    counts = np.asarray(counts)
+    return np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+def barnes_hut_forces(positions, masses, theta=None, leaf_size=None, batch=2048, rows=None, out=None,
+                      targets=None):
+    """
+    Силы по Barnes–Hut с тем же законом, что calculate_forces (G, softening).
+    Обход дерева векторный: для пачки тел держится «фронт» пар (тело, узел). Узел далеко
+    (s/d < theta и тело не внутри него) — действует как точка в центре масс; лист рядом —
+    прямое суммирование по его телам; иначе пара заменяется парами с детьми узла.
+    Пачки тел идут в порядке ключей Мортона, так что их фронты малы и близки друг к другу.
+    rows=(lo, hi) — только тела с номерами lo..hi-1 в этом порядке (части для пула процессов),
+    targets — только тела с этими (исходными) номерами.
+    """
+    theta = globals()["theta"] if theta is None else theta
+    tree = build_quadtree(positions, masses, leaf_size)
+    x, y, m = tree["x"], tree["y"], tree["m"]
+    start, end = tree["start"], tree["end"]
+    first_child, num_children = tree["first_child"], tree["num_children"]
+    mass, com_x, com_y = tree["mass"], tree["com_x"], tree["com_y"]
+    size2 = tree["size"] ** 2
+    theta2 = theta * theta
+    n = len(x)
+    order = tree["order"]
+    if targets is None:
+        r0, r1 = rows if rows is not None else (0, n)
+        todo = np.arange(r0, r1)
+    else:
+        rank = np.empty(n, dtype=np.int64)
+        rank[order] = np.arange(n)
+        todo = np.sort(rank[targets])   # номера в порядке Мортона
+    forces = np.empty_like(positions) if out is None else out
+
+    for lo in range(0, todo.size, batch):
+        bb = todo[lo:lo + batch]
+        fx = np.zeros(bb.size)
+        fy = np.zeros(bb.size)
+
+        def accumulate(li, dx, dy, d2, gm):
+            # сила на единицу массы тела bb[li]: G*m/(d^2 + softening) вдоль r/d
+            k = gm / ((d2 + softening) * np.sqrt(d2))
+            fx[:] += np.bincount(li, weights=k * dx, minlength=bb.size)
+            fy[:] += np.bincount(li, weights=k * dy, minlength=bb.size)
+
+        # фронт: li — номер тела в пачке, node — узел дерева
+        li = np.arange(bb.size)
+        node = np.zeros(bb.size, dtype=np.int64)
+        while li.size:
+            b = bb[li]
+            dx = com_x[node] - x[b]
+            dy = com_y[node] - y[b]
+            d2 = dx * dx + dy * dy
+            inside = (start[node] <= b) & (b < end[node])
+            far = ~inside & (size2[node] < theta2 * d2)
+            if far.any():
+                accumulate(li[far], dx[far], dy[far], d2[far], G * mass[node[far]])
+
+            near = ~far
+            leaf = near & (first_child[node] < 0)
+            if leaf.any():
+                ln = node[leaf]
+                cnt = end[ln] - start[ln]
+                pl = np.repeat(li[leaf], cnt)
+                pb = bb[pl]
+                pj = np.repeat(start[ln], cnt) + _ragged_arange(cnt)
+                other = pj != pb
+                pl, pb, pj = pl[other], pb[other], pj[other]
+                pdx = x[pj] - x[pb]
+                pdy = y[pj] - y[pb]
+                pd2 = pdx * pdx + pdy * pdy
+                hit = pd2 > 0.0  # совпадающие тела друг на друга не действуют
+                accumulate(pl[hit], pdx[hit], pdy[hit], pd2[hit], G * m[pj[hit]])
+
+            inner = near & ~leaf
+            cnt = num_children[node[inner]]
+            li = np.repeat(li[inner], cnt)
+            node = np.repeat(first_child[node[inner]], cnt) + _ragged_arange(cnt)
+
+        forces[order[bb], 0] = fx * m[bb]
+        forces[order[bb], 1] = fy * m[bb]
+    return forces
+
+# ----------------- Несколько процессов -----------------
+def _force_worker(conn, names, n):
+    # Процесс пула: массивы берутся из общей памяти по именам, по трубе приходит только
+    # команда (движок, theta, диапазон тел), назад — подтверждение
+    blocks = [shared_memory.SharedMemory(name=name) for name in names]
+    pos = np.ndarray((n, 2), dtype=np.float64, buffer=blocks[0].buf)
+    m = np.ndarray((n,), dtype=np.float64, buffer=blocks[1].buf)
+    f = np.ndarray((n, 2), dtype=np.float64, buffer=blocks[2].buf)
+    try:
+        while True:
+            msg = conn.recv()
+            if msg is None:
+                break
+            engine, th, lo, hi, targets = msg
+            try:
+                if engine == "bh":
+                    barnes_hut_forces(pos, m, th, rows=(lo, hi), out=f, targets=targets)
+                else:
+                    calculate_forces(pos, m, rows=(lo, hi), out=f, targets=targets)
+                conn.send(None)
+            except Exception as e:
+                conn.send(repr(e))
+    finally:
+        del pos, m, f
+        for block in blocks:
+            block.close()
+
+class ForcePool:
+    """
+    Постоянный пул процессов для расчёта сил. positions, masses и forces лежат в
+    multiprocessing.shared_memory: за шаг процессам уходят только номера тел, массивы не
+    копируются и не сериализуются. Диапазон тел делится поровну между процессами
+    (для Barnes–Hut — в порядке ключей Мортона, каждый процесс строит дерево сам).
+    Симуляция может держать свои массивы прямо в общей памяти (pool.positions и т.д.).
+    Процессы запускаются через fork, поэтому пул работает только на POSIX: при spawn
+    (Windows, по умолчанию macOS) процесс заново импортировал бы скрипт по имени модуля,
+    а nbody_bench.py загружает этот файл под именем, которое дочерний процесс не найдёт.
+    """
 
-    forces = calculate_forces(positions, masses)
+    def __init__(self, n, workers=None):
+        self.n = n
+        self.workers = workers or os.cpu_count() or 1
+        self.blocks = [shared_memory.SharedMemory(create=True, size=max(size, 1))
+                       for size in (n * 2 * 8, n * 8, n * 2 * 8)]
+        self.positions = np.ndarray((n, 2), dtype=np.float64, buffer=self.blocks[0].buf)
+        self.masses = np.ndarray((n,), dtype=np.float64, buffer=self.blocks[1].buf)
+        self.forces = np.ndarray((n, 2), dtype=np.float64, buffer=self.blocks[2].buf)
+        names = [block.name for block in self.blocks]
+        ctx = mp.get_context("fork")   # ValueError там, где fork нет
+        self.conns, self.procs = [], []
+        for _ in range(self.workers):
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=_force_worker, args=(child, names, n), daemon=True)
+            proc.start()
+            child.close()
+            self.conns.append(parent)
+            self.procs.append(proc)
+        atexit.register(self.close)
 
-    # Обновление скоростей и позиций (численное интегрирование)
-    velocities += (forces / masses[:, np.newaxis]) * dt
+    def compute(self, positions, masses, engine="direct", th=0.5, targets=None):
+        # Если массивы симуляции — не те, что в общей памяти, копируем их туда (O(N))
+        if positions is not self.positions:
+            self.positions[:] = positions
+        if masses is not self.masses:
+            self.masses[:] = masses
+        if targets is None:
+            bounds = np.linspace(0, self.n, self.workers + 1).astype(int)
+            for conn, lo, hi in zip(self.conns, bounds[:-1], bounds[1:]):
+                conn.send((engine, th, int(lo), int(hi), None))
+        else:
+            # подмножество тел (шаги по блокам): по трубе идут только их номера
+            for conn, part in zip(self.conns, np.array_split(targets, self.workers)):
+                conn.send((engine, th, 0, 0, part))
+        errors = [conn.recv() for conn in self.conns]
+        errors = [e for e in errors if e]
+        if errors:
+            raise RuntimeError("force worker failed: " + errors[0])
+        return self.forces
+
+    def close(self):
+        if not self.procs:
+            return
+        for conn, proc in zip(self.conns, self.procs):
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+            proc.join(timeout=5)
+        self.procs = []
+        del self.positions, self.masses, self.forces
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        atexit.unregister(self.close)
+
+force_pool = None
+
+def compute_forces(positions, masses, targets=None):
+    """Силы выбранным движком; с targets заполнены только строки этих тел."""
+    global force_pool
+    n = len(positions)
+    if force_workers > 1 and n >= parallel_min_bodies:
+        if force_pool is None or force_pool.n != n:
+            if force_pool is not None:
+                force_pool.close()
+            force_pool = ForcePool(n, force_workers)
+        return force_pool.compute(positions, masses, force_engine, theta, targets)
+    if force_engine == "bh":
+        return barnes_hut_forces(positions, masses, theta, targets=targets)
+    return calculate_forces(positions, masses, targets=targets)
+
+def accuracy_report(n, thetas, seed=42):
+    """Ошибка Barnes–Hut относительно прямого суммирования и выигрыш по времени."""
+    pos, _, m = init_bodies(n, seed)
+    t0 = time.perf_counter()
+    ref = calculate_forces(pos, m)
+    t_direct = time.perf_counter() - t0
+    ref_norm = np.hypot(ref[:, 0], ref[:, 1])
+    scale = np.sqrt(np.mean(ref_norm ** 2))
+    print(f"N = {n}, direct: {t_direct:.3f} s")
+    print(f"{'theta':>6} {'time s':>8} {'speedup':>8} {'median':>10} {'p99':>10} {'max':>10} {'rms/rms':>10}")
+    for th in thetas:
+        t0 = time.perf_counter()
+        bh = barnes_hut_forces(pos, m, th)
+        t_bh = time.perf_counter() - t0
+        err = np.hypot(*(bh - ref).T)
+        rel = err / np.maximum(ref_norm, 1e-300)   # относительная ошибка силы на каждое тело
+        print(f"{th:>6.2f} {t_bh:>8.3f} {t_direct / t_bh:>8.1f} {np.median(rel):>10.2e} "
+              f"{np.percentile(rel, 99):>10.2e} {rel.max():>10.2e} {np.sqrt(np.mean(err ** 2)) / scale:>10.2e}")
+
+# ----------------- Интеграторы -----------------
+force_evals = 0.0  # Сколько расчётов сил (в пересчёте на все тела) сделано с начала
+
+def accelerations(positions, masses, targets=None):
+    global force_evals
+    force_evals += 1.0 if targets is None else len(targets) / len(positions)
+    return compute_forces(positions, masses, targets) / masses[:, np.newaxis]
+
+def step_euler(positions, velocities, masses, dt, acc=None):
+    # Исходная схема: скорость, затем позиция (полунеявный Эйлер, 1-й порядок)
+    velocities += accelerations(positions, masses) * dt
+    positions += velocities * dt
+    return None
+
+def step_leapfrog(positions, velocities, masses, dt, acc=None):
+    # Kick-drift-kick (velocity Verlet), 2-й порядок. Ускорения в конце шага возвращаются
+    # и идут в начало следующего, так что расчёт сил — один на шаг
+    if acc is None:
+        acc = accelerations(positions, masses)
+    velocities += acc * (dt / 2)
     positions += velocities * dt
+    acc = accelerations(positions, masses)
+    velocities += acc * (dt / 2)
+    return acc
+
+_cbrt2 = 2.0 ** (1.0 / 3.0)
+YOSHIDA_W1 = 1.0 / (2.0 - _cbrt2)
+YOSHIDA_W0 = -_cbrt2 / (2.0 - _cbrt2)
+YOSHIDA_C = (YOSHIDA_W1 / 2, (YOSHIDA_W0 + YOSHIDA_W1) / 2, (YOSHIDA_W0 + YOSHIDA_W1) / 2, YOSHIDA_W1 / 2)
+YOSHIDA_D = (YOSHIDA_W1, YOSHIDA_W0, YOSHIDA_W1)
+
+def step_yoshida4(positions, velocities, masses, dt, acc=None):
+    # Симплектическая схема Йошиды 4-го порядка: три leapfrog-шага с весами w1, w0, w1
+    # (drift-kick-...-drift), три расчёта сил на шаг
+    for i in range(3):
+        positions += velocities * (YOSHIDA_C[i] * dt)
+        velocities += accelerations(positions, masses) * (YOSHIDA_D[i] * dt)
+    positions += velocities * (YOSHIDA_C[3] * dt)
+    return None
+
+def block_level(acc, dt, levels):
+    # Уровень k: шаг тела dt / 2**k, первый, что не больше block_eta * sqrt(sqrt(eps) / |a|)
+    amag = np.maximum(np.hypot(acc[:, 0], acc[:, 1]), 1e-300)
+    want = block_eta * np.sqrt(np.sqrt(softening) / amag)
+    return np.clip(np.ceil(np.log2(dt / want)), 0, levels).astype(np.int64)
+
+def level_forces(positions, masses, fine, coarse, block=None):
+    """
+    Силы пар одного уровня прямым суммированием: fine — тела этого уровня, coarse — тела
+    более крупных уровней. Возвращает силы на fine от fine и coarse и силы на coarse от fine.
+    Обе берутся из одних и тех же коэффициентов пар k_ij (как в calculate_forces), так что
+    вклады пары равны и противоположны. Матрица пар — блоками строк fine.
+    """
+    src = np.concatenate((coarse, fine))
+    if block is None:
+        block = max(1, force_block_elems // max(len(src), 1))
+    x, y = positions[src, 0], positions[src, 1]
+    gm = G * masses[src]
+    cols = np.column_stack((gm * x, gm * y, gm))
+    nc = len(coarse)
+    on_fine = np.empty((len(fine), 2))
+    t = np.zeros((nc, 3))   # sum_i k_ij * m_i * (x_i, y_i, 1) для тел coarse
+    for start in range(0, len(fine), block):
+        sel = fine[start:start + block]
+        xs, ys, ms = positions[sel, 0], positions[sel, 1], masses[sel]
+        dx = x[np.newaxis, :] - xs[:, np.newaxis]
+        dy = y[np.newaxis, :] - ys[:, np.newaxis]
+        d2 = np.multiply(dx, dx, out=dx)
+        d2 += np.multiply(dy, dy, out=dy)
+        k = np.sqrt(d2, out=dy)
+        k *= d2 + softening
+        k[d2 == 0.0] = np.inf  # сам с собой
+        np.reciprocal(k, out=k)
+        s = k @ cols
+        on_fine[start:start + len(sel), 0] = (s[:, 0] - xs * s[:, 2]) * ms
+        on_fine[start:start + len(sel), 1] = (s[:, 1] - ys * s[:, 2]) * ms
+        t += k[:, :nc].T @ np.column_stack((ms * xs, ms * ys, ms))
+    on_coarse = np.empty((nc, 2))
+    on_coarse[:, 0] = (t[:, 0] - x[:nc] * t[:, 2]) * gm[:nc]
+    on_coarse[:, 1] = (t[:, 1] - y[:nc] * t[:, 2]) * gm[:nc]
+    return on_fine, on_coarse
+
+block_cache = None  # (ускорения, уровни тел, толчки по уровням) с конца прошлого шага по блокам
+
+def step_block(positions, velocities, masses, dt, acc=None, levels=None):
+    """
+    Leapfrog (KDK) с иерархическими шагами по блокам и разбиением сил по парам: тело уровня k
+    шагает с dt / 2**k (уровень выбирается по ускорению в начале шага и держится весь шаг),
+    пара тел принадлежит более мелкому из их уровней и получает толчки с его шагом — оба тела
+    сразу, равными и противоположными силами. Поэтому полный импульс сохраняется до
+    округления (с прямым суммированием; у Barnes–Hut — в пределах его точности), а схема
+    остаётся симплектической. Дрейф — у всех тел на каждом подшаге. Толчки конца шага
+    переиспользуются, если уровни тел не изменились.
+    """
+    global block_cache, force_evals
+    levels = block_levels if levels is None else levels
+    if acc is None:
+        acc = accelerations(positions, masses)
+    n = len(positions)
+    n_sub = 1 << levels
+    dt_min = dt / n_sub
+    level = block_level(acc, dt, levels)
+    groups = [np.flatnonzero(level == k) for k in range(levels + 1)]
+
+    def subsystem_acc(members):
+        # ускорения тел members только от них же самих (без пула: подсистема меньше N)
+        global force_evals
+        force_evals += members.size / n
+        sub_p, sub_m = positions[members], masses[members]
+        f = barnes_hut_forces(sub_p, sub_m, theta) if force_engine == "bh" else calculate_forces(sub_p, sub_m)
+        return f / sub_m[:, np.newaxis]
+
+    def level_kick(k):
+        # ускорения от пар уровня k (None — на уровне нет тел)
+        global force_evals
+        fine = groups[k]
+        if fine.size == 0:
+            return None
+        coarse = np.flatnonzero(level < k)
+        if fine.size == n:
+            return accelerations(positions, masses)
+        g = np.zeros_like(positions)
+        if coarse.size == 0:
+            g[fine] = subsystem_acc(fine)
+            return g
+        if force_engine == "bh":
+            # Barnes–Hut и так приближённый: пары уровня — разность полей подсистем
+            members = np.concatenate((coarse, fine))
+            g[members] = subsystem_acc(members)
+            g[coarse] -= subsystem_acc(coarse)
+        else:
+            on_fine, on_coarse = level_forces(positions, masses, fine, coarse)
+            g[fine] = on_fine / masses[fine, np.newaxis]
+            g[coarse] = on_coarse / masses[coarse, np.newaxis]
+            force_evals += fine.size / n
+        return g
+
+    if block_cache is not None and block_cache[0] is acc and np.array_equal(block_cache[1], level):
+        kicks = block_cache[2]
+    else:
+        kicks = [level_kick(k) for k in range(levels + 1)]
+    for sub in range(n_sub):
+        for k in range(levels + 1):
+            span = 1 << (levels - k)   # подшагов в шаге уровня k
+            if kicks[k] is not None and sub % span == 0:
+                velocities += kicks[k] * (dt_min * span / 2)
+        positions += velocities * dt_min
+        for k in range(levels + 1):
+            span = 1 << (levels - k)
+            if kicks[k] is not None and (sub + 1) % span == 0:
+                kicks[k] = level_kick(k)
+                velocities += kicks[k] * (dt_min * span / 2)
+    acc = sum(g for g in kicks if g is not None)
+    block_cache = (acc, level, kicks)
+    return acc
+
+INTEGRATORS = {"euler": step_euler, "leapfrog": step_leapfrog, "yoshida4": step_yoshida4}
+
+def integrate_step(positions, velocities, masses, dt, acc=None):
+    """Один шаг выбранным интегратором; возвращает ускорения для следующего шага (или None)."""
+    if block_levels > 0:
+        return step_block(positions, velocities, masses, dt, acc)
+    return INTEGRATORS[integrator](positions, velocities, masses, dt, acc)
+
+# ----------------- Энергия и импульс -----------------
+def potential_energy(positions, masses, block=None):
+    """
+    Потенциал, согласованный с законом силы: F = G*m_i*m_j/(d^2 + eps) = -dU/dd, откуда
+    U_ij = -G*m_i*m_j * (pi/2 - arctan(d/sqrt(eps))) / sqrt(eps). Прямая сумма по парам блоками.
+    """
+    n = len(positions)
+    if block is None:
+        block = max(1, force_block_elems // max(n, 1))
+    se = np.sqrt(softening)
+    x = positions[:, 0]
+    y = positions[:, 1]
+    total = 0.0
+    for start in range(0, n, block):
+        stop = min(start + block, n)
+        d = np.hypot(x[np.newaxis, :] - x[start:stop, np.newaxis], y[np.newaxis, :] - y[start:stop, np.newaxis])
+        u = np.pi / 2 - np.arctan(d / se)
+        total += masses[start:stop] @ u @ masses
+    total -= np.pi / 2 * (masses @ masses)   # слагаемые i == j
+    return -G * total / (2 * se)
+
+def kinetic_energy(velocities, masses):
+    return 0.5 * float(masses @ (velocities * velocities).sum(axis=1))
+
+def total_momentum(velocities, masses):
+    return masses @ velocities
+
+def drift_report(n, steps, budget, seed=42):
+    """
+    Дрейф энергии и импульса для каждого интегратора на одних и тех же начальных условиях
+    (без стенок), цена — число расчётов сил. В конце — самый дешёвый, кто уложился в budget.
+    """
+    global integrator, block_levels, walls, force_evals
+    saved = integrator, block_levels, walls
+    walls = False
+    variants = [("euler", 0), ("leapfrog", 0), ("yoshida4", 0), ("leapfrog", 3)]
+    print(f"N = {n}, {steps} steps of dt = {dt}, no walls")
+    print(f"{'integrator':<16} {'max |dE/E0|':>12} {'final dE/E0':>12} {'|dP|/sum m|v|':>14} {'force evals':>12} {'time s':>8}")
+    best = None
+    for name, levels in variants:
+        integrator, block_levels = name, levels
+        pos, vel, m = init_bodies(n, seed)
+        e0 = kinetic_energy(vel, m) + potential_energy(pos, m)
+        p0 = total_momentum(vel, m)
+        force_evals = 0.0
+        acc, worst, dp, p_scale = None, 0.0, 0.0, 0.0
+        t0 = time.perf_counter()
+        for _ in range(steps):
+            acc = integrate_step(pos, vel, m, dt, acc)
+            e = kinetic_energy(vel, m) + potential_energy(pos, m)
+            worst = max(worst, abs((e - e0) / e0))
+            # импульс — относительно наибольшего sum m|v| за прогон (в начале тела почти покоятся)
+            p_scale = max(p_scale, float(m @ np.hypot(vel[:, 0], vel[:, 1])))
+            dp = max(dp, float(np.hypot(*(total_momentum(vel, m) - p0))) / p_scale)
+        elapsed = time.perf_counter() - t0
+        label = name + (f" +{levels} lvl" if levels else "")
+        print(f"{label:<16} {worst:>12.3e} {(e - e0) / e0:>+12.3e} {dp:>14.2e} {force_evals:>12.1f} {elapsed:>8.2f}")
+        if worst <= budget and (best is None or force_evals < best[1]):
+            best = (label, force_evals)
+    print(f"cheapest within |dE/E0| <= {budget:g}: {best[0] if best else 'none'}")
+    integrator, block_levels, walls = saved
+
+# Функция для обновления позиций и скоростей
+acc = None  # ускорения с прошлого шага (leapfrog и шаги по блокам переиспользуют их)
+energy_log = None  # CSV: шаг, время, энергия, относительный дрейф, импульс
+
+def advance(frame):
+    # Один шаг физики — общий для анимации и headless-прогона
+    global acc
+
+    acc = integrate_step(positions, velocities, masses, dt, acc)
 
     # Ограничение мира (тела отталкиваются от стенок)
-    positions[positions > 1] = 1
-    positions[positions < -1] = -1
-    velocities[positions > 0.99] *= -0.5
-    velocities[positions < -0.99] *= -0.5
+    if walls:
+        outside = (positions > 1) | (positions < -1)
+        positions[positions > 1] = 1
+        positions[positions < -1] = -1
+        velocities[positions > 0.99] *= -0.5
+        velocities[positions < -0.99] *= -0.5
+        if outside.any():
+            acc = None  # позиции сдвинуты: силы с прошлого шага устарели
+
+    if energy_log:
+        energy_log.write(frame, positions, velocities, masses)
+
+def update(frame):
+    advance(frame)
 
     # Обновление точек на графике
     scatter.set_offsets(positions)
     return scatter,
 
+class EnergyLog:
+    def __init__(self, path, positions, velocities, masses):
+        self.file = open(path, "w")
+        self.file.write("step,t,energy,rel_drift,px,py,force_evals\n")
+        # дрейф — относительно начального состояния, чтобы был виден и первый шаг
+        self.e0 = kinetic_energy(velocities, masses) + potential_energy(positions, masses)
+        self.step = 0
+
+    def write(self, frame, positions, velocities, masses):
+        self.step += 1
+        e = kinetic_energy(velocities, masses) + potential_energy(positions, masses)
+        px, py = total_momentum(velocities, masses)
+        self.file.write(f"{self.step},{self.step * dt:.6f},{e:.12g},{(e - self.e0) / abs(self.e0):.6e},"
+                        f"{px:.12g},{py:.12g},{force_evals:.2f}\n")
+        self.file.flush()
+
+# ----------------- Headless-прогон и просмотр снимков -----------------
+class SnapshotWriter:
+    """
+    Снимки (positions, velocities) в заранее выделенный .npy формы (capacity, 2, N, 2).
+    Каждый снимок пишется через своё окно np.memmap размером в один снимок, которое
+    сразу сбрасывается на диск и закрывается: память не растёт с длиной прогона.
+    Рядом лежат OUT.json (параметры и число записанных снимков, обновляется по ходу,
+    так что оборванный прогон читается до последнего снимка) и OUT.masses.npy.
+    """
+
+    def __init__(self, path, n, capacity, meta, dtype=np.float64):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.shape = (2, n, 2)
+        mm = np.lib.format.open_memmap(path, mode="w+", dtype=self.dtype, shape=(capacity,) + self.shape)
+        self.offset = mm.offset  # длина заголовка .npy
+        del mm
+        self.snapshot_bytes = self.dtype.itemsize * 4 * n
+        self.capacity = capacity
+        self.count = 0
+        self.meta = dict(meta, bodies=n, capacity=capacity, frames=0, dtype=self.dtype.name)
+        self.meta_time = 0.0
+        self.write_meta()
+
+    def append(self, positions, velocities):
+        if self.count >= self.capacity:
+            raise IndexError(f"{self.path}: all {self.capacity} snapshots written")
+        window = np.memmap(self.path, dtype=self.dtype, mode="r+", shape=self.shape,
+                           offset=self.offset + self.count * self.snapshot_bytes)
+        window[0] = positions
+        window[1] = velocities
+        window.flush()
+        del window
+        self.count += 1
+        if time.monotonic() - self.meta_time > 1.0:
+            self.write_meta()
+
+    def write_meta(self):
+        self.meta["frames"] = self.count
+        with open(snapshot_meta_path(self.path), "w") as f:
+            json.dump(self.meta, f, indent=1)
+        self.meta_time = time.monotonic()
+
+    def close(self):
+        self.write_meta()
+
+def snapshot_meta_path(path):
+    return os.path.splitext(path)[0] + ".json"
+
+def snapshot_masses_path(path):
+    return os.path.splitext(path)[0] + ".masses.npy"
+
+def run_headless(out, steps, every, dtype=np.float64):
+    """Без графики, так быстро, как получается: снимок в начале и после каждых every шагов."""
+    meta = dict(dt=dt, every=every, steps=steps, integrator=integrator, block_levels=block_levels,
+                forces=force_engine, theta=theta, walls=walls)
+    writer = SnapshotWriter(out, len(positions), steps // every + 1, meta, dtype)
+    np.save(snapshot_masses_path(out), masses)
+    writer.append(positions, velocities)
+    t0 = shown = time.perf_counter()
+    try:
+        for step in range(1, steps + 1):
+            advance(step)
+            if step % every == 0:
+                writer.append(positions, velocities)
+            now = time.perf_counter()
+            if now - shown > 5.0:
+                print(f"step {step}/{steps}, {step / (now - t0):.1f} steps/s", file=sys.stderr)
+                shown = now
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - t0
+    print(f"{steps} steps in {elapsed:.2f} s ({steps / max(elapsed, 1e-9):.1f} steps/s), "
+          f"{writer.count} snapshots -> {out}")
+
+def make_plot(positions, masses, title):
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots()
+    ax.set_xlim(-1.1, 1.1)
+    ax.set_ylim(-1.1, 1.1)
+    ax.set_aspect("equal")
+    scatter = ax.scatter(positions[:, 0], positions[:, 1], s=masses*10, color="blue") # Размер точек зависит от массы
+    ax.set_facecolor("black") # Черный фон
+    fig.patch.set_facecolor("black") # Черный фон для всего окна
+    ax.tick_params(axis="x", colors="white")
+    ax.tick_params(axis="y", colors="white")
+    ax.spines["bottom"].set_color("white")
+    ax.spines["top"].set_color("white")
+    ax.spines["left"].set_color("white")
+    ax.spines["right"].set_color("white")
+    ax.set_title(title, color="white")
+    return fig, ax, scatter
+
+def view(path, stride=1):
+    """Проигрывает файл снимков каждый stride-й кадр; с диска читаются только показанные снимки."""
+    import matplotlib.pyplot as plt
+    import matplotlib.animation as animation
+
+    with open(snapshot_meta_path(path)) as f:
+        meta = json.load(f)
+    snaps = np.load(path, mmap_mode="r")
+    fig, ax, scatter = make_plot(snaps[0, 0], np.load(snapshot_masses_path(path)), "")
+    title = ax.title
+
+    def show(i):
+        scatter.set_offsets(snaps[i, 0])
+        title.set_text(f"t = {i * meta['every'] * meta['dt']:.2f}  ({i}/{meta['frames'] - 1})")
+        return scatter, title
+
+    ani = animation.FuncAnimation(fig, show, frames=range(0, meta["frames"], stride), repeat=True)
+    plt.show()
+    return ani
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="N-body Simulation")
+    parser.add_argument("--bodies", type=int, default=num_bodies, help="число тел")
+    parser.add_argument("--forces", choices=["direct", "bh"], default=force_engine,
+                        help="прямое суммирование или Barnes–Hut")
+    parser.add_argument("--theta", type=float, default=theta, help="угол раскрытия Barnes–Hut")
+    parser.add_argument("--workers", type=int, default=force_workers,
+                        help=f"процессов для расчёта сил (0 — один; при < {parallel_min_bodies} тел всегда один)")
+    parser.add_argument("--dt", type=float, default=dt, help="шаг времени")
+    parser.add_argument("--integrator", choices=sorted(INTEGRATORS), default=integrator)
+    parser.add_argument("--block-levels", type=int, default=block_levels,
+                        help="шаги по блокам (leapfrog): до 2**K подшагов для тел в тесных сближениях")
+    parser.add_argument("--eta", type=float, default=block_eta, help="точность шагов по блокам")
+    parser.add_argument("--no-walls", action="store_true", help="без стенок мира (энергия сохраняется)")
+    parser.add_argument("--energy-log", metavar="FILE", help="писать энергию и импульс каждого шага в CSV")
+    parser.add_argument("--drift-report", metavar="STEPS", type=int,
+                        help="без анимации: дрейф энергии всех интеграторов за STEPS шагов для --bodies тел")
+    parser.add_argument("--drift-budget", type=float, default=1e-4, help="допустимый |dE/E0| для --drift-report")
+    parser.add_argument("--accuracy", metavar="THETAS", nargs="?", const="0.3,0.5,0.7,1.0",
+                        help="без анимации: сравнить Barnes–Hut с прямым суммированием для --bodies тел")
+    parser.add_argument("--headless", metavar="OUT.npy",
+                        help="без графики: считать --steps шагов и писать снимки в OUT.npy (memmap)")
+    parser.add_argument("--steps", type=int, default=10000, help="шагов для --headless")
+    parser.add_argument("--every", type=int, default=10, help="снимок каждые K шагов для --headless")
+    parser.add_argument("--float32", action="store_true", help="снимки в float32 (вдвое меньше файл)")
+    parser.add_argument("--view", metavar="FILE.npy", help="проиграть снимки, записанные --headless")
+    parser.add_argument("--stride", type=int, default=1, help="показывать каждый D-й снимок для --view")
+    args = parser.parse_args()
+    force_engine, theta, force_workers = args.forces, args.theta, args.workers
+    dt = args.dt
+    integrator, block_levels, block_eta, walls = args.integrator, args.block_levels, args.eta, not args.no_walls
+    if args.drift_report:
+        drift_report(args.bodies, args.drift_report, args.drift_budget)
+        raise SystemExit
+    if args.accuracy:
+        accuracy_report(args.bodies, [float(t) for t in args.accuracy.split(",")])
+        raise SystemExit
+    if args.view:
+        view(args.view, args.stride)
+        raise SystemExit
+    if args.bodies != num_bodies:
+        num_bodies = args.bodies
+        positions, velocities, masses = init_bodies(num_bodies)
+    if force_workers > 1 and num_bodies >= parallel_min_bodies:
+        # Состояние симуляции сразу живёт в общей памяти пула: update() меняет его на месте
+        force_pool = ForcePool(num_bodies, force_workers)
+        force_pool.positions[:] = positions
+        force_pool.masses[:] = masses
+        positions, masses = force_pool.positions, force_pool.masses
+    if args.energy_log:
+        energy_log = EnergyLog(args.energy_log, positions, velocities, masses)
+    if args.headless:
+        run_headless(args.headless, args.steps, args.every, np.float32 if args.float32 else np.float64)
+        raise SystemExit
+
+    import matplotlib.pyplot as plt
+    import matplotlib.animation as animation
+
+    # Настройка графика
+    fig, ax, scatter = make_plot(positions, masses, "N-body Simulation")
+
+    # Создание анимации
+    ani = animation.FuncAnimation(fig, update, blit=True, frames=iterations, repeat=True)
+
+    # Сохранение анимации (опционально, требует установленного ffmpeg или imagemagick)
+    # ani.save("n_body_simulation.gif", writer="imagemagick", fps=60)
 
-# Настройка графика
-fig, ax = plt.subplots()
-ax.set_xlim(-1.1, 1.1)
-ax.set_ylim(-1.1, 1.1)
-ax.set_aspect(equal)
-scatter = ax.scatter(positions[:, 0], positions[:, 1], s=masses*10, color=blue) # Размер точек зависит от массы
-ax.set_facecolor("black") # Черный фон
-fig.patch.set_facecolor(black) # Черный фон для всего окна
-ax.tick_params(axis=x, colors=white)
-ax.tick_params(axis=y, colors=white)
-ax.spines[bottom].set_color(white)
-ax.spines[top].set_color(white)
-ax.spines[left].set_color(white)
-ax.spines[right].set_color(white)
-ax.set_title("N-body Simulation", color=white)
-
-# Создание анимации
-ani = animation.FuncAnimation(fig, update, blit=True, frames=iterations, repeat=True)
-
-# Сохранение анимации (опционально, требует установленного ffmpeg или imagemagick)
-# ani.save("n_body_simulation.gif", writer=imagemagick, fps=60)
-
-plt.show()
+    plt.show()
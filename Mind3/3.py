@@ -1,16 +1,695 @@
-def mandelbrot(cols, rows):
-    for row in range(rows):
-        for col in range(cols):
-            c = complex(-2 + (col / cols) * 3, -1 + (row / rows) * 2)
-            z = 0
-            for i in range(20):  # Количество итераций (больше - лучше детализация, но дольше)
-                z = z * z + c
-                if abs(z) > 2:
-                    break
-            if abs(z) <= 2:
-                print("*", end="") # Или можно использовать другие символы
-            else:
-                print(" ", end="") # Пустое пространство
-        print()
-
-mandelbrot(80, 40) # Размеры изображения
+import argparse
+import math
+import multiprocessing as mp
+import os
+import queue
+import sys
+import time
+from collections import OrderedDict
+from decimal import Decimal, localcontext
+
+import numpy as np
+
+# Параметры
+max_iter = 20  # Количество итераций (больше - лучше детализация, но дольше)
+bailout = 256.0  # Радиус ухода: с большим радиусом плавная раскраска не даёт полос
+chunk_size = 1 << 15  # Точек за раз: рабочие массивы куска помещаются в кэш процессора
+check_every = 4  # Проверять уход раз в столько итераций (за 4 итерации |z| от 256 не переполнится)
+palette = " .:-=+*#%@"  # Символы от быстро ушедших точек к медленным; последний — точки множества
+
+# Ускорения для точек множества (они съедают все max_iter итераций)
+interior_tests = True  # Главная кардиоида и круг периода 2 — проверка по формуле, без итераций
+periodicity = True  # Орбита вернулась в сохранённую точку — точка внутри, дальше не считаем
+period_eps = 1e-12  # Насколько близко надо вернуться (|dz|), чтобы считать орбиту периодической
+period_every = 16  # Сравнивать с сохранённой точкой раз в столько итераций (кратно check_every)
+subdivision = True  # Mariani–Silver: прямоугольник с рамкой из точек множества заливается целиком
+subdivision_min = 8  # Меньшие прямоугольники считаются поточечно
+
+def in_cardioid_or_bulb(cr, ci):
+    """Точки главной кардиоиды и круга периода 2 — заведомо внутри множества."""
+    xq = cr - 0.25
+    q = xq * xq + ci * ci
+    cardioid = q * (q + xq) <= 0.25 * ci * ci
+    bulb = (cr + 1) ** 2 + ci * ci <= 1 / 16
+    return cardioid | bulb
+
+def escape_time(cr, ci, max_iter, out):
+    """
+    Итерирует z -> z^2 + c для точек c = cr + i*ci и пишет в out (float32) плавное число
+    итераций до ухода за bailout, а для не ушедших — max_iter. Считается в вещественных
+    массивах (x^2 и y^2 нужны и для шага, и для проверки ухода), пересчитываются только
+    ещё не ушедшие точки: ушедшие выбрасываются из рабочих массивов. Уход проверяется
+    раз в check_every итераций — плавный счёт от этого не меняется, он инвариантен к тому,
+    на какой итерации после ухода его взять.
+    """
+    out[:] = max_iter
+    r2 = bailout * bailout
+    idx = np.arange(len(cr))
+    if interior_tests:
+        keep = ~in_cardioid_or_bulb(cr, ci)
+        idx, cr, ci = idx[keep], cr[keep], ci[keep]
+    else:
+        cr, ci = cr.copy(), ci.copy()
+    x, y = np.zeros_like(cr), np.zeros_like(cr)
+    x2, y2, t, u = np.zeros_like(cr), np.zeros_like(cr), np.empty_like(cr), np.empty_like(cr)
+    # периодичность: z сравнивается с точкой, сохранённой на итерации 2^k - 1 (как у Брента —
+    # окно растёт, так что находится цикл любого периода); сравнение недёшево, поэтому
+    # только раз в period_every итераций — внутренняя точка лишь чуть позже выбывает
+    sx, sy = np.zeros_like(cr), np.zeros_like(cr)
+    eps2 = period_eps * period_eps
+    gone = 0  # ушедших, но ещё не выброшенных точек
+    for i in range(max_iter):
+        if len(idx) == 0:
+            break
+        np.multiply(x, y, out=y)
+        y *= 2
+        y += ci
+        np.subtract(x2, y2, out=x)
+        x += cr
+        np.multiply(x, x, out=x2)
+        np.multiply(y, y, out=y2)
+        if i % check_every != check_every - 1 and i != max_iter - 1:
+            continue
+        np.add(x2, y2, out=t)
+        done = t > r2
+        k = np.count_nonzero(done)
+        if k:
+            # плавный счёт: i + 1 - log2(log2|z|), |z|^2 = t
+            out[idx[done]] = i + 1 - np.log2(0.5 * np.log2(t[done]))
+        if periodicity and i % period_every == period_every - 1:
+            np.subtract(x, sx, out=t)
+            t *= t
+            np.subtract(y, sy, out=u)
+            u *= u
+            t += u
+            cycled = t < eps2   # эти остаются с max_iter
+            c = np.count_nonzero(cycled)
+            if c:
+                done |= cycled
+                k += c
+            if (i + 1) & i == 0:
+                np.copyto(sx, x)
+                np.copyto(sy, y)
+        if k == 0:
+            continue
+        gone += k
+        if gone * 8 < len(idx):
+            # выбывших мало: не сжимаем массивы, а «замораживаем» точки — NaN больше никогда
+            # не пройдёт ни проверку ухода, ни проверку цикла
+            for a in (x, y, x2, y2, cr, ci, sx, sy):
+                a[done] = np.nan
+            continue
+        keep = ~done & ~np.isnan(x)
+        idx, x, y, x2, y2, cr, ci, sx, sy = (a[keep] for a in (idx, x, y, x2, y2, cr, ci, sx, sy))
+        t, u = np.empty_like(x), np.empty_like(x)
+        gone = 0
+    np.clip(out, 0, max_iter, out=out)
+    return out
+
+def compute_points(re, im, flat, max_iter, counts):
+    """Считает точки с плоскими номерами flat (строка * cols + столбец) кусками по chunk_size."""
+    cols = len(re)
+    out = counts.reshape(-1)
+    part = np.empty(min(chunk_size, len(flat)), dtype=np.float32)
+    for start in range(0, len(flat), chunk_size):
+        f = flat[start:start + chunk_size]
+        escape_time(re[f % cols], im[f // cols], max_iter, part[:len(f)])
+        out[f] = part[:len(f)]
+
+def segments(starts, lengths, step=1):
+    """Плоские номера точек отрезков start + k*step, k < length, и номер отрезка у каждой точки."""
+    seg = np.repeat(np.arange(len(starts)), lengths)
+    k = np.arange(len(seg)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return starts[seg] + k * step, seg
+
+def rect_points(cols, r0, r1, c0, c1):
+    """Плоские номера всех точек прямоугольников [r0, r1) x [c0, c1) — построчно."""
+    row, rect = segments(r0, r1 - r0)
+    return segments(row * cols + c0[rect], (c1 - c0)[rect])[0]
+
+def mariani_silver(re, im, max_iter, counts):
+    """
+    Заполняет counts (rows, cols) делением на прямоугольники. Если вся рамка прямоугольника —
+    точки множества, внутри тоже только они (множество Мандельброта и его приближения
+    с конечным max_iter связны и без дыр), и внутренность заливается max_iter без итераций.
+    Иначе прямоугольник делится на четыре с общими сторонами. Все прямоугольники уровня
+    обрабатываются массивами: рамки всех сразу считаются одним вызовом.
+    """
+    rows, cols = counts.shape
+    flat_counts = counts.reshape(-1)
+    known = np.zeros(rows * cols, dtype=bool)
+    stamp = np.empty(rows * cols, dtype=np.intp)   # для удаления повторов без сортировки
+    rest = []   # внутренности мелких прямоугольников
+    r0, r1, c0, c1 = (np.array([v]) for v in (0, rows, 0, cols))
+    while len(r0):
+        w, h = c1 - c0, r1 - r0
+        top, top_id = segments(r0 * cols + c0, w)
+        bottom, bottom_id = segments((r1 - 1) * cols + c0, w)
+        left, left_id = segments(r0 * cols + c0, h, cols)
+        right, right_id = segments(r0 * cols + c1 - 1, h, cols)
+        border = np.concatenate([top, bottom, left, right])
+        rect = np.concatenate([top_id, bottom_id, left_id, right_id])
+        need = border[~known[border]]
+        stamp[need] = np.arange(len(need))   # у повторов остаётся номер последнего
+        need = need[stamp[need] == np.arange(len(need))]
+        compute_points(re, im, need, max_iter, counts)
+        known[need] = True
+
+        on_border = np.bincount(rect, weights=flat_counts[border] < max_iter, minlength=len(r0))
+        # без внутренности (сторона <= 2) прямоугольник уже посчитан целиком
+        inner = (h > 2) & (w > 2)
+        fill = inner & (on_border == 0)
+        if fill.any():
+            inside = rect_points(cols, r0[fill] + 1, r1[fill] - 1, c0[fill] + 1, c1[fill] - 1)
+            flat_counts[inside] = max_iter
+            known[inside] = True
+        small = inner & ~fill & (np.minimum(h, w) <= subdivision_min)
+        if small.any():
+            rest.append(rect_points(cols, r0[small] + 1, r1[small] - 1, c0[small] + 1, c1[small] - 1))
+        split = inner & ~fill & ~small
+        r0, r1, c0, c1 = r0[split], r1[split], c0[split], c1[split]
+        rm, cm = (r0 + r1) // 2, (c0 + c1) // 2
+        r0, r1, c0, c1 = (np.concatenate([r0, r0, rm, rm]), np.concatenate([rm + 1, rm + 1, r1, r1]),
+                          np.concatenate([c0, cm, c0, cm]), np.concatenate([cm + 1, c1, cm + 1, c1]))
+    if rest:
+        rest = np.concatenate(rest)
+        compute_points(re, im, rest[~known[rest]], max_iter, counts)
+
+def mandelbrot(cols, rows, bounds=(-2.0, 1.0, -1.0, 1.0), max_iter=max_iter):
+    """
+    Массив (rows, cols) float32 плавных чисел итераций для прямоугольника
+    bounds = (x_min, x_max, y_min, y_max); точки множества получают max_iter.
+    Точка (col, row) — левый нижний угол своей клетки, как было в исходной версии.
+    Точки множества по возможности не итерируются: см. interior_tests, periodicity, subdivision.
+    """
+    x_min, x_max, y_min, y_max = bounds
+    re = x_min + np.arange(cols) * ((x_max - x_min) / cols)
+    im = y_min + np.arange(rows) * ((y_max - y_min) / rows)
+    counts = np.empty((rows, cols), dtype=np.float32)
+    if subdivision and min(rows, cols) > 2 * subdivision_min:
+        mariani_silver(re, im, max_iter, counts)
+    else:
+        compute_points(re, im, np.arange(rows * cols), max_iter, counts)
+    return counts
+
+# ----------------- Глубокий зум: теория возмущений -----------------
+deep_below = 1e-12  # При ширине кадра меньше этой double уже не различает соседние точки
+series_tol = 1e-12  # Допуск ряда, которым пропускаются общие для всего кадра первые итерации
+
+def reference_orbit(cr, ci, max_iter):
+    """
+    Орбита Z_n центра C = cr + i*ci, посчитанная в Decimal с текущей точностью контекста и
+    сохранённая в double: сами Z_n порядка единицы, точность нужна только при их расчёте.
+    Массив (len, 2) от Z_0 = 0; если центр уходит, орбита кончается первой точкой за bailout.
+    """
+    r2 = Decimal(bailout * bailout)
+    zr = zi = Decimal(0)
+    orbit = np.zeros((max_iter + 1, 2))
+    for n in range(1, max_iter + 1):
+        zr, zi = zr * zr - zi * zi + cr, 2 * zr * zi + ci
+        orbit[n] = float(zr), float(zi)
+        if zr * zr + zi * zi > r2:
+            return orbit[:n + 1]
+    return orbit
+
+def series_skip(ref, dc, max_iter):
+    """
+    Пока отклонения малы, d_n для всего кадра — ряд по dc: d_n ≈ A_n dc + B_n dc^2 + C_n dc^3,
+    A' = 2 Z A + 1, B' = 2 Z B + A^2, C' = 2 Z C + 2 A B. Коэффициенты хранятся умноженными
+    на r, r^2, r^3 (r — наибольшее |dc|), чтобы на глубине не переполниться. Ряд ведётся, пока
+    третий член мал по сравнению с первым и отклонение заведомо меньше |Z|; найденный
+    номер k проверяется честным расчётом угловых точек кадра и при расхождении уменьшается.
+    Возвращает k и функцию, дающую d_k для массива dc.
+    """
+    z = ref[:, 0] + 1j * ref[:, 1]
+    r = float(np.abs(dc).max()) or 1.0
+    a = b = c = 0j
+    coeffs = [(a, b, c)]
+    for n in range(min(len(z) - 2, max_iter - 1)):
+        a, b, c = 2 * z[n] * a + r, 2 * z[n] * b + a * a, 2 * z[n] * c + 2 * a * b
+        if abs(c) > series_tol * abs(a) or abs(z[n + 1]) < 2 * abs(a):
+            break
+        coeffs.append((a, b, c))
+
+    def series(k, dc):
+        a, b, c = coeffs[k]
+        s = dc / r
+        return (a + (b + c * s) * s) * s
+
+    # проверка по угловым точкам: прямой расчёт отклонения до k и сравнение с рядом
+    probe = np.array([dc.min(), dc.max(), dc.real.min() + 1j * dc.imag.max(), dc.real.max() + 1j * dc.imag.min()])
+    k = len(coeffs) - 1
+    while k > 0:
+        d = np.zeros_like(probe)
+        for n in range(k):
+            d = (2 * z[n] + d) * d + probe
+        if np.all(np.abs(series(k, probe) - d) <= 1e-6 * np.abs(d)):
+            break
+        k //= 2
+    return k, lambda dc: series(k, dc)
+
+def escape_time_deep(ref, dcr, dci, max_iter, out, start=0, d0=None):
+    """
+    Плавный счёт для точек C + dc по опорной орбите ref. Каждая точка хранит только
+    отклонение d = z - Z_m в double: d <- (2 Z_m + d) d + dc, так что малые величины
+    порядка размера пикселя не теряются на фоне Z. Глитч — |z| < |d|: отклонение уже не мало
+    и теряет точность; тогда (и когда опорная орбита кончилась) точка делает ребейз —
+    продолжает от начала опорной орбиты с d = z (Z_0 = 0), m = 0. Пока ребейзов не было,
+    m у всех точек общий и Z_m — скаляр; после — у каждой точки свой номер m.
+    start, d0 — итерация и отклонения, с которых начать (после series_skip).
+    Возвращает число ребейзов.
+    """
+    out[:] = max_iter
+    r2 = bailout * bailout
+    zr_ref, zi_ref = np.ascontiguousarray(ref[:, 0]), np.ascontiguousarray(ref[:, 1])
+    last = len(ref) - 1
+    idx = np.arange(len(dcr))
+    dcr, dci = dcr.copy(), dci.copy()
+    if d0 is None:
+        dr, di = np.zeros_like(dcr), np.zeros_like(dcr)
+    else:
+        dr, di = np.ascontiguousarray(d0.real), np.ascontiguousarray(d0.imag)
+    a, b, t, u, v = (np.empty_like(dcr) for _ in range(5))
+    m = None  # номера в опорной орбите; None — у всех общий k
+    k = start
+    rebases = 0
+    gone = 0  # ушедших, но ещё не выброшенных точек (заморожены NaN, как в escape_time)
+    for i in range(start, max_iter):
+        if len(idx) == 0:
+            break
+        # a + ib = 2 Z_m + d
+        if m is None:
+            np.add(dr, 2 * zr_ref[k], out=a)
+            np.add(di, 2 * zi_ref[k], out=b)
+            k += 1
+        else:
+            np.take(zr_ref, m, out=a)
+            a *= 2
+            a += dr
+            np.take(zi_ref, m, out=b)
+            b *= 2
+            b += di
+            m += 1
+        # d <- (a + ib) d + dc
+        np.multiply(a, dr, out=u)
+        np.multiply(b, di, out=v)
+        u -= v
+        u += dcr
+        np.multiply(a, di, out=v)
+        np.multiply(b, dr, out=di)
+        di += v
+        di += dci
+        dr, u = u, dr
+        # z = Z_m + d в a + ib, |z|^2 в t
+        if m is None:
+            np.add(dr, zr_ref[k], out=a)
+            np.add(di, zi_ref[k], out=b)
+        else:
+            np.take(zr_ref, m, out=a)
+            a += dr
+            np.take(zi_ref, m, out=b)
+            b += di
+        np.multiply(a, a, out=t)
+        np.multiply(b, b, out=v)
+        t += v
+        escaped = t > r2
+        n = np.count_nonzero(escaped)
+        if n:
+            out[idx[escaped]] = i + 1 - np.log2(0.5 * np.log2(t[escaped]))
+            for w in (dr, di, dcr, dci, t):
+                w[escaped] = np.nan   # NaN больше не уходит и не делает ребейз
+            gone += n
+            if gone * 8 >= len(idx):
+                keep = ~np.isnan(dr)
+                idx, dcr, dci, dr, di, a, b, t = (w[keep] for w in (idx, dcr, dci, dr, di, a, b, t))
+                if m is not None:
+                    m = m[keep]
+                u, v = np.empty_like(dr), np.empty_like(dr)
+                gone = 0
+        # глитч: |z| < |d|
+        np.multiply(dr, dr, out=u)
+        np.multiply(di, di, out=v)
+        u += v
+        rebase = t < u
+        if m is None and k == last:
+            rebase[:] = True
+        elif m is not None:
+            rebase |= m == last   # замороженные тоже: иначе их m уйдёт за конец орбиты
+        if rebase.any():
+            if m is None:
+                m = np.full(len(idx), k, dtype=np.intp)
+            dr[rebase] = a[rebase]
+            di[rebase] = b[rebase]
+            m[rebase] = 0
+            rebases += np.count_nonzero(rebase & ~np.isnan(t))
+    np.clip(out, 0, max_iter, out=out)
+    return rebases
+
+def mandelbrot_deep(cols, rows, center, width, max_iter=max_iter):
+    """
+    Как mandelbrot(), но для кадра шириной width (строка или Decimal, хоть 1e-100) вокруг
+    center = (re, im) — строки или Decimal с любым числом знаков. Высокая точность нужна
+    лишь для одной опорной орбиты в центре, все точки считаются в double через NumPy,
+    а общие для всего кадра первые итерации пропускаются рядом (series_skip).
+    Возвращает массив, число ребейзов и число пропущенных итераций.
+    """
+    width = Decimal(width)
+    digits = max(30, -width.adjusted() + 20)   # знаков хватает, чтобы различать пиксели
+    with localcontext() as ctx:
+        ctx.prec = digits
+        ref = reference_orbit(Decimal(center[0]), Decimal(center[1]), max_iter)
+    w = float(width)
+    h = w * rows / cols
+    # отклонения точек от центра — малые числа, для double это не проблема (до 1e-300)
+    dre = -w / 2 + np.arange(cols) * (w / cols)
+    dim = -h / 2 + np.arange(rows) * (h / rows)
+    skip, series = series_skip(ref, dre[[0, -1, 0, -1]] + 1j * dim[[0, 0, -1, -1]], max_iter)
+    counts = np.empty(rows * cols, dtype=np.float32)
+    rebases = 0
+    for start in range(0, rows * cols, chunk_size):
+        flat = np.arange(start, min(start + chunk_size, rows * cols))
+        dcr, dci = dre[flat % cols], dim[flat // cols]
+        rebases += escape_time_deep(ref, dcr, dci, max_iter, counts[start:start + len(flat)],
+                                    skip, series(dcr + 1j * dci))
+    return counts.reshape(rows, cols), rebases, skip
+
+def ascii_art(counts, max_iter, palette=palette):
+    """Строка-картинка: один символ на точку, последний символ палитры — множество."""
+    lut = np.frombuffer(palette.encode("ascii"), dtype=np.uint8)
+    inside = counts >= max_iter
+    # ушедшие точки — по корню из счёта в пределах кадра (на глубине счёт начинается не с нуля)
+    # на все символы, кроме последнего
+    outside = counts[~inside]
+    lo, hi = (outside.min(), outside.max()) if len(outside) else (0.0, 1.0)
+    level = np.sqrt((counts - lo) / max(hi - lo, 1e-9)) * (len(lut) - 1)
+    level = np.clip(level.astype(np.intp), 0, len(lut) - 2)
+    level[inside] = len(lut) - 1
+    text = np.empty((counts.shape[0], counts.shape[1] + 1), dtype=np.uint8)
+    text[:, :-1] = lut[level]
+    text[:, -1] = ord("\n")
+    return text.tobytes().decode("ascii")
+
+# Стандартные виды для сравнения скоростей (x_min, x_max, y_min, y_max), соотношение 3:2
+views = {
+    "full": (-2.5, 1.0, -1.1667, 1.1667),
+    "seahorse": (-0.7530, -0.7370, 0.0940, 0.1047),
+    "elephant": (0.2600, 0.2800, -0.0067, 0.0067),
+    "minibrot": (-1.7700, -1.7400, -0.0100, 0.0100),
+}
+
+def benchmark(cols, rows, max_iter):
+    """Время каждого ускорения отдельно и всех вместе против полного перебора на стандартных видах."""
+    global interior_tests, periodicity, subdivision
+    saved = interior_tests, periodicity, subdivision
+    modes = [("brute force", False, False, False), ("cardioid/bulb", True, False, False),
+             ("periodicity", False, True, False), ("subdivision", False, False, True), ("all", True, True, True)]
+    print(f"{cols}x{rows}, {max_iter} iterations")
+    print(f"{'view':<10} {'method':<14} {'time s':>8} {'speedup':>8} {'inside':>7} {'differ':>7}")
+    for name, bounds in views.items():
+        ref = None
+        for label, interior_tests, periodicity, subdivision in modes:
+            t0 = time.perf_counter()
+            counts = mandelbrot(cols, rows, bounds, max_iter)
+            elapsed = time.perf_counter() - t0
+            inside = counts >= max_iter
+            if ref is None:
+                ref, t_ref = inside, elapsed
+            # differ — точки, которые метод отнёс к множеству иначе, чем перебор
+            print(f"{name:<10} {label:<14} {elapsed:>8.3f} {t_ref / elapsed:>8.1f} {inside.mean():>7.1%} "
+                  f"{np.count_nonzero(inside != ref):>7}")
+    interior_tests, periodicity, subdivision = saved
+
+# ----------------- Плитки: панорама и зум без пересчёта всего кадра -----------------
+tile_size = 256  # Плитка — квадрат tile_size x tile_size точек
+tile_span0 = 4.0  # Сторона плитки уровня 0 на комплексной плоскости; на уровне z — в 2**z раз меньше
+coarse_step = 8  # Черновик плитки — каждая coarse_step-я точка; виден, пока считается полная
+cache_mb = 256  # Размер LRU-кэша готовых плиток в памяти
+
+def tile_bounds(zoom, tx, ty):
+    s = tile_span0 / 2 ** zoom
+    return (tx * s, (tx + 1) * s, ty * s, (ty + 1) * s)
+
+def render_tile(task):
+    """((zoom, tx, ty, max_iter), step) -> (ключ, step, массив); выполняется в процессе пула."""
+    key, step = task
+    zoom, tx, ty, it = key
+    n = tile_size // step
+    return key, step, mandelbrot(n, n, tile_bounds(zoom, tx, ty), it)
+
+class TileCache:
+    """
+    LRU плиток по ключу (zoom, tx, ty, max_iter) с ограничением по байтам. Если задан
+    каталог store, плитки ещё и пишутся на диск и читаются оттуда при промахе в памяти —
+    следующий запуск начинает с уже посчитанных.
+    """
+
+    def __init__(self, max_bytes, store=None):
+        self.tiles = OrderedDict()
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.store = store
+        if store:
+            os.makedirs(store, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.store, "z{}_{}_{}_i{}.npy".format(*key))
+
+    def get(self, key):
+        tile = self.tiles.get(key)
+        if tile is not None:
+            self.tiles.move_to_end(key)
+            return tile
+        if self.store and os.path.exists(self._path(key)):
+            tile = np.load(self._path(key))
+            self._insert(key, tile)
+            return tile
+        return None
+
+    def put(self, key, tile):
+        self._insert(key, tile)
+        if self.store:
+            tmp = self._path(key) + ".tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, tile)
+            os.replace(tmp, self._path(key))   # без полузаписанных плиток при обрыве
+
+    def _insert(self, key, tile):
+        old = self.tiles.pop(key, None)
+        if old is not None:
+            self.bytes -= old.nbytes
+        self.tiles[key] = tile
+        self.bytes += tile.nbytes
+        while self.bytes > self.max_bytes and len(self.tiles) > 1:
+            _, old = self.tiles.popitem(last=False)
+            self.bytes -= old.nbytes
+
+class TileRenderer:
+    """
+    Плитки считает пул процессов. want(keys) говорит, что нужно сейчас (ключи — в порядке
+    важности): сначала в очередь встают черновики всех недостающих плиток, потом полные.
+    В пул уходит не больше двух задач на процесс, так что после панорамы или зума очередь
+    просто заменяется новой и пул не занят устаревшими плитками. poll() забирает готовые.
+    """
+
+    def __init__(self, cache, workers=None):
+        self.cache = cache
+        self.previews = TileCache(max(cache.max_bytes // 16, 1))
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = mp.Pool(self.workers)
+        self.todo = []
+        self.running = set()
+        self.ready = queue.Queue()   # сюда кладут результаты потоки пула
+        self.error = None
+        self.hits = self.misses = 0
+
+    def want(self, keys):
+        coarse, full = [], []
+        for key in keys:
+            if self.cache.get(key) is not None:
+                self.hits += 1
+                continue
+            self.misses += 1
+            if self.previews.get(key) is None:
+                coarse.append((key, coarse_step))
+            full.append((key, 1))
+        self.todo = [task for task in coarse + full if task not in self.running]
+        self._feed()
+
+    def _feed(self):
+        while self.todo and len(self.running) < 2 * self.workers:
+            task = self.todo.pop(0)
+            self.running.add(task)
+            self.pool.apply_async(render_tile, (task,), callback=self.ready.put, error_callback=self._failed)
+
+    def _failed(self, e):
+        self.error = e
+
+    def poll(self):
+        """Кладёт в кэш плитки, готовые с прошлого вызова, и возвращает их ключи."""
+        if self.error:
+            raise RuntimeError("tile worker failed") from self.error
+        done = []
+        while True:
+            try:
+                key, step, tile = self.ready.get_nowait()
+            except queue.Empty:
+                break
+            self.running.discard((key, step))
+            (self.cache if step == 1 else self.previews).put(key, tile)
+            done.append(key)
+        self._feed()
+        return done
+
+    def busy(self):
+        return bool(self.todo or self.running)
+
+    def tile(self, key):
+        """Лучшее, что есть для плитки: полная, растянутый черновик или None."""
+        tile = self.cache.get(key)
+        if tile is None:
+            tile = self.previews.get(key)
+            if tile is not None:
+                tile = np.repeat(np.repeat(tile, coarse_step, axis=0), coarse_step, axis=1)
+        return tile
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+def zoom_for(width, width_px):
+    """Уровень, на котором точка плитки не крупнее пикселя экрана."""
+    return max(0, math.ceil(math.log2(tile_span0 * width_px / (tile_size * width))))
+
+def visible_tiles(view, zoom):
+    """Номера (tx, ty) плиток, покрывающих view = (x0, x1, y0, y1), от центра к краям."""
+    x0, x1, y0, y1 = view
+    s = tile_span0 / 2 ** zoom
+    cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+    tiles = [(tx, ty) for ty in range(math.floor(y0 / s), math.floor(y1 / s) + 1)
+             for tx in range(math.floor(x0 / s), math.floor(x1 / s) + 1)]
+    return sorted(tiles, key=lambda t: ((t[0] + 0.5) * s - cx) ** 2 + ((t[1] + 0.5) * s - cy) ** 2)
+
+def compose(renderer, view, zoom, max_iter):
+    """Склеивает видимые плитки в одну картинку (NaN — ещё не посчитано); возвращает её и границы."""
+    tiles = visible_tiles(view, zoom)
+    tx0, ty0 = min(t[0] for t in tiles), min(t[1] for t in tiles)
+    tx1, ty1 = max(t[0] for t in tiles), max(t[1] for t in tiles)
+    img = np.full(((ty1 - ty0 + 1) * tile_size, (tx1 - tx0 + 1) * tile_size), np.nan, dtype=np.float32)
+    for tx, ty in tiles:
+        tile = renderer.tile((zoom, tx, ty, max_iter))
+        if tile is not None:
+            r, c = (ty - ty0) * tile_size, (tx - tx0) * tile_size
+            img[r:r + tile_size, c:c + tile_size] = tile
+    s = tile_span0 / 2 ** zoom
+    return img, (tx0 * s, (tx1 + 1) * s, ty0 * s, (ty1 + 1) * s)
+
+def explore(max_iter, workers=None, store=None):
+    """Окно matplotlib: колесо — зум к курсору, панорама и зум — инструментами панели."""
+    renderer = TileRenderer(TileCache(cache_mb << 20, store), workers)   # пул — до импорта GUI
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots()
+    fig.patch.set_facecolor("black")
+    cmap = plt.get_cmap("magma").with_extremes(over="black", bad="#202020")  # множество и «ещё нет»
+    image = ax.imshow(np.full((1, 1), np.nan), origin="lower", cmap=cmap, interpolation="nearest",
+                      vmin=0, vmax=np.log1p(max_iter - 0.5))
+    ax.set_xlim(-2.5, 1.0)
+    ax.set_ylim(-1.25, 1.25)
+    ax.set_aspect("equal")
+    ax.set_autoscale_on(False)
+    state = {"view": None, "zoom": 0}
+
+    def redraw():
+        img, extent = compose(renderer, state["view"], state["zoom"], max_iter)
+        image.set_data(np.log1p(img))
+        image.set_extent(extent)
+        ax.set_title(f"zoom {state['zoom']}, cache {len(renderer.cache.tiles)} tiles, "
+                     f"hits {renderer.hits} / misses {renderer.misses}", color="white")
+        fig.canvas.draw_idle()
+
+    def refresh(*_):
+        x0, x1 = ax.get_xlim()
+        y0, y1 = ax.get_ylim()
+        view = (x0, x1, y0, y1)
+        if view == state["view"]:
+            return
+        state["view"], state["zoom"] = view, zoom_for(x1 - x0, ax.bbox.width)
+        renderer.want([(state["zoom"], tx, ty, max_iter) for tx, ty in visible_tiles(view, state["zoom"])])
+        redraw()
+
+    def scroll(event):
+        if event.xdata is None:
+            return
+        f = 0.5 if event.button == "up" else 2.0
+        x0, x1 = ax.get_xlim()
+        y0, y1 = ax.get_ylim()
+        ax.set_xlim(event.xdata + (x0 - event.xdata) * f, event.xdata + (x1 - event.xdata) * f)
+        ax.set_ylim(event.ydata + (y0 - event.ydata) * f, event.ydata + (y1 - event.ydata) * f)
+        refresh()
+
+    def tick():
+        if renderer.poll():
+            redraw()
+
+    ax.callbacks.connect("xlim_changed", refresh)
+    ax.callbacks.connect("ylim_changed", refresh)
+    fig.canvas.mpl_connect("scroll_event", scroll)
+    fig.canvas.mpl_connect("resize_event", lambda event: (state.update(view=None), refresh()))
+    timer = fig.canvas.new_timer(interval=50)
+    timer.add_callback(tick)
+    timer.start()
+    refresh()
+    plt.show()
+    renderer.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Множество Мандельброта")
+    parser.add_argument("cols", type=int, nargs="?", default=80, help="ширина (символов или пикселей)")
+    parser.add_argument("rows", type=int, nargs="?", default=40, help="высота")
+    parser.add_argument("--bounds", type=float, nargs=4, default=[-2.0, 1.0, -1.0, 1.0],
+                        metavar=("X_MIN", "X_MAX", "Y_MIN", "Y_MAX"), help="область комплексной плоскости")
+    parser.add_argument("--center", nargs=2, metavar=("RE", "IM"),
+                        help="центр кадра (любое число знаков) — вместо --bounds, вместе с --width")
+    parser.add_argument("--width", default="3", help="ширина кадра для --center, например 1e-50")
+    parser.add_argument("--deep", action="store_true",
+                        help=f"теория возмущений (включается сама при ширине < {deep_below:g})")
+    parser.add_argument("--iter", type=int, default=max_iter, help="максимум итераций")
+    parser.add_argument("--palette", default=palette, help="символы ASCII-вывода (' *' — как раньше)")
+    parser.add_argument("--npy", metavar="FILE", help="сохранить массив итераций в .npy вместо ASCII")
+    parser.add_argument("--time", action="store_true", help="напечатать время расчёта в stderr")
+    parser.add_argument("--brute", action="store_true", help="без ускорений для точек множества")
+    parser.add_argument("--bench", action="store_true",
+                        help="сравнить ускорения с перебором на стандартных видах (размер — cols x rows)")
+    parser.add_argument("--explore", action="store_true", help="окно с панорамой и зумом по плиткам")
+    parser.add_argument("--workers", type=int, help="процессов для плиток (по умолчанию — все ядра)")
+    parser.add_argument("--tile-store", metavar="DIR", help="хранить посчитанные плитки на диске в DIR")
+    parser.add_argument("--cache-mb", type=int, default=cache_mb, help="размер кэша плиток в памяти, МБ")
+    args = parser.parse_args()
+    cache_mb = args.cache_mb
+    if args.brute:
+        interior_tests = periodicity = subdivision = False
+    if args.bench:
+        benchmark(args.cols, args.rows, args.iter)
+        raise SystemExit
+    if args.explore:
+        explore(args.iter, args.workers, args.tile_store)
+        raise SystemExit
+
+    t0 = time.perf_counter()
+    if args.center and (args.deep or float(args.width) < deep_below):
+        counts, rebases, skip = mandelbrot_deep(args.cols, args.rows, args.center, args.width, args.iter)
+        if args.time:
+            print(f"perturbation: {skip} iterations skipped by series, {rebases} rebases", file=sys.stderr)
+    elif args.center:
+        x, y, w = float(args.center[0]), float(args.center[1]), float(args.width)
+        h = w * args.rows / args.cols
+        counts = mandelbrot(args.cols, args.rows, (x - w / 2, x + w / 2, y - h / 2, y + h / 2), args.iter)
+    else:
+        counts = mandelbrot(args.cols, args.rows, tuple(args.bounds), args.iter)
+    elapsed = time.perf_counter() - t0
+    if args.npy:
+        np.save(args.npy, counts)
+    else:
+        sys.stdout.write(ascii_art(counts, args.iter, args.palette))  # одна запись на весь кадр
+    if args.time:
+        print(f"{args.cols}x{args.rows}, {args.iter} iterations: {elapsed:.2f} s", file=sys.stderr)
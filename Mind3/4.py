@@ -1,52 +1,460 @@
+import argparse
+import json
+import os
+import sys
+import time
+
 import numpy as np
 
-# Функция активации (сигмоид)
-def sigmoid(x):
-    return 1 / (1 + np.exp(-x))
+# Параметры нейронной сети
+layer_sizes = [2, 4, 1]  # Входы, скрытые слои, выходы
+learning_rate = 0.4  # Шаг по среднему градиенту пакета (0.1 по сумме из 4 строк XOR — то же самое)
+epochs = 10000
+batch_size = 4  # Строк в мини-пакете
+dtype = np.float64  # или np.float32 — вдвое меньше памяти и быстрее на больших данных
+converge_mse = 0.01  # Сеть считается обученной, когда MSE на всех данных опускается ниже
+predict_chunk = 16384  # Строк за один проход predict: буферы слоёв остаются в кэше процессора
+weights_magic = b"MLPW"  # Сигнатура файла весов
+weights_version = 1  # Версия формата файла весов
+weights_align = 64  # Выравнивание массивов в файле весов (байт)
+
+# Функция активации (сигмоид), на месте: out = 1 / (1 + exp(-x))
+def sigmoid(x, out=None):
+    out = np.negative(x, out=out)
+    np.exp(out, out=out)
+    out += 1
+    return np.reciprocal(out, out=out)
+
+# Производная сигмоидальной функции (через её значение s): s * (1 - s)
+def sigmoid_derivative(s, out=None):
+    out = np.subtract(1, s, out=out)
+    out *= s
+    return out
+
+class MLP:
+    """
+    Полносвязная сеть из сигмоидных слоёв, обучение — мини-пакетами по MSE.
+    Все буферы (активации, дельты, градиенты) выделяются один раз на batch_size строк,
+    дальше всё считается операциями с out=, так что эпоха не выделяет массивов.
+    Последний неполный пакет считается в срезах тех же буферов.
+    """
+
+    def __init__(self, sizes, dtype=dtype, batch_size=batch_size, seed=None):
+        rng = np.random.default_rng(seed)
+        self.sizes = list(sizes)
+        self.dtype = np.dtype(dtype)
+        self.batch_size = batch_size
+        # Инициализация весов случайными значениями, как раньше: равномерно в [0, 1)
+        self.weights = [rng.random((n_in, n_out)).astype(self.dtype)
+                        for n_in, n_out in zip(self.sizes[:-1], self.sizes[1:])]
+        self.biases = [np.zeros(n_out, dtype=self.dtype) for n_out in self.sizes[1:]]
+        self._allocate(batch_size)
+
+    def _allocate(self, rows):
+        self.batch_size = rows
+        self.acts = [np.empty((rows, n), dtype=self.dtype) for n in self.sizes]   # acts[0] — вход
+        self.deltas = [np.empty((rows, n), dtype=self.dtype) for n in self.sizes[1:]]
+        self.tmp = [np.empty((rows, n), dtype=self.dtype) for n in self.sizes[1:]]
+        self.grad_w = [np.empty_like(w) for w in self.weights]
+        self.grad_b = [np.empty_like(b) for b in self.biases]
+        self.target = np.empty((rows, self.sizes[-1]), dtype=self.dtype)
+
+    def predictor(self, chunk=predict_chunk):
+        """Predictor над текущими весами сети (без копирования: видит дальнейшее обучение)."""
+        return Predictor(self.weights, self.biases, chunk)
+
+    def forward(self, n):
+        """Прямое распространение первых n строк acts[0]; возвращает выход (срез буфера)."""
+        a = self.acts[0][:n]
+        for l, (w, b) in enumerate(zip(self.weights, self.biases)):
+            out = self.acts[l + 1][:n]
+            np.matmul(a, w, out=out)
+            out += b
+            a = sigmoid(out, out=out)
+        return a
+
+    def train_batch(self, n, lr):
+        """
+        Шаг по первым n строкам acts[0] (вход) и target (ответы); возвращает сумму
+        квадратов ошибок пакета.
+        """
+        out = self.forward(n)
+        # Вычисление ошибки: d = (выход - ответ) * s'(выход)
+        d = self.deltas[-1][:n]
+        np.subtract(out, self.target[:n], out=d)
+        loss = float(np.vdot(d, d))
+        d *= sigmoid_derivative(out, out=self.tmp[-1][:n])
+
+        # Обратное распространение (backpropagation), шаг по среднему градиенту
+        step = lr / n
+        for l in range(len(self.weights) - 1, -1, -1):
+            a_prev = self.acts[l][:n]
+            d = self.deltas[l][:n]
+            np.matmul(a_prev.T, d, out=self.grad_w[l])
+            np.sum(d, axis=0, out=self.grad_b[l])
+            if l > 0:
+                # дельта предыдущего слоя — по весам до их обновления
+                d_prev = self.deltas[l - 1][:n]
+                np.matmul(d, self.weights[l].T, out=d_prev)
+                d_prev *= sigmoid_derivative(a_prev, out=self.tmp[l - 1][:n])
+            self.grad_w[l] *= step
+            self.grad_b[l] *= step
+            self.weights[l] -= self.grad_w[l]
+            self.biases[l] -= self.grad_b[l]
+        return loss
+
+    def train_epoch(self, batches, lr):
+        """
+        Эпоха по источнику пакетов: batches(x_buf, y_buf) — генератор, который кладёт строки
+        прямо в переданные буферы и отдаёт их число. Возвращает среднюю ошибку (MSE).
+        """
+        loss, rows = 0.0, 0
+        for n in batches(self.acts[0], self.target):
+            loss += self.train_batch(n, lr)
+            rows += n
+        return loss / max(rows * self.sizes[-1], 1)
+
+class Predictor:
+    """
+    Только прямой проход по готовым весам — для применения обученной сети к большим массивам.
+    Вход идёт кусками по chunk строк через буферы, выделенные один раз на объект, последний
+    слой пишет прямо в результат. Веса могут быть отображены с диска (load_weights).
+    """
+
+    def __init__(self, weights, biases, chunk=predict_chunk):
+        self.weights = list(weights)
+        self.biases = list(biases)
+        self.sizes = [self.weights[0].shape[0]] + [w.shape[1] for w in self.weights]
+        self.dtype = self.weights[0].dtype
+        self.chunk = chunk
+        self.bufs = [np.empty((chunk, n), dtype=self.dtype) for n in self.sizes[:-1]]   # bufs[0] — вход
+
+    def predict(self, batch, out=None):
+        """
+        Выходы сети для batch (строки, входы) — массива в памяти или memmap; out — готовый
+        массив (строки, выходы) для результата, например open_memmap на диске.
+        """
+        rows = len(batch)
+        if out is None:
+            out = np.empty((rows, self.sizes[-1]), dtype=self.dtype)
+        last = len(self.weights) - 1
+        for start in range(0, rows, self.chunk):
+            n = min(self.chunk, rows - start)
+            a = batch[start:start + n]
+            if a.dtype != self.dtype or not a.flags.c_contiguous:
+                self.bufs[0][:n] = a   # приведение типа (и чтение с диска для memmap)
+                a = self.bufs[0][:n]
+            for l, (w, b) in enumerate(zip(self.weights, self.biases)):
+                dst = out[start:start + n] if l == last else self.bufs[l + 1][:n]
+                np.matmul(a, w, out=dst)
+                dst += b
+                a = sigmoid(dst, out=dst)
+        return out
+
+def save_weights(path, weights, biases):
+    """
+    Пишет веса в файл: сигнатура, версия, длина заголовка (uint32 LE), JSON-заголовок с
+    размерами слоёв, dtype и смещениями массивов, затем сами массивы, выровненные на
+    weights_align байт. Запись через временный файл — читатели не увидят половины файла.
+    """
+    dt = np.dtype(weights[0].dtype).newbyteorder("<")
+    arrays = [a for pair in zip(weights, biases) for a in pair]   # w0, b0, w1, b1, ...
+    header = {"sizes": [weights[0].shape[0]] + [w.shape[1] for w in weights], "dtype": dt.str, "arrays": []}
+    # смещения зависят от длины заголовка, а она — от смещений: раскладываем массивы за
+    # заголовком текущей длины и повторяем, пока он туда помещается (длина только растёт)
+    start = 12 + len(json.dumps(header))
+    for _ in range(16):
+        offset = -(-start // weights_align) * weights_align
+        header["arrays"] = []
+        for a in arrays:
+            header["arrays"].append({"offset": offset, "shape": list(a.shape)})
+            offset += -(-a.size * dt.itemsize // weights_align) * weights_align
+        text = json.dumps(header).encode()
+        if 12 + len(text) <= header["arrays"][0]["offset"]:
+            break
+        start = 12 + len(text)
+    else:
+        raise ValueError(f"{path}: weights header layout did not settle")
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(weights_magic)
+        f.write(np.array([weights_version, len(text)], dtype="<u4").tobytes())
+        f.write(text)
+        for a, meta in zip(arrays, header["arrays"]):
+            f.write(b"\0" * (meta["offset"] - f.tell()))
+            f.write(np.ascontiguousarray(a, dtype=dt).tobytes())
+    os.replace(tmp, path)
 
-# Производная сигмоидальной функции
-def sigmoid_derivative(x):
-    return x * (1 - x)
+def load_weights(path, chunk=predict_chunk):
+    """
+    Открывает файл save_weights через mmap и возвращает Predictor: веса — представления
+    отображённого файла, ничего не копируется, страницы подгружаются при первом проходе.
+    """
+    with open(path, "rb") as f:
+        head = f.read(12)
+        if len(head) < 12 or head[:4] != weights_magic:
+            raise ValueError(f"{path}: not a weights file")
+        version, length = np.frombuffer(head[4:], dtype="<u4")
+        if version != weights_version:
+            raise ValueError(f"{path}: weights format version {version}, expected {weights_version}")
+        header = json.loads(f.read(int(length)))
+    raw = np.memmap(path, dtype=np.uint8, mode="r")
+    dt = np.dtype(header["dtype"])
+    arrays = []
+    for meta in header["arrays"]:
+        count = int(np.prod(meta["shape"]))
+        start = meta["offset"]
+        arrays.append(raw[start:start + count * dt.itemsize].view(dt).reshape(meta["shape"]))
+    return Predictor(arrays[0::2], arrays[1::2], chunk)
+
+class MLPStack:
+    """
+    K независимых сетей одной формы, обучаемых вместе на одних и тех же данных (весь набор —
+    один пакет, как в исходном XOR). Веса слоя — тензор (K, входы, выходы), каждый шаг —
+    одно пакетное matmul на все сети сразу, у каждой сети своя скорость обучения.
+    Сеть i инициализируется так же, как MLP(sizes, seed=seeds[i]), и обучается так же,
+    как она с batch_size = len(X) без перемешивания. Буферы выделяются один раз.
+    """
+
+    def __init__(self, sizes, seeds, lrs, rows, dtype=dtype):
+        self.sizes = list(sizes)
+        self.dtype = np.dtype(dtype)
+        self.k = k = len(seeds)
+        self.weights = [np.empty((k, n_in, n_out), dtype=self.dtype)
+                        for n_in, n_out in zip(self.sizes[:-1], self.sizes[1:])]
+        for i, seed in enumerate(seeds):
+            rng = np.random.default_rng(seed)
+            for w in self.weights:
+                w[i] = rng.random(w.shape[1:])
+        self.biases = [np.zeros((k, 1, n_out), dtype=self.dtype) for n_out in self.sizes[1:]]
+        self.lrs = np.asarray(lrs, dtype=self.dtype).reshape(k, 1, 1)
+        self.acts = [np.empty((k, rows, n), dtype=self.dtype) for n in self.sizes[1:]]
+        self.deltas = [np.empty_like(a) for a in self.acts]
+        self.tmp = [np.empty_like(a) for a in self.acts]
+        self.grad_w = [np.empty_like(w) for w in self.weights]
+        self.grad_b = [np.empty_like(b) for b in self.biases]
+        self.step = np.empty((k, 1, 1), dtype=self.dtype)
+        self.loss = np.empty(k, dtype=self.dtype)
+
+    def forward(self, X):
+        """Выходы всех сетей, (K, строки, выходы); X общий, (строки, входы)."""
+        a = X
+        for w, b, out in zip(self.weights, self.biases, self.acts):
+            np.matmul(a, w, out=out)   # (строки, n) @ (K, n, m) -> (K, строки, m)
+            out += b
+            a = sigmoid(out, out=out)
+        return a
+
+    def train_step(self, X, y):
+        """Шаг всех сетей по всему набору; возвращает MSE каждой сети, (K,)."""
+        out = self.forward(X)
+        d = self.deltas[-1]
+        np.subtract(out, y, out=d)
+        np.einsum("krn,krn->k", d, d, out=self.loss)
+        self.loss /= d.shape[1] * d.shape[2]
+        d *= sigmoid_derivative(out, out=self.tmp[-1])
+
+        np.divide(self.lrs, len(X), out=self.step)
+        for l in range(len(self.weights) - 1, -1, -1):
+            d = self.deltas[l]
+            if l == 0:
+                np.matmul(X.T, d, out=self.grad_w[l])
+            else:
+                a_prev = self.acts[l - 1]
+                np.matmul(a_prev.transpose(0, 2, 1), d, out=self.grad_w[l])
+                d_prev = self.deltas[l - 1]
+                np.matmul(d, self.weights[l].transpose(0, 2, 1), out=d_prev)
+                d_prev *= sigmoid_derivative(a_prev, out=self.tmp[l - 1])
+            np.sum(d, axis=1, keepdims=True, out=self.grad_b[l])
+            self.grad_w[l] *= self.step
+            self.grad_b[l] *= self.step
+            self.weights[l] -= self.grad_w[l]
+            self.biases[l] -= self.grad_b[l]
+        return self.loss
+
+def train_stack(sizes, seeds, lrs, X, y, epochs, dtype=dtype):
+    """
+    Обучает сети вместе; возвращает (сети, эпоха сходимости каждой сети — первая, после
+    которой MSE < converge_mse, или -1, итоговая MSE каждой сети).
+    """
+    X = np.asarray(X, dtype=dtype)
+    y = np.asarray(y, dtype=dtype)
+    stack = MLPStack(sizes, seeds, lrs, len(X), dtype)
+    converged = np.full(stack.k, -1)
+    pending = np.ones(stack.k, dtype=bool)
+    below = np.empty(stack.k, dtype=bool)
+    for epoch in range(epochs):
+        loss = stack.train_step(X, y)
+        np.less(loss, converge_mse, out=below)
+        below &= pending
+        if below.any():
+            # loss — до обновления этой эпохи, т.е. после epoch эпох обучения
+            converged[below] = epoch
+            pending &= ~below
+    # итоговая ошибка — после последнего шага
+    out = stack.forward(X)
+    final = ((out - y) ** 2).mean(axis=(1, 2))
+    return stack, converged, final
+
+def stack_report(seeds, lrs, converged, final, path=None):
+    """Сводка по скоростям обучения; path — CSV по каждой сети."""
+    if path:
+        with open(path, "w") as f:
+            f.write("network,seed,lr,converged_epoch,final_mse\n")
+            for i, (seed, lr, c, e) in enumerate(zip(seeds, lrs, converged, final)):
+                f.write(f"{i},{seed},{lr:g},{c},{e:.6e}\n")
+    lrs = np.asarray(lrs)
+    print(f"{'lr':>8} {'nets':>6} {'converged':>10} {'median epoch':>13} {'p90 epoch':>10} {'median mse':>11}")
+    for lr in np.unique(lrs):
+        sel = lrs == lr
+        ok = converged[sel][converged[sel] >= 0]
+        med = f"{np.median(ok):.0f}" if len(ok) else "-"
+        p90 = f"{np.percentile(ok, 90):.0f}" if len(ok) else "-"
+        print(f"{lr:>8g} {sel.sum():>6} {len(ok) / sel.sum():>10.1%} {med:>13} {p90:>10} {np.median(final[sel]):>11.2e}")
+
+def array_batches(X, y, shuffle=None):
+    """Пакеты из массивов в памяти; shuffle — генератор случайных чисел или None."""
+    order = np.arange(len(X))
+
+    def batches(x_buf, y_buf):
+        rows = len(X)
+        size = len(x_buf)
+        if shuffle is not None:
+            shuffle.shuffle(order)   # на месте, без нового массива
+        for start in range(0, rows, size):
+            n = min(size, rows - start)
+            if shuffle is None:
+                x_buf[:n] = X[start:start + n]
+                y_buf[:n] = y[start:start + n]
+            else:
+                # mode="clip": с проверкой индексов (по умолчанию) take пишет через временный массив
+                np.take(X, order[start:start + n], axis=0, out=x_buf[:n], mode="clip")
+                np.take(y, order[start:start + n], axis=0, out=y_buf[:n], mode="clip")
+            yield n
+    return batches
+
+def file_batches(path, n_in, shuffle=None):
+    """
+    Пакеты из .npy-таблицы (строки, входы + выходы), открытой через mmap: в память читается
+    только текущий пакет, так что размер набора не ограничен памятью. shuffle перемешивает
+    порядок пакетов (строки внутри пакета идут подряд — так диск читается последовательно).
+    """
+    data = np.load(path, mmap_mode="r")
+
+    def batches(x_buf, y_buf):
+        rows = len(data)
+        size = len(x_buf)
+        starts = np.arange(0, rows, size)
+        if shuffle is not None:
+            shuffle.shuffle(starts)
+        for start in starts:
+            n = min(size, rows - start)
+            block = data[start:start + n]
+            x_buf[:n] = block[:, :n_in]   # копирование с приведением к dtype сети
+            y_buf[:n] = block[:, n_in:]
+            yield n
+    return batches
+
+def make_data(path, rows, n_in=2, noise=0.05, seed=0, chunk=1 << 20):
+    """
+    Пишет на диск .npy с rows строками «непрерывного XOR»: входы равномерны в [0, 1),
+    ответ — XOR признаков x > 0.5, входы слегка зашумлены. Пишется кусками через memmap.
+    """
+    rng = np.random.default_rng(seed)
+    data = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(rows, n_in + 1))
+    for start in range(0, rows, chunk):
+        n = min(chunk, rows - start)
+        x = rng.random((n, n_in), dtype=np.float32)
+        data[start:start + n, n_in] = np.bitwise_xor.reduce(x > 0.5, axis=1)
+        data[start:start + n, :n_in] = x + rng.normal(0, noise, (n, n_in)).astype(np.float32)
+    data.flush()
+    del data
 
 # Входные данные и выходные данные для XOR
 X = np.array([[0, 0], [0, 1], [1, 0], [1, 1]])
 y = np.array([[0], [1], [1], [0]])
 
-# Параметры нейронной сети
-input_size = 2
-hidden_size = 4
-output_size = 1
-learning_rate = 0.1
-
-# Инициализация весов случайными значениями
-weights_input_hidden = np.random.rand(input_size, hidden_size)
-weights_hidden_output = np.random.rand(hidden_size, output_size)
-
-# Обучение нейронной сети
-for epoch in range(10000):
-    # Прямое распространение (forward propagation)
-    hidden_layer_input = np.dot(X, weights_input_hidden)
-    hidden_layer_output = sigmoid(hidden_layer_input)
-
-    output_layer_input = np.dot(hidden_layer_output, weights_hidden_output)
-    predicted_output = sigmoid(output_layer_input)
-
-    # Вычисление ошибки
-    error = y - predicted_output
-
-    # Обратное распространение (backpropagation)
-    d_predicted_output = error * sigmoid_derivative(predicted_output)
-    d_hidden_layer_output = d_predicted_output.dot(weights_hidden_output.T) * sigmoid_derivative(hidden_layer_output)
-
-    # Обновление весов
-    weights_hidden_output += hidden_layer_output.T.dot(d_predicted_output) * learning_rate
-    weights_input_hidden += X.T.dot(d_hidden_layer_output) * learning_rate
-
-# Проверка обученной сети
-print("Обученная сеть:")
-for i in range(len(X)):
-    hidden_layer_input = np.dot(X[i:i+1], weights_input_hidden)
-    hidden_layer_output = sigmoid(hidden_layer_input)
-    output_layer_input = np.dot(hidden_layer_output, weights_hidden_output)
-    predicted_output = sigmoid(output_layer_input)
-    print(f"Вход: {X[i]}, Выход: {predicted_output[0]:.4f}")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Многослойный перцептрон (по умолчанию — XOR)")
+    parser.add_argument("--layers", default=",".join(map(str, layer_sizes)), help="размеры слоёв, например 2,16,16,1")
+    parser.add_argument("--lr", type=float, default=learning_rate, help="скорость обучения")
+    parser.add_argument("--epochs", type=int, default=epochs)
+    parser.add_argument("--batch", type=int, default=batch_size, help="строк в мини-пакете")
+    parser.add_argument("--float32", action="store_true", help="считать в float32")
+    parser.add_argument("--seed", type=int, help="зерно инициализации весов")
+    parser.add_argument("--no-shuffle", action="store_true", help="не перемешивать пакеты")
+    parser.add_argument("--data", metavar="FILE.npy",
+                        help="обучать на таблице (строки, входы + выходы) с диска вместо XOR")
+    parser.add_argument("--make-data", metavar="FILE.npy", help="записать набор «непрерывный XOR» и выйти")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="строк для --make-data")
+    parser.add_argument("--stack", type=int, metavar="K",
+                        help="обучить K сетей XOR сразу (зёрна seed..seed+K-1) и сравнить сходимость")
+    parser.add_argument("--lrs", default=None, help="скорости для --stack через запятую, сети получают их по кругу")
+    parser.add_argument("--report", metavar="FILE.csv", help="для --stack: эпоха сходимости и MSE каждой сети")
+    parser.add_argument("--save", metavar="FILE", help="сохранить веса после обучения")
+    parser.add_argument("--load", metavar="FILE", help="взять веса из файла вместо обучения")
+    parser.add_argument("--predict", metavar="IN.npy",
+                        help="прогнать сеть по таблице (первые столбцы — входы) и выйти")
+    parser.add_argument("--out", metavar="OUT.npy", help="куда записать выходы --predict")
+    parser.add_argument("--chunk", type=int, default=predict_chunk, help="строк за проход predict")
+    args = parser.parse_args()
+
+    if args.make_data:
+        make_data(args.make_data, args.rows)
+        raise SystemExit
+    sizes = [int(n) for n in args.layers.split(",")]
+    if args.stack:
+        base = args.seed or 0
+        seeds = [base + i for i in range(args.stack)]
+        grid = [float(v) for v in args.lrs.split(",")] if args.lrs else [args.lr]
+        lrs = [grid[i % len(grid)] for i in range(args.stack)]
+        t0 = time.perf_counter()
+        _, converged, final = train_stack(sizes, seeds, lrs, X, y, args.epochs,
+                                          np.float32 if args.float32 else dtype)
+        print(f"{args.stack} networks x {args.epochs} epochs: {time.perf_counter() - t0:.1f} s, "
+              f"converged = MSE < {converge_mse:g}")
+        stack_report(seeds, lrs, converged, final, args.report)
+        raise SystemExit
+    if args.load:
+        model = load_weights(args.load, args.chunk)
+    else:
+        net = MLP(sizes, np.float32 if args.float32 else dtype, args.batch, args.seed)
+        shuffle = None if args.no_shuffle else np.random.default_rng(args.seed)
+        if args.data:
+            batches = file_batches(args.data, sizes[0], shuffle)
+        else:
+            batches = array_batches(X.astype(net.dtype), y.astype(net.dtype), shuffle)
+
+        # Обучение нейронной сети
+        report = max(1, args.epochs // 10)
+        t0 = time.perf_counter()
+        for epoch in range(args.epochs):
+            loss = net.train_epoch(batches, args.lr)
+            if args.data or (epoch + 1) % report == 0:
+                print(f"epoch {epoch + 1}: mse {loss:.6f}, {time.perf_counter() - t0:.1f} s", file=sys.stderr)
+        if args.save:
+            save_weights(args.save, net.weights, net.biases)
+        model = net.predictor(args.chunk)
+
+    if args.predict:
+        data = np.load(args.predict, mmap_mode="r")
+        inputs = data[:, :model.sizes[0]]
+        out = None
+        if args.out:
+            out = np.lib.format.open_memmap(args.out, mode="w+", dtype=model.dtype,
+                                            shape=(len(data), model.sizes[-1]))
+        t0 = time.perf_counter()
+        out = model.predict(inputs, out)
+        elapsed = time.perf_counter() - t0
+        print(f"{len(data)} rows in {elapsed:.2f} s ({len(data) / elapsed / 1e6:.1f}M rows/s)", file=sys.stderr)
+        if args.out:
+            out.flush()
+        elif data.shape[1] > model.sizes[0]:
+            # в таблице есть ответы — средняя ошибка
+            print(f"mse {np.mean((out - data[:, model.sizes[0]:]) ** 2):.6f}")
+    elif not args.data:
+        # Проверка обученной сети
+        print("Обученная сеть:")
+        predicted_output = model.predict(X)
+        for x, p in zip(X, predicted_output):
+            print(f"Вход: {x}, Выход: {p[0]:.4f}")
@@ -1,48 +1,109 @@
+import argparse
 import random
+import sys
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from itertools import accumulate
+
+class MarkovModel:
+  """
+  Скомпилированная цепь Маркова по словам: строится один раз, дальше из неё можно
+  генерировать сколько угодно текстов.
+
+  Слова заменены целыми номерами (words[i] — слово с номером i), переходы хранятся
+  в CSR-массивах: последователи слова i — next_ids[offsets[i]:offsets[i + 1]],
+  cum — накопленные (сквозь все строки) счётчики переходов. Следующее слово
+  выбирается двоичным поиском случайного числа в cum, с теми же вероятностями,
+  что и random.choice по списку всех повторов. Память растёт с числом различных
+  пар слов, а не с размером корпуса.
+  """
+
+  def __init__(self, corpus):
+    """
+    Args:
+      corpus: Текст или итерируемое кусков текста (например, открытый файл) —
+        куски читаются по одному, пары слов продолжаются через их границы,
+        так что большой корпус не обязательно держать в памяти целиком.
+    """
+    if isinstance(corpus, str):
+      corpus = [corpus]
+    ids = {}
+    pairs = Counter()  # (текущее << 32 | следующее) -> сколько раз
+    prev = -1
+    for chunk in corpus:
+      chunk = [ids.setdefault(word, len(ids)) for word in chunk.split()]
+      if not chunk:
+        continue
+      if prev >= 0:
+        pairs[prev << 32 | chunk[0]] += 1
+      pairs.update([a << 32 | b for a, b in zip(chunk, chunk[1:])])
+      prev = chunk[-1]
+    if not ids:
+      raise ValueError("empty corpus")
+    self.words = list(ids)
+
+    # Пары, отсортированные по текущему слову, — это и есть строки CSR;
+    # cum накапливается сквозь все строки, доля строки — разность с её началом.
+    keys = sorted(pairs)
+    self.next_ids = array("q", [key & 0xFFFFFFFF for key in keys])
+    self.cum = array("q", accumulate([pairs[key] for key in keys]))
+    row_sizes = Counter([key >> 32 for key in keys])
+    self.offsets = array("q", accumulate([row_sizes[i] for i in range(len(self.words))], initial=0))
+    del pairs, keys
+
+    # Начальное слово (и слово после тупика) — произвольное слово корпуса,
+    # то есть с вероятностью, пропорциональной его частоте: это число пар,
+    # которые с него начинаются, и ещё одно вхождение у последнего слова.
+    self.start_cum = array("q", accumulate(
+      [self._row_total(i) + (i == prev) for i in range(len(self.words))]))
+
+  def _row_total(self, i):
+    """Число переходов из слова i."""
+    lo, hi = self.offsets[i], self.offsets[i + 1]
+    base = self.cum[lo - 1] if lo > 0 else 0
+    return (self.cum[hi - 1] if lo < hi else base) - base
+
+  def random_word(self, rng=random):
+    """Номер произвольного слова корпуса (по частоте)."""
+    return bisect_right(self.start_cum, rng.randrange(self.start_cum[-1]))
+
+  def next_word(self, current, rng=random):
+    """Номер следующего слова после current; -1, если за ним в корпусе ничего нет."""
+    lo, hi = self.offsets[current], self.offsets[current + 1]
+    if lo == hi:
+      return -1
+    base = self.cum[lo - 1] if lo > 0 else 0
+    r = base + rng.randrange(self.cum[hi - 1] - base)
+    return self.next_ids[bisect_right(self.cum, r, lo, hi)]
+
+  def generate(self, length=100, rng=random):
+    """Текст из length слов."""
+    current = self.random_word(rng)
+    generated = [current]
+    for _ in range(length - 1):
+      current = self.next_word(current, rng)
+      if current < 0:
+        # Если у слова нет продолжения, выбираем произвольное слово
+        # из корпуса, чтобы продолжить генерацию.
+        current = self.random_word(rng)
+      generated.append(current)
+    return " ".join([self.words[i] for i in generated])
 
 def generate_text(corpus, length=100):
   """
   Генерирует текст на основе корпуса текста, используя цепи Маркова.
 
   Args:
-    corpus: Текст, на основе которого генерируется новый текст.
+    corpus: Текст, на основе которого генерируется новый текст, или уже
+      построенная MarkovModel — тогда цепь не строится заново.
     length: Желаемая длина сгенерированного текста (количество слов).
 
   Returns:
     Сгенерированный текст.
   """
-
-  # Создаем словарь, где ключ - слово, а значение - список слов,
-  # которые следуют за ним в корпусе.
-  markov_chain = {}
-  words = corpus.split()
-
-  for i in range(len(words) - 1):
-    current_word = words[i]
-    next_word = words[i+1]
-    if current_word in markov_chain:
-      markov_chain[current_word].append(next_word)
-    else:
-      markov_chain[current_word] = [next_word]
-
-  # Начинаем генерацию с произвольного слова из корпуса.
-  current_word = random.choice(words)
-  generated_text = [current_word]
-
-  # Генерируем текст, выбирая следующее слово из списка возможных
-  # слов, которые следуют за текущим словом.
-  for _ in range(length - 1):
-    if current_word in markov_chain:
-      next_word = random.choice(markov_chain[current_word])
-      generated_text.append(next_word)
-      current_word = next_word
-    else:
-      # Если текущего слова нет в цепи Маркова, выбираем произвольное
-      # слово из корпуса, чтобы продолжить генерацию.
-      current_word = random.choice(words)
-      generated_text.append(current_word)
-
-  return " ".join(generated_text)
+  model = corpus if isinstance(corpus, MarkovModel) else MarkovModel(corpus)
+  return model.generate(length)
 
 
 # Пример использования:
@@ -52,5 +113,20 @@ The lazy dog sleeps.
 The quick fox runs.
 """
 
-generated_text = generate_text(corpus, length=20)
-print(generated_text)
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Генерация текста цепью Маркова по словам")
+  parser.add_argument("file", nargs="?", help="файл корпуса (по умолчанию — встроенный пример)")
+  parser.add_argument("--length", type=int, default=20, help="слов в тексте")
+  parser.add_argument("--count", type=int, default=1, help="сколько текстов сгенерировать")
+  parser.add_argument("--seed", type=int, help="зерно генератора случайных чисел")
+  args = parser.parse_args()
+
+  random.seed(args.seed)
+  if args.file:
+    with open(args.file, encoding="utf-8") as f:
+      model = MarkovModel(f)
+    print(f"{len(model.words)} words, {len(model.next_ids)} distinct pairs", file=sys.stderr)
+  else:
+    model = MarkovModel(corpus)
+  for _ in range(args.count):
+    print(generate_text(model, length=args.length))
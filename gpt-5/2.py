@@ -1,6 +1,8 @@
 # напиши программу на Python, которая показывает мяч, подпрыгивающий внутри вращающегося  шестиугольника. На мяч должны влиять гравитация и трение, и он должен реалистично отскакивать от вращающихся стен
 
+import argparse
 import math
+import os
 import sys
 import pygame as pg
 from pygame.math import Vector2 as Vec
@@ -41,6 +43,38 @@ def regular_polygon(center: Vec, radius: float, n: int, angle: float):
         verts.append(center + Vec(math.cos(a), math.sin(a)) * radius)
     return verts
 
+def contact_impulse(vel: Vec, n: Vec, q: Vec, center: Vec, omega: float,
+                    restitution: float, mu: float):
+    """
+    Импульс удара и трение Кулона в точке контакта q с нормалью n (от стены к шару).
+    Учитывает скорость точки стены из-за вращения полигона вокруг center.
+    Возвращает новую скорость шара.
+    """
+    # Скорость точки стены (т.к. стена — часть вращающегося жёсткого тела)
+    r = q - center
+    v_wall = perp(r) * omega
+
+    # Относительная скорость в точке контакта
+    v_rel = vel - v_wall
+    v_rel_n = v_rel.dot(n)
+
+    if v_rel_n < 0.0:
+        # Импульс по нормали (стенка бесконечно тяжёлая)
+        Jn = -(1.0 + restitution) * v_rel_n
+        vel += Jn * n
+
+        # Трение (Кулона) по касательной
+        vt_vec = v_rel - v_rel_n * n
+        vt = vt_vec.length()
+        if vt > 1e-6:
+            t_hat = vt_vec / vt
+            # Нужный импульс, чтобы погасить vt: Jt_need = vt (масса=1)
+            # Ограничиваем Jt <= mu * Jn (Кулон)
+            Jt = min(mu * Jn, vt)
+            vel -= Jt * t_hat
+
+    return vel
+
 def resolve_circle_vs_segment(pos: Vec, vel: Vec, radius: float,
                               a: Vec, b: Vec, center: Vec, omega: float,
                               restitution: float, mu: float):
@@ -76,28 +110,7 @@ def resolve_circle_vs_segment(pos: Vec, vel: Vec, radius: float,
         else:
             n = n.normalize()
 
-    # Скорость точки стены (т.к. стена — часть вращающегося жёсткого тела)
-    r = q - center
-    v_wall = perp(r) * omega
-
-    # Относительная скорость в точке контакта
-    v_rel = vel - v_wall
-    v_rel_n = v_rel.dot(n)
-
-    if v_rel_n < 0.0:
-        # Импульс по нормали (стенка бесконечно тяжёлая)
-        Jn = -(1.0 + restitution) * v_rel_n
-        vel += Jn * n
-
-        # Трение (Кулона) по касательной
-        vt_vec = v_rel - v_rel_n * n
-        vt = vt_vec.length()
-        if vt > 1e-6:
-            t_hat = vt_vec / vt
-            # Нужный импульс, чтобы погасить vt: Jt_need = vt (масса=1)
-            # Ограничиваем Jt <= mu * Jn (Кулон)
-            Jt = min(mu * Jn, vt)
-            vel -= Jt * t_hat
+    vel = contact_impulse(vel, n, q, center, omega, restitution, mu)
 
     # Исправление проникновения (positional correction)
     penetration = radius - dist
@@ -105,7 +118,147 @@ def resolve_circle_vs_segment(pos: Vec, vel: Vec, radius: float,
 
     return pos, vel, True
 
-def main():
+# ----------------- Непрерывные столкновения (CCD) ----------------
+CCD_TOL = 0.01        # зазор (пикс), при котором считаем, что касание наступило
+CCD_MAX_ITERS = 200   # предел итераций поиска касания на одну грань
+CCD_MAX_EVENTS = 64   # предел ударов за один шаг (шар зажат в углу и т.п.)
+
+def edge_halfplane(a: Vec, b: Vec, center: Vec, radius: float):
+    """
+    Грань выпуклого полигона вокруг center как полуплоскость для центра шара:
+    (p - center)·u <= L, u — внешняя единичная нормаль, L — апофема минус радиус шара.
+    Для шара внутри выпуклого полигона касание отрезка a-b равносильно касанию этой прямой.
+    """
+    u = perp(b - a)
+    if u.length_squared() == 0.0:
+        return None, 0.0
+    u = u.normalize()
+    h = (a - center).dot(u)
+    if h < 0.0:
+        u, h = -u, -h
+    return u, h - radius
+
+def time_of_impact(pos: Vec, vel: Vec, u: Vec, limit: float,
+                   center: Vec, omega: float, t_max: float):
+    """
+    Время первого касания шара, летящего по прямой pos + vel*t, с гранью (u, limit) из
+    edge_halfplane, которая вращается вокруг center с угловой скоростью omega.
+    Зазор g(t) = (pos + vel*t - center)·u(t) - limit, u(t) = u повёрнутый на omega*t.
+    Conservative advancement второго порядка: |g''| <= M2, поэтому из точки (g, g')
+    касания не будет раньше корня g + g'*s + M2*s^2/2 = 0. Так шаг остаётся крупным
+    и при скольжении вдоль стены, где обычный шаг g / v_max вырождается.
+    Расходящиеся касания (шар уже уходит от стены) пропускаются.
+    Возвращает t в [0, t_max] или None, если касания на интервале нет.
+    """
+    p0 = pos - center
+    speed = vel.length()
+    m2 = 2.0 * abs(omega) * speed + omega * omega * (p0.length() + speed * t_max)
+    t = 0.0
+    for _ in range(CCD_MAX_ITERS):
+        p = p0 + vel * t
+        u_t = u.rotate_rad(omega * t)
+        gap = p.dot(u_t) - limit                         # > 0 — проникновение
+        rate = vel.dot(u_t) + omega * p.dot(perp(u_t))   # скорость шара «в стену»
+        if gap >= -CCD_TOL:
+            if rate > 0.0:
+                return t
+            gap = -CCD_TOL   # касаемся, но расходимся — шагаем дальше
+        if m2 > 0.0:
+            s = (-rate + math.sqrt(rate * rate - 2.0 * m2 * gap)) / m2
+        elif rate > 0.0:
+            s = -gap / rate
+        else:
+            return None
+        t += s
+        if t > t_max:
+            return None
+    # Не сошлось: отдаём текущий момент, вызывающий разрешит касание сам
+    return t
+
+def step_ball(pos: Vec, vel: Vec, theta: float, dt: float):
+    """
+    Один шаг физики без подшагов: интеграция скорости, затем движение по прямой
+    с поиском первого касания (CCD) и точным разрешением каждого удара в момент контакта.
+    Возвращает (pos, vel, theta).
+    """
+    # Интеграция (semi-implicit Euler)
+    vel.y += g * dt
+
+    # Воздушное трение как экспоненциальное затухание
+    if air_drag > 0.0:
+        vel *= math.exp(-air_drag * dt)
+
+    remaining = dt
+    for _ in range(CCD_MAX_EVENTS):
+        verts = regular_polygon(CENTER, R_POLY, SIDES, theta)
+        planes = [edge_halfplane(verts[i], verts[(i + 1) % SIDES], CENTER, ball_r)
+                  for i in range(SIDES)]
+
+        # Ближайшее по времени касание среди всех граней
+        t_hit, edge = remaining, None
+        for i, (u, limit) in enumerate(planes):
+            if u is None:
+                continue
+            t = time_of_impact(pos, vel, u, limit, CENTER, omega, t_hit)
+            if t is not None and t <= t_hit:
+                t_hit, edge = t, i
+
+        theta += omega * t_hit
+        pos += vel * t_hit
+        remaining -= t_hit
+        if edge is None:
+            break
+
+        # Удар в момент касания: нормаль — внутрь полигона, точка контакта — на стене
+        n = -planes[edge][0].rotate_rad(omega * t_hit)
+        q = pos - n * ball_r
+        vel = contact_impulse(vel, n, q, CENTER, omega, restitution, friction_mu)
+    else:
+        # Шар зажат (слишком много ударов за шаг): остаток шага только вращаем стены
+        theta += omega * remaining
+
+    # Касание ловится с зазором CCD_TOL, поэтому за много шагов скольжения вдоль стены
+    # может накопиться проникновение порядка CCD_TOL — проецируем центр шара обратно
+    # в допустимую область (полигон выпуклый, значит, проекция всегда внутрь)
+    verts = regular_polygon(CENTER, R_POLY, SIDES, theta)
+    for i in range(SIDES):
+        u, limit = edge_halfplane(verts[i], verts[(i + 1) % SIDES], CENTER, ball_r)
+        if u is None:
+            continue
+        gap = (pos - CENTER).dot(u) - limit
+        if gap > 0.0:
+            pos -= u * gap
+            vel = contact_impulse(vel, -u, pos + u * ball_r, CENTER, omega, restitution, friction_mu)
+    return pos, vel, theta
+
+def load_trajectory():
+    # trajectory.py (формат записи траекторий) лежит в корне репозитория
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+    import trajectory
+    return trajectory
+
+def load_video_export():
+    # video_export.py (фоновая запись кадров) лежит рядом со скриптом
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import video_export
+    return video_export
+
+def draw_scene(screen, font, pos: Vec, theta: float):
+    # Полигон, мяч и строка параметров — общий рендер для окна и для экспорта
+    screen.fill(BG)
+    verts = regular_polygon(CENTER, R_POLY, SIDES, theta)
+    pg.draw.polygon(screen, WALL, verts, width=5)
+    pg.draw.circle(screen, BALL, (int(pos.x), int(pos.y)), int(ball_r))
+
+    info1 = f"omega: {omega:+.2f} rad/s   g: {g:.0f}   e(restitution): {restitution:.2f}   mu: {friction_mu:.2f}"
+    screen.blit(font.render(info1, True, TEXT), (12, 12))
+
+def main(record=None):
+    writer = None
+    if record:
+        writer = load_trajectory().TrajectoryWriter(record, CENTER.x, CENTER.y, R_POLY, ball_r, SIDES)
+    t_sim = 0.0
+
     pg.init()
     screen = pg.display.set_mode((W, H))
     pg.display.set_caption("Bouncing ball in rotating hexagon (gravity + friction)")
@@ -140,83 +293,117 @@ def main():
                 elif e.key == pg.K_2:
                     globals()['friction_mu'] = min(1.0, globals()['friction_mu'] + 0.02)
 
-        # Шаг времени
+        # Шаг времени: благодаря CCD подшаги и «подстраховка» не нужны,
+        # ограничение лишь от огромных скачков (перетаскивание окна и т.п.)
         dt = clock.tick(120) / 1000.0
-        dt = min(dt, 1/60)  # ограничим скачки dt
-        substeps = 2        # для устойчивости при быстрых столкновениях
-        sdt = dt / substeps
-
-        for _ in range(substeps):
-            # Обновляем поворот полигона
-            theta += omega * sdt
-
-            # Интеграция (semi-implicit Euler)
-            vel.y += g * sdt
-
-            # Воздушное трение как экспоненциальное затухание
-            if air_drag > 0.0:
-                damp = math.exp(-air_drag * sdt)
-                vel *= damp
-
-            pos += vel * sdt
-
-            # Текущие вершины шестиугольника
-            verts = regular_polygon(CENTER, R_POLY, SIDES, theta)
-
-            # Столкновения с каждой гранью
-            collided_any = False
-            for i in range(SIDES):
-                a = verts[i]
-                b = verts[(i + 1) % SIDES]
-                pos, vel, collided = resolve_circle_vs_segment(
-                    pos, vel, ball_r, a, b, CENTER, omega, restitution, friction_mu
-                )
-                collided_any = collided_any or collided
-
-            # Подстраховка: если вдруг улетели наружу (крайне редко), направим внутрь
-            if not collided_any:
-                # Проверим минимальную дистанцию до сторон
-                min_dist = float("inf")
-                push_n = None
-                push_q = None
-                for i in range(SIDES):
-                    a = verts[i]
-                    b = verts[(i + 1) % SIDES]
-                    e = b - a
-                    len2 = e.length_squared()
-                    if len2 == 0.0:
-                        continue
-                    t = (pos - a).dot(e) / len2
-                    t = max(0.0, min(1.0, t))
-                    q = a + e * t
-                    d = (pos - q).length()
-                    if d < min_dist:
-                        min_dist = d
-                        push_q = q
-                if push_q is not None and min_dist < ball_r * 0.7:
-                    n = (pos - push_q)
-                    if n.length_squared() > 1e-8:
-                        n = n.normalize()
-                        pos += n * (ball_r - min_dist + 0.001)
+        dt = min(dt, 0.1)
+        pos, vel, theta = step_ball(pos, vel, theta, dt)
+        t_sim += dt
+        if writer:
+            writer.append(t_sim, pos.x, pos.y, vel.x, vel.y, theta)
 
         # Рендер
+        draw_scene(screen, font, pos, theta)
+        info2 = "Controls: LEFT/RIGHT = omega, UP/DOWN = restitution, 1/2 = friction mu, ESC = quit"
+        screen.blit(font.render(info2, True, TEXT), (12, 36))
+
+        pg.display.flip()
+
+    if writer:
+        writer.close()
+    pg.quit()
+    sys.exit()
+
+def replay(path):
+    """Проигрывание записанной траектории: только чтение файла и рендер, без физики."""
+    trajectory = load_trajectory()
+    reader = trajectory.TrajectoryReader(path)
+    player = trajectory.ReplayClock(reader)
+    center = Vec(reader.cx, reader.cy)
+
+    pg.init()
+    screen = pg.display.set_mode((W, H))
+    pg.display.set_caption(f"Replay: {path}")
+    clock = pg.time.Clock()
+    font = pg.font.SysFont("consolas", 18)
+
+    running = True
+    while running:
+        for e in pg.event.get():
+            if e.type == pg.QUIT:
+                running = False
+            elif e.type == pg.KEYDOWN:
+                if e.key == pg.K_ESCAPE:
+                    running = False
+                elif e.key == pg.K_SPACE:
+                    player.paused = not player.paused
+                elif e.key == pg.K_LEFT:
+                    player.seek(player.t - 2.0)
+                elif e.key == pg.K_RIGHT:
+                    player.seek(player.t + 2.0)
+                elif e.key == pg.K_UP:
+                    player.faster()
+                elif e.key == pg.K_DOWN:
+                    player.slower()
+                elif e.key == pg.K_HOME:
+                    player.seek(0.0)
+
+        _, x, y, vx, vy, theta = player.advance(clock.tick(120) / 1000.0)
+
         screen.fill(BG)
-        verts = regular_polygon(CENTER, R_POLY, SIDES, theta)
+        verts = regular_polygon(center, reader.poly_radius, reader.sides, theta)
         pg.draw.polygon(screen, WALL, verts, width=5)
-        pg.draw.circle(screen, BALL, (int(pos.x), int(pos.y)), int(ball_r))
+        pg.draw.circle(screen, BALL, (int(x), int(y)), int(reader.ball_radius))
 
-        # Инфо
-        info1 = f"omega: {omega:+.2f} rad/s   g: {g:.0f}   e(restitution): {restitution:.2f}   mu: {friction_mu:.2f}"
-        info2 = "Controls: LEFT/RIGHT = omega, UP/DOWN = restitution, 1/2 = friction mu, ESC = quit"
-        surf1 = font.render(info1, True, TEXT)
-        surf2 = font.render(info2, True, TEXT)
-        screen.blit(surf1, (12, 12))
-        screen.blit(surf2, (12, 36))
+        info1 = f"{player.status()}   |v| = {math.hypot(vx, vy):7.1f}"
+        info2 = "Controls: SPACE = pause, LEFT/RIGHT = seek 2 s, UP/DOWN = speed, HOME = start, ESC = quit"
+        screen.blit(font.render(info1, True, TEXT), (12, 12))
+        screen.blit(font.render(info2, True, TEXT), (12, 36))
 
         pg.display.flip()
 
+    reader.close()
     pg.quit()
     sys.exit()
 
+def export(out, seconds, fps=60):
+    """
+    Безоконный экспорт в видео: фиксированный шаг 1/fps, рендер в pygame.Surface,
+    запись кадров — в фоновом потоке (см. video_export.py). Скорость не привязана к часам.
+    """
+    video_export = load_video_export()
+    video_export.use_dummy_video()
+    pg.init()
+    screen = pg.Surface((W, H))
+    font = pg.font.SysFont("consolas", 18)
+    exporter = video_export.FrameExporter(out, (W, H), fps)
+
+    theta = 0.0
+    pos = ball_pos.copy()
+    vel = ball_vel.copy()
+    dt = 1.0 / fps
+    try:
+        for _ in range(int(round(seconds * fps))):
+            pos, vel, theta = step_ball(pos, vel, theta, dt)
+            draw_scene(screen, font, pos, theta)
+            exporter.submit(screen)
+    finally:
+        exporter.close()
+        pg.quit()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Bouncing ball in rotating hexagon")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--record", metavar="FILE", help="записать траекторию (каждый шаг физики) в файл")
+    group.add_argument("--replay", metavar="FILE", help="проиграть записанную траекторию без физики")
+    group.add_argument("--export", metavar="OUT",
+                       help="без окна записать видео: OUT.mp4 (ffmpeg), OUT.raw (RGB24) или каталог PNG")
+    parser.add_argument("--seconds", type=float, default=10.0, help="длительность экспорта (с)")
+    parser.add_argument("--fps", type=int, default=60, help="кадров в секунду при экспорте")
+    args = parser.parse_args()
+    if args.export:
+        export(args.export, args.seconds, args.fps)
+    elif args.replay:
+        replay(args.replay)
+    else:
+        main(args.record)
\ No newline at end of file
@@ -1,9 +1,18 @@
 # напиши программу на Python, которая показывает мяч, подпрыгивающий внутри вращающегося  шестиугольника. На мяч должны влиять гравитация и трение, и он должен реалистично отскакивать от вращающихся стен
 
 
+import argparse
 import math
+import os
+import sys
+import time
+import tracemalloc
 import pygame
 from pygame.math import Vector2
+try:
+    import numpy as np   # нужен только для режима многих мячей (--balls > 1)
+except ImportError:
+    np = None
 
 # ---------------- ПАРАМЕТРЫ ----------------
 WIDTH, HEIGHT = 800, 800
@@ -19,6 +28,8 @@ POS_CORR_FACTOR = 1.0          # коэффициент "выдавливани
 BALL_RADIUS = 14.0
 BALL_MASS = 1.0
 
+BALL_REST_COEFF = 0.9          # реституция при ударе мяч–мяч
+
 PHYS_DT = 1.0 / 240.0          # фиксированный шаг физики
 FPS_CAP = 120                  # ограничение кадров отрисовки
 
@@ -117,27 +128,395 @@ def solve_collisions(ball_pos: Vector2, ball_vel: Vector2, radius: float, mass:
 
     return ball_pos, ball_vel
 
+# -------------- СКАЛЯРНОЕ ЯДРО БЕЗ ВРЕМЕННЫХ ОБЪЕКТОВ --------------
+# То же, что regular_hex_vertices + solve_collisions, но на обычных float:
+# состояние в объектах со __slots__, вершины — в заранее выделенных буферах,
+# за шаг не создаётся ни одного Vector2.
+
+class BallState:
+    __slots__ = ("x", "y", "vx", "vy")
+
+    def __init__(self, x: float, y: float, vx: float, vy: float):
+        self.x = x
+        self.y = y
+        self.vx = vx
+        self.vy = vy
+
+class HexState:
+    __slots__ = ("cx", "cy", "radius", "angle", "omega", "vx", "vy", "_ux", "_uy")
+
+    def __init__(self, center: Vector2, radius: float, angle: float, omega: float):
+        self.cx = center.x
+        self.cy = center.y
+        self.radius = radius
+        self.angle = angle
+        self.omega = omega
+        # буферы вершин (перезаписываются на месте) и единичные направления на вершины при angle = 0
+        self.vx = [0.0] * 6
+        self.vy = [0.0] * 6
+        self._ux = [math.cos(i * (2 * math.pi / 6.0)) for i in range(6)]
+        self._uy = [math.sin(i * (2 * math.pi / 6.0)) for i in range(6)]
+
+    def update_vertices(self):
+        # две тригонометрии на шаг вместо двенадцати: поворачиваем готовые направления
+        ca = math.cos(self.angle) * self.radius
+        sa = math.sin(self.angle) * self.radius
+        ux, uy, vx, vy = self._ux, self._uy, self.vx, self.vy
+        i = 0
+        while i < 6:   # while, а не for-range: range и его итератор — тоже аллокации
+            vx[i] = self.cx + ca * ux[i] - sa * uy[i]
+            vy[i] = self.cy + sa * ux[i] + ca * uy[i]
+            i += 1
+
+def step_ball(ball: BallState, hexagon: HexState, dt: float, radius: float, mass: float):
+    # Интеграция (Semi-implicit Euler)
+    ball.vx += GRAVITY.x * dt
+    ball.vy += GRAVITY.y * dt
+    ball.x += ball.vx * dt
+    ball.y += ball.vy * dt
+
+    hexagon.update_vertices()
+    vxs, vys = hexagon.vx, hexagon.vy
+    cx, cy, omega = hexagon.cx, hexagon.cy, hexagon.omega
+
+    # Перебор всех 6 рёбер — модель solve_collisions один в один
+    i = -1
+    while i < 5:
+        i += 1
+        ax = vxs[i]
+        ay = vys[i]
+        abx = vxs[(i + 1) % 6] - ax
+        aby = vys[(i + 1) % 6] - ay
+
+        # Ближайшая точка на ребре к центру мяча
+        ab_len2 = abx * abx + aby * aby
+        t = 0.0
+        if ab_len2 != 0.0:
+            t = clamp(((ball.x - ax) * abx + (ball.y - ay) * aby) / ab_len2, 0.0, 1.0)
+        px = ax + abx * t
+        py = ay + aby * t
+        nx = ball.x - px
+        ny = ball.y - py
+        dist = math.sqrt(nx * nx + ny * ny)
+
+        penetration = radius - dist
+        if penetration <= 0.0:
+            continue
+
+        if dist > 1e-8:
+            nx /= dist
+            ny /= dist
+        else:
+            nx = ball.x - cx
+            ny = ball.y - cy
+            d2 = nx * nx + ny * ny
+            if d2 < 1e-12:
+                nx = 0.0
+                ny = -1.0
+            else:
+                d = math.sqrt(d2)
+                nx /= d
+                ny /= d
+
+        # Коррекция позиции
+        corr = (penetration + SLOP) * POS_CORR_FACTOR
+        ball.x += nx * corr
+        ball.y += ny * corr
+
+        # Относительная скорость относительно точки стенки (v = ω × r)
+        rvx = ball.vx + omega * (py - cy)
+        rvy = ball.vy - omega * (px - cx)
+        vn = rvx * nx + rvy * ny
+
+        if vn < 0.0:
+            jn = -(1.0 + REST_COEFF) * vn * mass
+            ball.vx += jn / mass * nx
+            ball.vy += jn / mass * ny
+            max_jt = FRICTION_COEFF * jn
+        else:
+            max_jt = FRICTION_COEFF * mass * 50.0
+
+        # Трение по касательной, ограниченное конусом Кулона
+        tx = rvx - vn * nx
+        ty = rvy - vn * ny
+        vt = math.sqrt(tx * tx + ty * ty)
+        if vt > 1e-6:
+            jt = min(vt * mass, max_jt)
+            ball.vx -= jt / mass * tx / vt
+            ball.vy -= jt / mass * ty / vt
+
+def _legacy_step(pos: Vector2, vel: Vector2, angle: float, omega: float):
+    # Прежний шаг на Vector2 — только для сравнения в benchmark()
+    vel += GRAVITY * PHYS_DT
+    pos += vel * PHYS_DT
+    verts = regular_hex_vertices(CENTER, HEX_RADIUS, angle)
+    return solve_collisions(pos, vel, BALL_RADIUS, BALL_MASS, CENTER, verts, omega)
+
+def benchmark(steps: int = 50000):
+    # Шагов в секунду и байт временных объектов на шаг (пик tracemalloc за шаг) для обоих путей.
+    # У скалярного ядра остаются лишь десятки байт — это float-объекты самого интерпретатора.
+    def legacy():
+        pos = CENTER + Vector2(0, -HEX_RADIUS * 0.5)
+        vel = Vector2(220.0, 0.0)
+        angle = 0.0
+        def step():
+            nonlocal pos, vel, angle
+            angle += HEX_OMEGA * PHYS_DT
+            pos, vel = _legacy_step(pos, vel, angle, HEX_OMEGA)
+        return step
+
+    def kernel():
+        ball = BallState(CENTER.x, CENTER.y - HEX_RADIUS * 0.5, 220.0, 0.0)
+        hexagon = HexState(CENTER, HEX_RADIUS, 0.0, HEX_OMEGA)
+        def step():
+            hexagon.angle += hexagon.omega * PHYS_DT
+            step_ball(ball, hexagon, PHYS_DT, BALL_RADIUS, BALL_MASS)
+        return step
+
+    results = {}
+    for name, make in (("Vector2", legacy), ("scalar kernel", kernel)):
+        step = make()
+        t0 = time.perf_counter()
+        for _ in range(steps):
+            step()
+        rate = steps / (time.perf_counter() - t0)
+
+        step = make()
+        tracemalloc.start()
+        transient = 0
+        n = min(steps, 5000)
+        for _ in range(n):
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            step()
+            transient += tracemalloc.get_traced_memory()[1] - before
+        tracemalloc.stop()
+        results[name] = (rate, transient / n)
+        print(f"{name:>14}: {rate:10,.0f} steps/s   {transient / n:8.1f} B temporaries/step")
+
+    (r0, b0), (r1, b1) = results["Vector2"], results["scalar kernel"]
+    print(f"{'speedup':>14}: x{r1 / r0:.2f}   temporaries removed: {b0 - b1:.1f} B/step")
+    return results
+
+# -------------- МНОГО МЯЧЕЙ: SPATIAL HASH + УДАРЫ МЯЧ–МЯЧ --------------
+# Состояние — массивы NumPy формы (N, 2); все шаги ниже векторизованы по мячам.
+
+_KEY_SHIFT = 1 << 20           # ключ ячейки = ix * _KEY_SHIFT + iy (со смещением в положительные)
+# своя ячейка + половина соседей: каждая пара ячеек просматривается ровно один раз
+_HALF_NEIGHBOURS = ((1, 0), (-1, 1), (0, 1), (1, 1))
+
+def build_spatial_hash(pos, cell: float):
+    # Равномерная сетка, построенная сортировкой: мячи одной ячейки лежат подряд в order.
+    # При cell >= 2 * радиус пересекаться могут только мячи из соседних ячеек.
+    ij = np.floor(pos / cell).astype(np.int64) + _KEY_SHIFT // 2
+    keys = ij[:, 0] * _KEY_SHIFT + ij[:, 1]
+    order = np.argsort(keys, kind="stable")
+    return keys[order], order
+
+def candidate_pairs(sorted_keys, order):
+    # Пары (i, j) мячей из одной ячейки и из «половины» соседних ячеек.
+    n = sorted_keys.size
+    if n == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    idx = np.arange(n)
+
+    # Непустые ячейки: ключ, начало в order и число мячей; cell — ячейка каждого мяча
+    first = np.flatnonzero(np.diff(sorted_keys, prepend=sorted_keys[0] - 1))
+    cells = sorted_keys[first]
+    count = np.diff(first, append=n)
+    cell = np.repeat(np.arange(first.size), count)
+    firsts, seconds = [], []
+
+    # внутри ячейки: (s, s + k) для всех k, пока s + k в той же ячейке
+    cell_end = (first + count)[cell]
+    for k in range(1, int(count.max())):
+        ok = idx + k < cell_end
+        firsts.append(idx[ok])
+        seconds.append(idx[ok] + k)
+
+    # соседние ячейки ищем бинарным поиском среди непустых ячеек, а не среди всех мячей
+    for dx, dy in _HALF_NEIGHBOURS:
+        target = cells + (dx * _KEY_SHIFT + dy)
+        at = np.minimum(np.searchsorted(cells, target), cells.size - 1)
+        found = cells[at] == target
+        lo = np.where(found, first[at], 0)[cell]
+        hi = lo + np.where(found, count[at], 0)[cell]
+        for k in range(int((hi - lo).max())):
+            ok = lo + k < hi
+            firsts.append(idx[ok])
+            seconds.append(lo[ok] + k)
+
+    if not firsts:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    return order[np.concatenate(firsts)], order[np.concatenate(seconds)]
+
+def solve_ball_collisions(pos, vel, radius: float, mass: float, pi, pj):
+    # Узкая фаза: импульс по линии центров + раздвигание пересекающихся мячей (Якоби по всем парам)
+    d = pos[pj] - pos[pi]
+    d2 = np.einsum("ij,ij->i", d, d)
+    min_dist = 2.0 * radius
+    hit = d2 < min_dist * min_dist
+    if not hit.any():
+        return 0
+    pi, pj, d, d2 = pi[hit], pj[hit], d[hit], d2[hit]
+    dist = np.sqrt(d2)
+    n = np.empty_like(d)
+    far = dist > 1e-6
+    n[far] = d[far] / dist[far, None]
+    n[~far] = (1.0, 0.0)
+
+    # Раздвигаем поровну (массы одинаковые)
+    corr = (0.5 * (min_dist - dist) * POS_CORR_FACTOR)[:, None] * n
+    np.subtract.at(pos, pi, corr)
+    np.add.at(pos, pj, corr)
+
+    # Относительная скорость вдоль нормали; импульс — только при сближении
+    vn = np.einsum("ij,ij->i", vel[pj] - vel[pi], n)
+    jn = np.where(vn < 0.0, -(1.0 + BALL_REST_COEFF) * vn * mass / 2.0, 0.0)
+    dv = (jn / mass)[:, None] * n
+    np.subtract.at(vel, pi, dv)
+    np.add.at(vel, pj, dv)
+    return int(hit.sum())
+
+def solve_wall_collisions(pos, vel, radius: float, mass: float,
+                          hex_center: Vector2, verts, omega: float):
+    # То же, что solve_collisions, но сразу для всех мячей (по рёбрам — последовательно).
+    # Отличие одно: толпа может протолкнуть мяч за стенку целиком, поэтому центр по ту
+    # сторону прямой ребра тоже считается проникновением (с нормалью внутрь).
+    c = np.array((hex_center.x, hex_center.y))
+
+    # Мячи внутри вписанной окружности (минус радиус) стенок не касаются — их не трогаем
+    apothem = HEX_RADIUS * math.cos(math.pi / 6.0)
+    rel = pos - c
+    near = np.nonzero(np.einsum("ij,ij->i", rel, rel) > (apothem - radius) ** 2)[0]
+    if near.size == 0:
+        return
+    bp = pos[near]
+    bv = vel[near]
+
+    for i in range(6):
+        a = np.array((verts[i].x, verts[i].y))
+        ab = np.array((verts[(i + 1) % 6].x, verts[(i + 1) % 6].y)) - a
+        inward = np.array((-ab[1], ab[0])) / math.hypot(ab[0], ab[1])
+        if (c - a).dot(inward) < 0.0:
+            inward = -inward
+
+        t = np.clip((bp - a) @ ab / ab.dot(ab), 0.0, 1.0)
+        p = a + t[:, None] * ab
+        n = bp - p
+        dist = np.hypot(n[:, 0], n[:, 1])
+        outside = (bp - a) @ inward < 0.0
+        hit = outside | (dist < radius)
+        if not hit.any():
+            continue
+        idx = np.nonzero(hit)[0]
+        n, dist, p, outside = n[idx], dist[idx], p[idx], outside[idx]
+
+        # Нормаль от точки касания к центру мяча; снаружи и в вырожденном случае — внутрь
+        n_hat = np.empty_like(n)
+        ok = (dist > 1e-8) & ~outside
+        n_hat[ok] = n[ok] / dist[ok, None]
+        n_hat[~ok] = inward
+        depth = np.where(outside, radius + dist, radius - dist)
+
+        # Коррекция позиции
+        bp[idx] += n_hat * ((depth + SLOP) * POS_CORR_FACTOR)[:, None]
+
+        # Скорость точки стенки и относительная скорость
+        r = p - c
+        v_rel = bv[idx] - omega * np.column_stack((-r[:, 1], r[:, 0]))
+        vn = np.einsum("ij,ij->i", v_rel, n_hat)
+
+        # Упругое отражение — только если движемся "в стенку"
+        jn = np.where(vn < 0.0, -(1.0 + REST_COEFF) * vn * mass, 0.0)
+        dv = (jn / mass)[:, None] * n_hat
+
+        # Трение с тем же ограничением, что в solve_collisions
+        tangent = v_rel - vn[:, None] * n_hat
+        vt = np.hypot(tangent[:, 0], tangent[:, 1])
+        max_jt = np.where(vn < 0.0, FRICTION_COEFF * jn, FRICTION_COEFF * mass * 50.0)
+        jt = np.where(vt > 1e-6, np.minimum(vt * mass, max_jt), 0.0)
+        dv -= (jt / mass / np.maximum(vt, 1e-6))[:, None] * tangent
+        bv[idx] += dv
+
+    pos[near] = bp
+    vel[near] = bv
+
+def spawn_balls(count: int, radius: float, seed: int = 1):
+    # Сетка стартовых точек внутри вписанной окружности, случайные скорости
+    inner = HEX_RADIUS * math.cos(math.pi / 6.0) - 2.0 * radius
+    step = 2.2 * radius
+    k = int(inner // step)
+    g = np.arange(-k, k + 1) * step
+    spots = np.stack(np.meshgrid(g, g), axis=-1).reshape(-1, 2)
+    spots = spots[np.hypot(spots[:, 0], spots[:, 1]) <= inner]
+    if len(spots) < count:
+        raise SystemExit(f"Не помещается {count} мячей радиуса {radius:g} (максимум {len(spots)})")
+    rng = np.random.default_rng(seed)
+    pos = spots[rng.permutation(len(spots))[:count]] + (CENTER.x, CENTER.y)
+    vel = rng.uniform(-200.0, 200.0, size=(count, 2))
+    return pos, vel
+
 # -------------- ВИЗУАЛИЗАЦИЯ И ЦИКЛ --------------
-def main():
+def load_trajectory():
+    # trajectory.py (формат записи траекторий) лежит в корне репозитория
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+    import trajectory
+    return trajectory
+
+def load_video_export():
+    # video_export.py (фоновая запись кадров) лежит рядом со скриптом
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import video_export
+    return video_export
+
+def main(num_balls: int = 1, ball_radius: float = BALL_RADIUS, record=None,
+         export=None, seconds: float = 10.0, fps: int = 60):
+    multi = num_balls > 1
+    if multi and np is None:
+        raise SystemExit("Для режима многих мячей нужен numpy: pip install numpy")
+    if multi and record:
+        raise SystemExit("Запись траектории поддерживается только для одного мяча")
+    writer = None
+    if record:
+        writer = load_trajectory().TrajectoryWriter(
+            record, CENTER.x, CENTER.y, HEX_RADIUS, BALL_RADIUS, 6, PHYS_DT)
+    t_sim = 0.0
+
+    # Экспорт: без окна, кадр фиксированной длины 1/fps, рендер в обычный Surface,
+    # запись на диск — в фоновом потоке (video_export.py)
+    exporter = None
+    if export:
+        video_export = load_video_export()
+        video_export.use_dummy_video()
     pygame.init()
-    screen = pygame.display.set_mode((WIDTH, HEIGHT))
-    pygame.display.set_caption("Мяч в вращающемся шестиугольнике (гравитация + трение)")
+    if export:
+        screen = pygame.Surface((WIDTH, HEIGHT))
+        exporter = video_export.FrameExporter(export, (WIDTH, HEIGHT), fps)
+        frames_left = int(round(seconds * fps))
+    else:
+        screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption("Мяч в вращающемся шестиугольнике (гравитация + трение)")
     clock = pygame.time.Clock()
     font = pygame.font.SysFont("consolas", 16)
 
     # Состояние
-    ball_pos = CENTER + Vector2(0, -HEX_RADIUS * 0.5)
-    ball_vel = Vector2(220.0, 0.0)
-
-    angle = 0.0    # текущий угол шестиугольника
-    omega = HEX_OMEGA
+    ball = BallState(CENTER.x, CENTER.y - HEX_RADIUS * 0.5, 220.0, 0.0)
+    hexagon = HexState(CENTER, HEX_RADIUS, 0.0, HEX_OMEGA)   # угол и скорость вращения
+    if multi:
+        balls_pos, balls_vel = spawn_balls(num_balls, ball_radius)
+        gravity = np.array((GRAVITY.x, GRAVITY.y))
+        cell = 2.0 * ball_radius   # размер ячейки spatial hash
+        num_pairs = 0              # кандидатов в пары на последнем шаге физики
 
     accumulator = 0.0
     running = True
 
     while running:
         # Обработка событий
-        dt_frame = clock.tick(FPS_CAP) / 1000.0
+        dt_frame = 1.0 / fps if exporter else clock.tick(FPS_CAP) / 1000.0
         accumulator += dt_frame
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -147,12 +526,13 @@ def main():
                     running = False
                 # Небольшое управление скоростью вращения
                 elif event.key == pygame.K_LEFT:
-                    omega -= 0.2
+                    hexagon.omega -= 0.2
                 elif event.key == pygame.K_RIGHT:
-                    omega += 0.2
+                    hexagon.omega += 0.2
                 elif event.key == pygame.K_SPACE:
-                    ball_pos = CENTER + Vector2(0, -HEX_RADIUS * 0.5)
-                    ball_vel = Vector2(220.0, 0.0)
+                    ball = BallState(CENTER.x, CENTER.y - HEX_RADIUS * 0.5, 220.0, 0.0)
+                    if multi:
+                        balls_pos, balls_vel = spawn_balls(num_balls, ball_radius)
 
         # Фиксированные шаги физики
         substeps = 0
@@ -161,24 +541,29 @@ def main():
             accumulator -= PHYS_DT
 
             # Обновляем угол
-            angle += omega * PHYS_DT
-
-            # Интеграция (Semi-implicit Euler)
-            ball_vel += GRAVITY * PHYS_DT
-            ball_pos += ball_vel * PHYS_DT
-
-            # Геометрия шестиугольника в текущий момент
-            verts = regular_hex_vertices(CENTER, HEX_RADIUS, angle)
+            hexagon.angle += hexagon.omega * PHYS_DT
+
+            if multi:
+                # Интеграция, удары мяч–мяч (кандидаты из spatial hash, перестраиваемого
+                # каждый шаг), затем стенки
+                balls_vel += gravity * PHYS_DT
+                balls_pos += balls_vel * PHYS_DT
+                pi, pj = candidate_pairs(*build_spatial_hash(balls_pos, cell))
+                num_pairs = pi.size
+                solve_ball_collisions(balls_pos, balls_vel, ball_radius, BALL_MASS, pi, pj)
+                verts = regular_hex_vertices(CENTER, HEX_RADIUS, hexagon.angle)
+                solve_wall_collisions(balls_pos, balls_vel, ball_radius, BALL_MASS, CENTER, verts, hexagon.omega)
+            else:
+                # Интеграция и столкновения с вращающимися стенками — скалярное ядро
+                step_ball(ball, hexagon, PHYS_DT, BALL_RADIUS, BALL_MASS)
 
-            # Столкновения с вращающимися стенками (с учетом их скорости)
-            ball_pos, ball_vel = solve_collisions(
-                ball_pos, ball_vel, BALL_RADIUS, BALL_MASS, CENTER, verts, omega
-            )
+                # На всякий случай мягко удерживаем в окне (если вдруг вылетит численно)
+                if not (-1000 < ball.x < WIDTH + 1000) or not (-1000 < ball.y < HEIGHT + 1000):
+                    ball = BallState(CENTER.x, CENTER.y, 0.0, 0.0)
 
-            # На всякий случай мягко удерживаем в окне (если вдруг вылетит численно)
-            if not (-1000 < ball_pos.x < WIDTH + 1000) or not (-1000 < ball_pos.y < HEIGHT + 1000):
-                ball_pos = CENTER
-                ball_vel = Vector2(0, 0)
+            t_sim += PHYS_DT
+            if writer:
+                writer.append(t_sim, ball.x, ball.y, ball.vx, ball.vy, hexagon.angle)
 
             # Брейк на случай "спайка" времени
             if substeps > 600:
@@ -187,22 +572,106 @@ def main():
 
         # Рендер
         screen.fill((18, 18, 22))
-        verts_draw = regular_hex_vertices(CENTER, HEX_RADIUS, angle)
-        pygame.draw.polygon(screen, (60, 140, 210), [(v.x, v.y) for v in verts_draw], width=4)
+        hexagon.update_vertices()
+        pygame.draw.polygon(screen, (60, 140, 210), list(zip(hexagon.vx, hexagon.vy)), width=4)
 
-        pygame.draw.circle(screen, (240, 95, 80), (ball_pos.x, ball_pos.y), BALL_RADIUS)
+        if multi:
+            for x, y in balls_pos.tolist():
+                pygame.draw.circle(screen, (240, 95, 80), (x, y), ball_radius)
+        else:
+            pygame.draw.circle(screen, (240, 95, 80), (ball.x, ball.y), BALL_RADIUS)
 
         # UI-подсказки
-        info1 = f"omega = {omega:.2f} rad/s   e = {REST_COEFF:.2f}   mu = {FRICTION_COEFF:.2f}"
+        info1 = f"omega = {hexagon.omega:.2f} rad/s   e = {REST_COEFF:.2f}   mu = {FRICTION_COEFF:.2f}"
+        if multi:
+            info1 += f"   balls = {num_balls}   pairs = {num_pairs}   fps = {fps if exporter else clock.get_fps():.0f}"
         info2 = "LEFT/RIGHT — изменить вращение, SPACE — сбросить мяч, ESC — выход"
         text1 = font.render(info1, True, (210, 210, 210))
         text2 = font.render(info2, True, (150, 150, 150))
         screen.blit(text1, (10, 10))
         screen.blit(text2, (10, 32))
 
+        if exporter:
+            exporter.submit(screen)
+            frames_left -= 1
+            running = frames_left > 0
+        else:
+            pygame.display.flip()
+
+    if exporter:
+        exporter.close()
+    if writer:
+        writer.close()
+    pygame.quit()
+
+def replay(path):
+    # Проигрывание записи: только чтение файла (через mmap) и рендер, физика не считается
+    trajectory = load_trajectory()
+    reader = trajectory.TrajectoryReader(path)
+    player = trajectory.ReplayClock(reader)
+
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption(f"Повтор: {path}")
+    clock = pygame.time.Clock()
+    font = pygame.font.SysFont("consolas", 16)
+
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    running = False
+                elif event.key == pygame.K_SPACE:
+                    player.paused = not player.paused
+                elif event.key == pygame.K_LEFT:
+                    player.seek(player.t - 2.0)
+                elif event.key == pygame.K_RIGHT:
+                    player.seek(player.t + 2.0)
+                elif event.key == pygame.K_UP:
+                    player.faster()
+                elif event.key == pygame.K_DOWN:
+                    player.slower()
+                elif event.key == pygame.K_HOME:
+                    player.seek(0.0)
+
+        _, x, y, vx, vy, angle = player.advance(clock.tick(FPS_CAP) / 1000.0)
+
+        screen.fill((18, 18, 22))
+        verts = [(reader.cx + reader.poly_radius * math.cos(angle + i * 2 * math.pi / reader.sides),
+                  reader.cy + reader.poly_radius * math.sin(angle + i * 2 * math.pi / reader.sides))
+                 for i in range(reader.sides)]
+        pygame.draw.polygon(screen, (60, 140, 210), verts, width=4)
+        pygame.draw.circle(screen, (240, 95, 80), (x, y), reader.ball_radius)
+
+        info1 = f"{player.status()}   |v| = {math.hypot(vx, vy):.1f}"
+        info2 = "SPACE — пауза, LEFT/RIGHT — перемотка 2 с, UP/DOWN — скорость, HOME — в начало, ESC — выход"
+        screen.blit(font.render(info1, True, (210, 210, 210)), (10, 10))
+        screen.blit(font.render(info2, True, (150, 150, 150)), (10, 32))
+
         pygame.display.flip()
 
+    reader.close()
     pygame.quit()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Мяч(и) во вращающемся шестиугольнике")
+    parser.add_argument("--balls", type=int, default=1, help="число мячей (>1 — режим многих мячей, нужен numpy)")
+    parser.add_argument("--radius", type=float, default=BALL_RADIUS, help="радиус мяча (px)")
+    parser.add_argument("--bench", action="store_true", help="без окна: сравнить скалярное ядро с Vector2-версией")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--record", metavar="FILE", help="записать траекторию (каждый шаг физики) в файл")
+    group.add_argument("--replay", metavar="FILE", help="проиграть записанную траекторию без физики")
+    parser.add_argument("--export", metavar="OUT",
+                        help="без окна записать видео: OUT.mp4 (ffmpeg), OUT.raw (RGB24) или каталог PNG")
+    parser.add_argument("--seconds", type=float, default=10.0, help="длительность экспорта (с)")
+    parser.add_argument("--fps", type=int, default=60, help="кадров в секунду при экспорте")
+    args = parser.parse_args()
+    if args.bench:
+        benchmark()
+    elif args.replay:
+        replay(args.replay)
+    else:
+        main(args.balls, args.radius, args.record, args.export, args.seconds, args.fps)
\ No newline at end of file
@@ -0,0 +1,247 @@
+# Безоконный пакетный движок для сцены из 2.py: тысячи независимых мячей во вращающемся шестиугольнике.
+# Модель столкновений та же (resolve_circle_vs_segment), но состояние хранится как структура массивов NumPy,
+# и один шаг обсчитывает сразу все мячи. Каждый мяч — своя конфигурация (omega, restitution, friction_mu, старт).
+
+import argparse
+import csv
+import math
+import sys
+import time
+
+import numpy as np
+
+# ----------------- Параметры сцены (как в 2.py) -----------------
+W, H = 900, 900
+CX, CY = W / 2, H / 2
+R_POLY = 320
+SIDES = 6
+
+# ----------------- Параметры физики (как в 2.py) ----------------
+g = 1400.0
+air_drag = 0.35
+ball_r = 16.0
+
+
+class HexBatch:
+    """
+    Пакет из N независимых мячей, у каждого свой шестиугольник.
+    Все поля — массивы формы (N,); скаляры в конструкторе растягиваются на весь пакет.
+    """
+
+    def __init__(self, n, omega=0.85, restitution=0.86, friction_mu=0.28,
+                 x0=CX, y0=CY - R_POLY * 0.55, vx0=240.0, vy0=0.0, theta0=0.0):
+        def col(v):
+            return np.broadcast_to(np.asarray(v, dtype=np.float64), (n,)).copy()
+
+        self.n = n
+        self.omega = col(omega)
+        self.restitution = col(restitution)
+        self.mu = col(friction_mu)
+        self.x = col(x0)
+        self.y = col(y0)
+        self.vx = col(vx0)
+        self.vy = col(vy0)
+        self.theta = col(theta0)
+        self.t = 0.0
+
+        # Статистика для свипов
+        self.hits = np.zeros(n, dtype=np.int64)       # число ударов о стенки
+        self.rescues = np.zeros(n, dtype=np.int64)    # срабатывания «подстраховки»
+        self.escaped = np.zeros(n, dtype=bool)        # центр мяча хоть раз оказался вне полигона (outside)
+        self.max_speed = np.hypot(self.vx, self.vy)
+
+        # Фазы вершин правильного многоугольника
+        self._phase = 2.0 * math.pi * np.arange(SIDES) / SIDES
+
+    def vertices(self):
+        # (N, SIDES) координаты вершин для текущих углов
+        a = self.theta[:, None] + self._phase[None, :]
+        return CX + np.cos(a) * R_POLY, CY + np.sin(a) * R_POLY
+
+    def _resolve_edge(self, ax, ay, bx, by):
+        """Векторный аналог resolve_circle_vs_segment для одной грани всех мячей сразу."""
+        ex = bx - ax
+        ey = by - ay
+        len2 = ex * ex + ey * ey
+        safe = len2 > 0.0
+        len2 = np.where(safe, len2, 1.0)
+
+        # Ближайшая точка q на отрезке к центру шара
+        t = np.clip(((self.x - ax) * ex + (self.y - ay) * ey) / len2, 0.0, 1.0)
+        qx = ax + ex * t
+        qy = ay + ey * t
+
+        dx = self.x - qx
+        dy = self.y - qy
+        dist = np.hypot(dx, dy)
+        hit = safe & (dist < ball_r)
+        if not hit.any():
+            return hit
+
+        # Нормаль от стены к шару; в вырожденном случае — от центра полигона
+        degenerate = dist <= 1e-8
+        cx = self.x - CX
+        cy = self.y - CY
+        clen = np.hypot(cx, cy)
+        centered = clen == 0.0
+        clen = np.where(centered, 1.0, clen)
+        inv = 1.0 / np.where(degenerate, 1.0, dist)
+        nx = np.where(degenerate, np.where(centered, 0.0, cx / clen), dx * inv)
+        ny = np.where(degenerate, np.where(centered, -1.0, cy / clen), dy * inv)
+
+        # Скорость точки стены и относительная скорость
+        wvx = -(qy - CY) * self.omega
+        wvy = (qx - CX) * self.omega
+        rvx = self.vx - wvx
+        rvy = self.vy - wvy
+        vn = rvx * nx + rvy * ny
+
+        imp = hit & (vn < 0.0)
+        jn = np.where(imp, -(1.0 + self.restitution) * vn, 0.0)
+
+        # Трение (Кулона) по касательной
+        tx = rvx - vn * nx
+        ty = rvy - vn * ny
+        vt = np.hypot(tx, ty)
+        slide = imp & (vt > 1e-6)
+        vt_safe = np.where(slide, vt, 1.0)
+        jt = np.where(slide, np.minimum(self.mu * jn, vt), 0.0)
+
+        self.vx += jn * nx - jt * tx / vt_safe
+        self.vy += jn * ny - jt * ty / vt_safe
+
+        # Исправление проникновения
+        push = np.where(hit, ball_r - dist + 0.001, 0.0)
+        self.x += nx * push
+        self.y += ny * push
+        return hit
+
+    def _rescue(self, vx_, vy_, mask):
+        """Подстраховка из 2.py: мячи без контакта, но глубоко в стене, выталкиваем внутрь."""
+        min_dist = np.full(self.n, np.inf)
+        qx_best = np.zeros(self.n)
+        qy_best = np.zeros(self.n)
+        for i in range(SIDES):
+            ax, ay = vx_[:, i], vy_[:, i]
+            bx, by = vx_[:, (i + 1) % SIDES], vy_[:, (i + 1) % SIDES]
+            ex = bx - ax
+            ey = by - ay
+            len2 = ex * ex + ey * ey
+            ok = len2 > 0.0
+            len2 = np.where(ok, len2, 1.0)
+            t = np.clip(((self.x - ax) * ex + (self.y - ay) * ey) / len2, 0.0, 1.0)
+            qx = ax + ex * t
+            qy = ay + ey * t
+            d = np.hypot(self.x - qx, self.y - qy)
+            better = ok & (d < min_dist)
+            min_dist = np.where(better, d, min_dist)
+            qx_best = np.where(better, qx, qx_best)
+            qy_best = np.where(better, qy, qy_best)
+
+        dx = self.x - qx_best
+        dy = self.y - qy_best
+        d2 = dx * dx + dy * dy
+        fix = mask & (min_dist < ball_r * 0.7) & (d2 > 1e-8)
+        if fix.any():
+            d = np.sqrt(np.where(fix, d2, 1.0))
+            push = np.where(fix, (ball_r - min_dist + 0.001) / d, 0.0)
+            self.x += dx * push
+            self.y += dy * push
+            self.rescues += fix
+
+    def step(self, dt, substeps=2):
+        """Один кадр: те же substeps и semi-implicit Euler, что и в main() из 2.py."""
+        sdt = dt / substeps
+        damp = math.exp(-air_drag * sdt) if air_drag > 0.0 else 1.0
+        for _ in range(substeps):
+            self.theta += self.omega * sdt
+            self.vy += g * sdt
+            self.vx *= damp
+            self.vy *= damp
+            self.x += self.vx * sdt
+            self.y += self.vy * sdt
+
+            vx_, vy_ = self.vertices()
+            collided_any = np.zeros(self.n, dtype=bool)
+            for i in range(SIDES):
+                j = (i + 1) % SIDES
+                hit = self._resolve_edge(vx_[:, i], vy_[:, i], vx_[:, j], vy_[:, j])
+                self.hits += hit
+                collided_any |= hit
+
+            if not collided_any.all():
+                self._rescue(vx_, vy_, ~collided_any)
+
+        self.t += dt
+        self.escaped |= self.outside()
+        np.maximum(self.max_speed, np.hypot(self.vx, self.vy), out=self.max_speed)
+
+    def outside(self):
+        """
+        True для мячей, центр которых вне своего (повёрнутого) шестиугольника: проекция
+        (p - c) на внешнюю нормаль n_k(theta) хотя бы одной грани k больше апофемы.
+        """
+        apothem = R_POLY * math.cos(math.pi / SIDES)
+        # нормаль грани k (между вершинами k и k+1) смотрит в середину грани
+        a = self.theta[:, None] + (self._phase + math.pi / SIDES)[None, :]
+        proj = (self.x - CX)[:, None] * np.cos(a) + (self.y - CY)[:, None] * np.sin(a)
+        return (proj > apothem).any(axis=1)
+
+    def run(self, steps, dt=1 / 120, substeps=2):
+        for _ in range(steps):
+            self.step(dt, substeps)
+        return self
+
+
+def parse_range(s):
+    """'a' -> [a];  'a:b:n' -> linspace(a, b, n)."""
+    parts = [float(p) for p in s.split(":")]
+    if len(parts) == 1:
+        return np.array(parts)
+    if len(parts) != 3:
+        raise argparse.ArgumentTypeError(f"ожидалось 'a' или 'a:b:n', получено {s!r}")
+    return np.linspace(parts[0], parts[1], int(parts[2]))
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Headless batch sweep of the rotating-hexagon ball (2.py physics)")
+    p.add_argument("--omega", type=parse_range, default=parse_range("0.85"), help="rad/s, 'a' or 'a:b:n'")
+    p.add_argument("--restitution", type=parse_range, default=parse_range("0.86"))
+    p.add_argument("--friction-mu", type=parse_range, default=parse_range("0.28"))
+    p.add_argument("--vx0", type=parse_range, default=parse_range("240"))
+    p.add_argument("--vy0", type=parse_range, default=parse_range("0"))
+    p.add_argument("--seconds", type=float, default=10.0, help="simulated time per configuration")
+    p.add_argument("--dt", type=float, default=1 / 120)
+    p.add_argument("--substeps", type=int, default=2)
+    p.add_argument("--out", default="-", help="CSV file for per-ball results ('-' = stdout)")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    grid = np.meshgrid(args.omega, args.restitution, args.friction_mu, args.vx0, args.vy0, indexing="ij")
+    omega, rest, mu, vx0, vy0 = (a.ravel() for a in grid)
+
+    sim = HexBatch(omega.size, omega=omega, restitution=rest, friction_mu=mu, vx0=vx0, vy0=vy0)
+    steps = int(round(args.seconds / args.dt))
+    t0 = time.perf_counter()
+    sim.run(steps, args.dt, args.substeps)
+    elapsed = time.perf_counter() - t0
+    print(f"{sim.n} balls x {steps} steps in {elapsed:.2f} s "
+          f"({sim.n * steps / max(elapsed, 1e-9):,.0f} ball-steps/s)", file=sys.stderr)
+
+    out = sys.stdout if args.out == "-" else open(args.out, "w", newline="")
+    try:
+        w = csv.writer(out)
+        w.writerow(["omega", "restitution", "friction_mu", "vx0", "vy0",
+                    "x", "y", "vx", "vy", "hits", "rescues", "escaped", "max_speed"])
+        for row in zip(omega, rest, mu, vx0, vy0, sim.x, sim.y, sim.vx, sim.vy,
+                       sim.hits, sim.rescues, sim.escaped, sim.max_speed):
+            w.writerow([f"{v:.6g}" if isinstance(v, float) else int(v) for v in row])
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# Экспорт кадров pygame-симуляций (2.py, 4.py) в видео без окна.
+# Рендер идёт в обычный pygame.Surface (драйвер SDL dummy), пиксели копируются в заранее
+# выделенные буферы NumPy, а на диск их пишет фоновый поток через ограниченную очередь —
+# физика и рендер не ждут диска, пока у писателя есть свободные буферы.
+#
+# Форматы по имени выхода:  *.mp4 — через ffmpeg (stdin, rawvideo rgb24),
+#                           *.raw / *.rgb — сырые кадры RGB24 подряд в одном файле,
+#                           иначе — каталог с PNG-последовательностью frame_000000.png.
+
+import os
+import queue
+import shutil
+import subprocess
+import threading
+
+import numpy as np
+
+
+def use_dummy_video():
+    # Вызывать до pygame.init(): окно не нужно, работает и на сервере без X
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+
+class FrameExporter:
+    def __init__(self, out: str, size, fps: int = 60, queue_size: int = 8):
+        import pygame
+        self.pg = pygame
+        self.out = out
+        self.w, self.h = size
+        self.fps = fps
+        self.count = 0
+        self.error = None
+
+        # Пул буферов: свободные ждут в free, заполненные — в todo (оба ограничены пулом)
+        self.free = queue.Queue()
+        for _ in range(queue_size):
+            self.free.put(np.empty((self.h, self.w, 3), dtype=np.uint8))
+        self.todo = queue.Queue(maxsize=queue_size)
+
+        ext = os.path.splitext(out)[1].lower()
+        self.proc = None
+        self.file = None
+        if ext == ".mp4":
+            ffmpeg = shutil.which("ffmpeg")
+            if ffmpeg is None:
+                raise SystemExit("Для .mp4 нужен ffmpeg в PATH (или пишите PNG/.raw)")
+            self.mode = "mp4"
+            self.proc = subprocess.Popen(
+                [ffmpeg, "-loglevel", "error", "-y", "-f", "rawvideo", "-pix_fmt", "rgb24",
+                 "-s", f"{self.w}x{self.h}", "-r", str(fps), "-i", "-",
+                 "-c:v", "libx264", "-pix_fmt", "yuv420p", out],
+                stdin=subprocess.PIPE)
+        elif ext in (".raw", ".rgb"):
+            self.mode = "raw"
+            self.file = open(out, "wb")
+        else:
+            self.mode = "png"
+            os.makedirs(out, exist_ok=True)
+
+        self.thread = threading.Thread(target=self._writer, name="frame-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, surface):
+        """Копирует кадр в свободный буфер и отдаёт его писателю. Блокирует, только если все буферы заняты."""
+        if self.error:
+            raise RuntimeError("frame writer failed") from self.error
+        buf = self.free.get()
+        view = self.pg.surfarray.pixels3d(surface)    # (w, h, 3) без копирования
+        np.copyto(buf, view.transpose(1, 0, 2))
+        del view                                      # снимаем блокировку поверхности
+        self.todo.put((self.count, buf))
+        self.count += 1
+
+    def _writer(self):
+        try:
+            while True:
+                item = self.todo.get()
+                if item is None:
+                    break
+                index, buf = item
+                if self.mode == "mp4":
+                    self.proc.stdin.write(memoryview(buf).cast("B"))
+                elif self.mode == "raw":
+                    self.file.write(memoryview(buf).cast("B"))
+                else:
+                    img = self.pg.image.frombuffer(buf, (self.w, self.h), "RGB")
+                    self.pg.image.save(img, os.path.join(self.out, f"frame_{index:06d}.png"))
+                self.free.put(buf)
+        except Exception as e:   # отдаём ошибку в основной поток при следующем submit/close
+            self.error = e
+            while True:          # не даём рендеру зависнуть на занятых буферах
+                if self.todo.get() is None:
+                    break
+                self.free.put(np.empty((self.h, self.w, 3), dtype=np.uint8))
+
+    def close(self):
+        self.todo.put(None)
+        self.thread.join()
+        status = 0
+        if self.proc:
+            try:
+                self.proc.stdin.close()
+            except BrokenPipeError:
+                pass                 # ffmpeg уже завершился — причину покажет код возврата
+            status = self.proc.wait()
+        if self.file:
+            self.file.close()
+        if status != 0:
+            # неверный кодек, нет места на диске и т.п.: видео не записано или записано не целиком
+            raise RuntimeError(f"ffmpeg exited with status {status}, {self.out} is incomplete") from self.error
+        if self.error:
+            raise RuntimeError("frame writer failed") from self.error
+        if self.mode == "raw":
+            print(f"{self.count} frames {self.w}x{self.h} rgb24 -> {self.out} "
+                  f"(ffmpeg -f rawvideo -pix_fmt rgb24 -s {self.w}x{self.h} -r {self.fps} -i {self.out} out.mp4)")
+        else:
+            print(f"{self.count} frames -> {self.out}")
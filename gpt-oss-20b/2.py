@@ -1,26 +1,47 @@
 # Напиши  симуляцию: жёлтый шар движется внутри вращающейся фигуры. Учитывай физику движения (гравитация, трение, упругие/неупругие столкновения), предотвратить выход шара за пределы. Ввод — параметры: форма (кол‑во сторон, радиус), скорость вращения, начальная позиция и скорость шара. Вывод — анимация. Код — в одном файле, минимум зависимостей. Упор на точность физики и устойчивость 
 
+import os
 import sys
+import csv
+import json
 import math
 import argparse
+import itertools
 import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 try:
     import tkinter as tk
 except ImportError:
-    print("tkinter is required. On Linux: sudo apt-get install python3-tk")
-    sys.exit(1)
+    tk = None  # only the animation needs it; headless sweeps run without
 
 def parse_args():
     p = argparse.ArgumentParser(description='Simulate a ball in a rotating polygon container')
     p.add_argument('--sides', type=int, default=6, help='Number of sides of the polygon')
     p.add_argument('--radius', type=float, default=200, help='Radius of the circumscribed circle')
+    p.add_argument('--shape', metavar='FILE', help="Container outline from a vertex file, one 'x y' per line "
+                                                   "(convex, concave or star; overrides --sides/--radius)")
     p.add_argument('--omega', type=float, default=0.5, help='Angular speed (rad/s)')
     p.add_argument('--x0', type=float, default=0, help='Initial x position relative to center')
     p.add_argument('--y0', type=float, default=-100, help='Initial y position relative to center')
     p.add_argument('--vx0', type=float, default=100, help='Initial x velocity')
     p.add_argument('--vy0', type=float, default=0, help='Initial y velocity')
+    p.add_argument('--record', metavar='FILE', help='Record the trajectory (every physics step) to FILE')
+    p.add_argument('--replay', metavar='FILE', help='Play back a recorded trajectory without running physics')
+    p.add_argument('--timing-csv', metavar='FILE', help='Write per-frame timing (physics/draw/canvas ms, drops) to FILE')
     return p.parse_args()
 
+def load_trajectory():
+    # trajectory.py (the shared recording format) lives in the repository root
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+    import trajectory
+    return trajectory
+
+def load_container(path, omega, cx, cy):
+    # polygon_container.py (arbitrary outlines, edge AABB tree) lives in the repository root
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+    import polygon_container
+    return polygon_container.PolygonContainer(polygon_container.load_vertices(path), omega, cx, cy)
+
 class Ball:
     def __init__(self, x, y, vx, vy, r=10, mass=1.0):
         self.x = x
@@ -48,11 +69,19 @@ class RotatingPolygon:
         self.cx = cx
         self.cy = cy
         self.angle = 0.0
+        # Local-frame edge data, computed once: edge i joins vertices i and i+1 and its
+        # outward unit normal points at angle (i + 0.5) * sector from the center.
+        self.sector = 2 * math.pi / sides
+        self.apothem = radius * math.cos(math.pi / sides)
+        self.normals = [(math.cos((i + 0.5) * self.sector), math.sin((i + 0.5) * self.sector))
+                        for i in range(sides)]
 
-    def vertices(self):
+    def vertices(self, angle=None):
+        if angle is None:
+            angle = self.angle
         verts = []
         for i in range(self.sides):
-            theta = self.angle + 2 * math.pi * i / self.sides
+            theta = angle + 2 * math.pi * i / self.sides
             x = self.cx + self.radius * math.cos(theta)
             y = self.cy + self.radius * math.sin(theta)
             verts.append((x, y))
@@ -62,40 +91,121 @@ class RotatingPolygon:
         self.angle += self.omega * dt
 
     def collide_ball(self, ball):
-        verts = self.vertices()
-        n = len(verts)
-        for i in range(n):
-            x1, y1 = verts[i]
-            x2, y2 = verts[(i + 1) % n]
-            # edge vector
-            ex, ey = x2 - x1, y2 - y1
-            # normal (outward) = rotate edge by 90deg
-            nx, ny = ey, -ex
-            # normalize
-            dist = math.hypot(nx, ny)
-            if dist == 0: continue
-            nx /= dist; ny /= dist
-            # point to ball
-            dx, dy = ball.x - x1, ball.y - y1
-            # signed distance
-            d = dx * nx + dy * ny
-            if d < ball.r:
-                # projection onto edge
-                proj = dx * ex + dy * ey
-                if 0 <= proj <= ex * ex + ey * ey:
-                    # collision
-                    # move out
-                    overlap = ball.r - d
-                    ball.x += nx * overlap
-                    ball.y += ny * overlap
-                    # reflect velocity
-                    vdotn = ball.vx * nx + ball.vy * ny
+        # Regular convex container: for a ball at polar angle a in the polygon's frame the
+        # deepest edge is the one whose sector contains a, and in a corner the only other
+        # edge that can be touched is the neighbour on a's side. So at most two edges are
+        # checked, whatever the number of sides (a few passes, because in a sharp corner
+        # pushing out of one edge can push the ball back into the other).
+        # Returns the number of impacts (wall hits that reflected the velocity).
+        dx, dy = ball.x - self.cx, ball.y - self.cy
+        if math.hypot(dx, dy) + ball.r <= self.apothem:
+            return 0  # clear of every wall
+        ca, sa = math.cos(self.angle), math.sin(self.angle)
+        # ball position in the local (non-rotating) frame
+        lx = ca * dx + sa * dy
+        ly = -sa * dx + ca * dy
+        at = (math.atan2(ly, lx) / self.sector) % self.sides
+        i = int(at) % self.sides
+        j = (i + 1) % self.sides if at - i >= 0.5 else (i - 1) % self.sides
+        impacts = 0
+        for _ in range(4):
+            moved = False
+            for k in (i, j):
+                lnx, lny = self.normals[k]
+                # outward normal in the world frame
+                nx = ca * lnx - sa * lny
+                ny = sa * lnx + ca * lny
+                overlap = dx * nx + dy * ny + ball.r - self.apothem
+                if overlap <= 0:
+                    continue
+                moved = True
+                # move back inside
+                ball.x -= nx * overlap
+                ball.y -= ny * overlap
+                dx -= nx * overlap
+                dy -= ny * overlap
+                # wall velocity at the contact point (omega x r), then reflect the relative
+                # velocity if the ball is moving into the wall
+                qx, qy = dx + nx * ball.r, dy + ny * ball.r
+                rvx = ball.vx + self.omega * qy
+                rvy = ball.vy - self.omega * qx
+                vdotn = rvx * nx + rvy * ny
+                if vdotn > 0:
                     ball.vx -= (1 + ball.restitution) * vdotn * nx
                     ball.vy -= (1 + ball.restitution) * vdotn * ny
+                    impacts += 1
+            if not moved:
+                break
+        return impacts
+
+    def outside(self, ball):
+        # True once the ball's center has left the polygon (same sector lookup as collide_ball)
+        dx, dy = ball.x - self.cx, ball.y - self.cy
+        if math.hypot(dx, dy) <= self.apothem:
+            return False
+        a = (math.atan2(dy, dx) - self.angle) / self.sector
+        lnx, lny = self.normals[int(a % self.sides) % self.sides]
+        ca, sa = math.cos(self.angle), math.sin(self.angle)
+        return dx * (ca * lnx - sa * lny) + dy * (sa * lnx + ca * lny) > self.apothem
+
+class FrameStats:
+    """
+    Per-frame timing: physics, draw() and canvas update in ms, dropped frames and the
+    ratio of simulated to real time. Smoothed values feed the overlay; raw rows go to CSV.
+    """
+    FIELDS = ['frame', 'wall_s', 'sim_s', 'frame_ms', 'steps', 'physics_ms', 'draw_ms', 'canvas_ms', 'dropped']
+
+    def __init__(self, target_dt, csv_path=None, smoothing=0.1):
+        self.target_dt = target_dt
+        self.smoothing = smoothing
+        self.frames = 0
+        self.dropped = 0
+        self.start = time.perf_counter()
+        self.avg = {'frame_ms': 0.0, 'physics_ms': 0.0, 'draw_ms': 0.0, 'canvas_ms': 0.0}
+        self.ratio = 1.0
+        self.file = None
+        if csv_path:
+            self.file = open(csv_path, 'w', newline='')
+            self.csv = csv.writer(self.file)
+            self.csv.writerow(self.FIELDS)
+
+    def add(self, sim_time, frame_s, steps, physics_s, draw_s, canvas_s):
+        self.frames += 1
+        # a frame counts as dropped when it arrives more than half a period late
+        dropped = frame_s > 1.5 * self.target_dt
+        self.dropped += dropped
+        wall = time.perf_counter() - self.start
+        self.ratio = sim_time / wall if wall > 0 else 1.0
+        sample = {'frame_ms': frame_s * 1000, 'physics_ms': physics_s * 1000,
+                  'draw_ms': draw_s * 1000, 'canvas_ms': canvas_s * 1000}
+        for k, v in sample.items():
+            self.avg[k] += (v - self.avg[k]) * self.smoothing
+        if self.file:
+            self.csv.writerow([self.frames, f'{wall:.6f}', f'{sim_time:.6f}', f"{sample['frame_ms']:.3f}", steps,
+                               f"{sample['physics_ms']:.3f}", f"{sample['draw_ms']:.3f}",
+                               f"{sample['canvas_ms']:.3f}", int(dropped)])
+
+    def overlay(self):
+        a = self.avg
+        return (f"frame {a['frame_ms']:5.1f} ms  physics {a['physics_ms']:5.2f} ms\n"
+                f"draw {a['draw_ms']:5.2f} ms  canvas {a['canvas_ms']:5.2f} ms\n"
+                f"dropped {self.dropped}/{self.frames}  sim/real {self.ratio:4.2f}")
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
 
 class Simulation:
     def __init__(self, args):
+        if tk is None:
+            print("tkinter is required. On Linux: sudo apt-get install python3-tk")
+            sys.exit(1)
         self.args = args
+        if getattr(args, 'shape', None):
+            # the window is sized from the outline's bounding circle
+            self.poly = load_container(args.shape, args.omega, 0.0, 0.0)
+            args.radius, args.sides = self.poly.radius, self.poly.sides
         self.width = int(2 * (args.radius + 50))
         self.height = int(2 * (args.radius + 50))
         self.root = tk.Tk()
@@ -103,15 +213,33 @@ class Simulation:
         self.canvas = tk.Canvas(self.root, width=self.width, height=self.height, bg='white')
         self.canvas.pack()
         cx, cy = self.width / 2, self.height / 2
-        self.poly = RotatingPolygon(args.sides, args.radius, args.omega, cx, cy)
+        if getattr(args, 'shape', None):
+            self.poly.cx, self.poly.cy = cx, cy
+        else:
+            self.poly = RotatingPolygon(args.sides, args.radius, args.omega, cx, cy)
         self.ball = Ball(cx + args.x0, cy + args.y0, args.vx0, args.vy0)
         self.poly_id = None
         self.ball_id = None
-        self.last_time = time.time()
+        self.last_time = time.perf_counter()
         self.dt = 1/60
+        self.t = 0.0
+        # fixed-timestep accumulator; previous state is kept for render interpolation
+        self.accumulator = 0.0
+        self.max_steps = 10
+        self.prev = (self.ball.x, self.ball.y, self.poly.angle)
+        self.writer = None
+        if getattr(args, 'record', None):
+            self.writer = load_trajectory().TrajectoryWriter(
+                args.record, cx, cy, args.radius, self.ball.r, args.sides, self.dt)
+        self.stats = FrameStats(self.dt, getattr(args, 'timing_csv', None))
+        self.stats_id = self.canvas.create_text(self.width - 8, 8, anchor='ne', justify='right',
+                                                font=('Courier', 9), text='')
 
-    def draw(self):
-        verts = self.poly.vertices()
+    def draw(self, alpha=1.0):
+        # alpha in [0, 1]: how far the frame is between the previous and the current physics step
+        px, py, pa = self.prev
+        angle = pa + (self.poly.angle - pa) * alpha
+        verts = self.poly.vertices(angle)
         coords = []
         for x, y in verts:
             coords.extend([x, y])
@@ -119,26 +247,213 @@ class Simulation:
             self.canvas.coords(self.poly_id, *coords)
         else:
             self.poly_id = self.canvas.create_polygon(*coords, outline='black', fill='', width=2)
-        x, y, r = self.ball.x, self.ball.y, self.ball.r
+        x = px + (self.ball.x - px) * alpha
+        y = py + (self.ball.y - py) * alpha
+        r = self.ball.r
         if self.ball_id:
             self.canvas.coords(self.ball_id, x-r, y-r, x+r, y+r)
         else:
             self.ball_id = self.canvas.create_oval(x-r, y-r, x+r, y+r, fill='yellow', outline='')
 
-    def step(self):
-        now = time.time()
+    def physics_step(self):
         dt = self.dt
+        self.prev = (self.ball.x, self.ball.y, self.poly.angle)
         self.poly.update(dt)
         self.ball.update(dt)
         self.poly.collide_ball(self.ball)
-        self.draw()
-        self.root.after(int(dt*1000), self.step)
+        self.t += dt
+        if self.writer:
+            b = self.ball
+            self.writer.append(self.t, b.x, b.y, b.vx, b.vy, self.poly.angle)
+
+    def step(self):
+        now = time.perf_counter()
+        frame = now - self.last_time
+        self.last_time = now
+
+        # advance physics in fixed dt steps by the real time that has passed; past
+        # max_steps the sim slows down instead of spiralling into ever longer frames
+        self.accumulator += frame
+        steps = 0
+        while self.accumulator >= self.dt and steps < self.max_steps:
+            self.physics_step()
+            self.accumulator -= self.dt
+            steps += 1
+        if self.accumulator >= self.dt:
+            self.accumulator = 0.0   # more than max_steps were owed: drop the backlog
+        t_physics = time.perf_counter()
+
+        self.draw(self.accumulator / self.dt)
+        t_draw = time.perf_counter()
+        self.root.update_idletasks()   # flush the canvas so its cost is measured here
+        t_canvas = time.perf_counter()
+
+        self.stats.add(self.t, frame, steps, t_physics - now, t_draw - t_physics, t_canvas - t_draw)
+        self.canvas.itemconfigure(self.stats_id, text=self.stats.overlay())
+
+        # schedule the next frame one period after this one started, minus the work done
+        delay = self.dt - (time.perf_counter() - now)
+        self.root.after(max(1, int(delay * 1000)), self.step)
 
     def run(self):
         self.step()
         self.root.mainloop()
+        if self.writer:
+            self.writer.close()
+        self.stats.close()
+
+class Replay(Simulation):
+    """Plays a recorded trajectory: reads it through mmap and only draws, no physics."""
+
+    def __init__(self, args):
+        trajectory = load_trajectory()
+        self.reader = trajectory.TrajectoryReader(args.replay)
+        self.player = trajectory.ReplayClock(self.reader)
+        # the window and polygon are rebuilt from the recording, not from the CLI
+        # (a recording made with --shape needs the same --shape to be drawn right)
+        args.sides = self.reader.sides
+        args.radius = self.reader.poly_radius
+        args.record = None
+        super().__init__(args)
+        self.root.title("Replay: " + args.replay)
+        self.ball.r = self.reader.ball_radius
+        self.text_id = self.canvas.create_text(8, 8, anchor='nw', text='')
+        self.canvas.create_text(8, self.height - 8, anchor='sw',
+                                text='space: pause  left/right: seek 2 s  up/down: speed  home: start')
+        self.root.bind('<space>', lambda e: setattr(self.player, 'paused', not self.player.paused))
+        self.root.bind('<Left>', lambda e: self.player.seek(self.player.t - 2.0))
+        self.root.bind('<Right>', lambda e: self.player.seek(self.player.t + 2.0))
+        self.root.bind('<Up>', lambda e: self.player.faster())
+        self.root.bind('<Down>', lambda e: self.player.slower())
+        self.root.bind('<Home>', lambda e: self.player.seek(0.0))
+
+    def step(self):
+        now = time.perf_counter()
+        frame = now - self.last_time
+        self.last_time = now
+        _, x, y, vx, vy, angle = self.player.advance(frame)
+        self.ball.x, self.ball.y = x, y
+        self.poly.angle = angle
+        self.prev = (x, y, angle)
+        t_physics = time.perf_counter()   # no physics here: the record lookup takes its place
+
+        self.draw()
+        t_draw = time.perf_counter()
+        self.root.update_idletasks()
+        t_canvas = time.perf_counter()
+
+        self.stats.add(self.player.t, frame, 0, t_physics - now, t_draw - t_physics, t_canvas - t_draw)
+        self.canvas.itemconfigure(self.stats_id, text=self.stats.overlay())
+        self.canvas.itemconfigure(self.text_id, text=self.player.status())
+        delay = self.dt - (time.perf_counter() - now)
+        self.root.after(max(1, int(delay * 1000)), self.step)
+
+    def run(self):
+        super().run()
+        self.reader.close()
+
+# ---------------------------------------------------------------- headless sweeps
+SWEEP_PARAMS = [('sides', int, '6'), ('radius', float, '200'), ('omega', float, '0.5'),
+                ('x0', float, '0'), ('y0', float, '-100'), ('vx0', float, '100'), ('vy0', float, '0')]
+
+def run_headless(params, seconds=30.0, dt=1/60):
+    """
+    One run without a window, stepping exactly like Simulation.physics_step.
+    Bounce height is how far the ball rises (screen up) between two consecutive impacts.
+    """
+    poly = RotatingPolygon(params['sides'], params['radius'], params['omega'], 0.0, 0.0)
+    ball = Ball(params['x0'], params['y0'], params['vx0'], params['vy0'])
+    steps = int(round(seconds / dt))
+    t = 0.0
+    impacts = 0
+    heights = []
+    contact_y = apex_y = None
+    escape = None
+    for _ in range(steps):
+        poly.update(dt)
+        ball.update(dt)
+        hits = poly.collide_ball(ball)
+        t += dt
+        if hits:
+            impacts += hits
+            if contact_y is not None:
+                heights.append(contact_y - apex_y)
+            contact_y = apex_y = ball.y
+        elif apex_y is not None:
+            apex_y = min(apex_y, ball.y)
+        if poly.outside(ball):
+            escape = t
+            break
+    return {
+        'params': params,
+        'seconds': seconds,
+        'dt': dt,
+        'time_to_escape': escape,
+        'mean_bounce_height': sum(heights) / len(heights) if heights else 0.0,
+        'collision_rate': impacts / t if t > 0 else 0.0,
+        'impacts': impacts,
+        'sim_time': t,
+    }
+
+def parse_values(text, kind):
+    """'a' -> [a];  'a,b,c' -> list;  'a:b:n' -> n evenly spaced values from a to b."""
+    if ':' in text:
+        a, b, n = text.split(':')
+        a, b, n = float(a), float(b), int(n)
+        values = [a + (b - a) * i / (n - 1) for i in range(n)] if n > 1 else [a]
+    else:
+        values = [float(v) for v in text.split(',')]
+    return [kind(round(v)) if kind is int else kind(v) for v in values]
+
+def run_key(params, seconds, dt):
+    # the duration and step are part of a run: changing either reruns everything
+    return json.dumps([params[name] for name, _, _ in SWEEP_PARAMS] + [seconds, dt])
+
+def run_sweep(argv):
+    p = argparse.ArgumentParser(prog='2.py sweep',
+                                description='Headless parameter sweep over all cores; results stream to a JSONL file')
+    for name, kind, default in SWEEP_PARAMS:
+        p.add_argument('--' + name, default=default, help="value, 'a,b,c' or 'a:b:n' (default %(default)s)")
+    p.add_argument('--seconds', type=float, default=30.0, help='Simulated time per run')
+    p.add_argument('--dt', type=float, default=1/60, help='Physics step')
+    p.add_argument('--jobs', type=int, default=os.cpu_count(), help='Worker processes')
+    p.add_argument('--out', required=True, help='Results file (JSON lines); finished runs in it are skipped')
+    args = p.parse_args(argv)
+
+    axes = [[(name, v) for v in parse_values(getattr(args, name), kind)] for name, kind, _ in SWEEP_PARAMS]
+    grid = [dict(combo) for combo in itertools.product(*axes)]
+
+    # resume: every complete line in the results file is a finished run; a line cut off
+    # by an interrupted run is dropped, so new results start on a line of their own
+    done = set()
+    if os.path.exists(args.out):
+        with open(args.out, 'r+b') as f:
+            data = f.read()
+            complete = data.rfind(b'\n') + 1
+            if complete < len(data):
+                f.truncate(complete)
+        for line in data[:complete].splitlines():
+            try:
+                result = json.loads(line)
+                done.add(run_key(result['params'], result['seconds'], result['dt']))
+            except (ValueError, KeyError):
+                pass  # an unreadable line, or one written without seconds/dt
+    pending = [params for params in grid if run_key(params, args.seconds, args.dt) not in done]
+    print(f'{len(grid)} runs, {len(grid) - len(pending)} already done, {len(pending)} to go '
+          f'on {args.jobs} workers', file=sys.stderr)
+
+    with open(args.out, 'a') as out, ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures = [pool.submit(run_headless, params, args.seconds, args.dt) for params in pending]
+        for n, fut in enumerate(as_completed(futures), 1):
+            out.write(json.dumps(fut.result()) + '\n')
+            out.flush()
+            if n % 100 == 0 or n == len(futures):
+                print(f'{n}/{len(futures)}', file=sys.stderr)
 
 if __name__ == '__main__':
+    if sys.argv[1:2] == ['sweep']:
+        run_sweep(sys.argv[2:])
+        sys.exit()
     args = parse_args()
-    sim = Simulation(args)
+    sim = Replay(args) if args.replay else Simulation(args)
     sim.run()
@@ -5,8 +5,6 @@ import pygame
 import sys
 import math
 
-pygame.init()
-
 WIDTH, HEIGHT = 800, 600
 CENTER = (WIDTH // 2, HEIGHT // 2)
 FPS = 60
@@ -14,9 +12,7 @@ FPS = 60
 g = 0.5  # гравитация
 friction = 0.999  # воздушное трение
 restitution = 0.9  # упругость
-
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-clock = pygame.time.Clock()
+spin = 1  # скорость вращения (градусов за кадр)
 
 # шар
 ball_radius = 15
@@ -37,21 +33,11 @@ def get_hexagon_vertices(center, radius, angle_deg):
         verts.append(pygame.Vector2(x, y))
     return verts
 
-while True:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            pygame.quit()
-            sys.exit()
-
-    screen.fill((0, 0, 0))
-
-    angle += 1  # скорость вращения
+# один кадр физики: поворот, гравитация, трение, столкновения с гранями
+def physics_step(ball_pos, ball_vel, angle):
+    angle += spin
     verts = get_hexagon_vertices(CENTER, hex_radius, angle)
 
-    # отрисовка шестиугольника
-    pygame.draw.polygon(screen, (255, 255, 255), [(v.x, v.y) for v in verts], 2)
-
-    # физика
     ball_vel.y += g
     ball_vel *= friction
     ball_pos += ball_vel
@@ -74,8 +60,28 @@ while True:
                 tangent = pygame.Vector2(normal.y, -normal.x)
                 ball_vel -= tangent * (1 - restitution) * ball_vel.dot(tangent)
 
-    # отрисовка шара
-    pygame.draw.circle(screen, (255, 0, 0), (int(ball_pos.x), int(ball_pos.y)), ball_radius)
+    return ball_pos, ball_vel, angle, verts
+
+if __name__ == "__main__":
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    clock = pygame.time.Clock()
+
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+
+        screen.fill((0, 0, 0))
+
+        ball_pos, ball_vel, angle, verts = physics_step(ball_pos, ball_vel, angle)
+
+        # отрисовка шестиугольника
+        pygame.draw.polygon(screen, (255, 255, 255), [(v.x, v.y) for v in verts], 2)
+
+        # отрисовка шара
+        pygame.draw.circle(screen, (255, 0, 0), (int(ball_pos.x), int(ball_pos.y)), ball_radius)
 
-    pygame.display.flip()
-    clock.tick(FPS)
+        pygame.display.flip()
+        clock.tick(FPS)
@@ -0,0 +1,234 @@
+# Scaling benchmark of the N-body simulation in Mind3/2.py.
+# Sweeps the body count across the force backends and integrators of that script and
+# records, per case: wall time per step, peak memory of a step (tracemalloc, which sees
+# NumPy's buffers), resident memory after the case and its growth during it, and the
+# relative energy error over the run (walls off, so energy should be conserved up to
+# integrator and force errors).
+# A saved report can be used as a baseline: slower or hungrier cases are flagged and
+# the exit status is 1, so a regression in the force code shows up immediately.
+#
+#   python nbody_bench.py [--sizes 50,1000,20000] [--json report.json] [--baseline old.json]
+
+import argparse
+import importlib.util
+import json
+import math
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_SIZES = "50,200,1000,5000,20000,100000"
+DEFAULT_FORCES = "direct,bh"
+# integrator[:K] — K > 0 means block timesteps with up to 2**K substeps (leapfrog only)
+DEFAULT_INTEGRATORS = "euler,leapfrog,leapfrog:3,yoshida4"
+
+
+def load_script(rel_path, name):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, rel_path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def rss_mb():
+    """
+    Current resident set size; where /proc is missing, the process-wide peak instead,
+    and None where neither is available (Windows has no `resource` module).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def run_case(sim, n, steps, min_time, budget, energy_max, seed):
+    """
+    One warm-up step, then timed steps: at least `steps` of them (the energy error is
+    taken after exactly that many) and more until `min_time` seconds are collected, so
+    that small N is not timed from a handful of sub-millisecond steps. The time per step
+    reported is the median. `budget` seconds cut the run short at any point (after at
+    least one step); the number of steps the energy error covers is recorded.
+    """
+    rss0 = rss_mb()
+    pos, vel, m = sim.init_bodies(n, seed)
+    e0 = sim.kinetic_energy(vel, m) + sim.potential_energy(pos, m) if n <= energy_max else None
+    sim.force_evals = 0.0
+
+    # the warm-up step (leapfrog computes its first accelerations here) is also the one
+    # whose memory is traced: tracemalloc slows allocation down, so it is kept out of timing
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    acc = sim.integrate_step(pos, vel, m, sim.dt, None)
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    evals0 = sim.force_evals
+    times = []
+    rel_err = None
+    while not times or (len(times) < steps or sum(times) < min_time) and sum(times) < budget:
+        t0 = time.perf_counter()
+        acc = sim.integrate_step(pos, vel, m, sim.dt, acc)
+        times.append(time.perf_counter() - t0)
+        if e0 is not None and len(times) <= steps:
+            e = sim.kinetic_energy(vel, m) + sim.potential_energy(pos, m)
+            rel_err = abs((e - e0) / e0)
+    done = len(times)
+    times.sort()
+    rss = rss_mb()
+    return {
+        "n": n,
+        "steps": done,
+        "s_per_step": times[done // 2],
+        "force_evals_per_step": (sim.force_evals - evals0) / done,
+        "peak_step_mb": peak / 2 ** 20,
+        "rss_mb": rss,
+        "rss_growth_mb": None if rss is None or rss0 is None else rss - rss0,
+        "rel_energy_error": rel_err,
+        "energy_steps": min(done, steps) if rel_err is not None else 0,
+        "finite": bool(math.isfinite(float(pos.sum() + vel.sum()))),
+    }
+
+
+def case_key(r):
+    return f"{r['forces']}/{r['integrator']}/{r['n']}"
+
+
+def compare(report, baseline, tolerance):
+    """Marks every case that got slower or bigger than the baseline by more than `tolerance`."""
+    old = {case_key(r): r for r in baseline["results"] if "s_per_step" in r}
+    regressions = []
+    for r in report["results"]:
+        b = old.get(case_key(r))
+        if b is None or "s_per_step" not in r:
+            continue
+        r["baseline_s_per_step"] = b["s_per_step"]
+        r["time_ratio"] = r["s_per_step"] / b["s_per_step"]
+        r["mem_ratio"] = r["peak_step_mb"] / max(b["peak_step_mb"], 1e-6)
+        flags = []
+        if r["time_ratio"] > 1 + tolerance:
+            flags.append("time")
+        if r["mem_ratio"] > 1 + tolerance and r["peak_step_mb"] - b["peak_step_mb"] > 1.0:
+            flags.append("memory")
+        if r["rel_energy_error"] is not None and b.get("rel_energy_error") is not None \
+                and r["energy_steps"] == b.get("energy_steps"):
+            # energy errors are tiny and noisy: only an order of magnitude counts
+            if r["rel_energy_error"] > 10 * b["rel_energy_error"] + 1e-12:
+                flags.append("energy")
+        if not r["finite"]:
+            flags.append("nan")
+        r["regressions"] = flags
+        if flags:
+            regressions.append(case_key(r))
+    return regressions
+
+
+def print_table(report, with_baseline):
+    head = (f"{'forces':<8}{'integrator':<13}{'N':>8}{'steps':>6}{'ms/step':>12}{'evals':>7}"
+            f"{'peak MB':>9}{'RSS MB':>8}{'+RSS':>7}{'|dE/E0|':>10}")
+    if with_baseline:
+        head += f"{'base ms':>12}{'x':>7}  flags"
+    print(head)
+    print("-" * len(head))
+    for r in report["results"]:
+        lead = f"{r['forces']:<8}{r['integrator']:<13}{r['n']:>8}"
+        if "skipped" in r:
+            print(f"{lead}  skipped: {r['skipped']}")
+            continue
+        err = "-" if r["rel_energy_error"] is None else f"{r['rel_energy_error']:.2e}"
+        rss = "-" if r["rss_mb"] is None else f"{r['rss_mb']:.0f}"
+        growth = "-" if r["rss_growth_mb"] is None else f"{r['rss_growth_mb']:+.0f}"
+        line = (f"{lead}{r['steps']:>6}{r['s_per_step'] * 1e3:>12.2f}{r['force_evals_per_step']:>7.2f}"
+                f"{r['peak_step_mb']:>9.1f}{rss:>8}{growth:>7}{err:>10}")
+        if with_baseline and "time_ratio" in r:
+            line += f"{r['baseline_s_per_step'] * 1e3:>12.2f}{r['time_ratio']:>7.2f}  {','.join(r['regressions'])}"
+        print(line)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Scaling benchmark of the Mind3/2.py N-body simulation")
+    p.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated body counts")
+    p.add_argument("--forces", default=DEFAULT_FORCES, help="force backends: direct, bh")
+    p.add_argument("--integrators", default=DEFAULT_INTEGRATORS,
+                   help="integrators, 'leapfrog:3' = block timesteps with 3 levels")
+    p.add_argument("--steps", type=int, default=5, help="steps the energy error is measured over")
+    p.add_argument("--min-time", type=float, default=1.0, help="keep stepping until this many seconds are timed")
+    p.add_argument("--budget", type=float, default=20.0, help="seconds of timed steps per case (at least one step)")
+    p.add_argument("--direct-max", type=int, default=20000,
+                   help="skip the O(N^2) direct backend above this N")
+    p.add_argument("--energy-max", type=int, default=20000,
+                   help="energy needs an O(N^2) pair sum: no energy error above this N")
+    p.add_argument("--workers", type=int, default=0, help="force processes (see --workers of Mind3/2.py)")
+    p.add_argument("--theta", type=float, help="Barnes-Hut opening angle (default: the script's)")
+    p.add_argument("--dt", type=float, help="time step (default: the script's)")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--json", metavar="FILE", help="write the report as JSON")
+    p.add_argument("--baseline", metavar="FILE", help="compare against a report saved with --json")
+    p.add_argument("--tolerance", type=float, default=0.25,
+                   help="allowed relative slowdown / memory growth against the baseline")
+    args = p.parse_args(argv)
+
+    sim = load_script("Mind3/2.py", "bench_nbody")
+    sim.force_workers = args.workers
+    if args.theta is not None:
+        sim.theta = args.theta
+    if args.dt is not None:
+        sim.dt = args.dt
+    sim.walls = False
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    forces = args.forces.split(",")
+    integrators = args.integrators.split(",")
+    report = {
+        "script": "Mind3/2.py",
+        "machine": dict(python=platform.python_version(), platform=platform.platform(), cpus=os.cpu_count()),
+        "params": dict(dt=sim.dt, G=sim.G, softening=sim.softening, theta=sim.theta, workers=args.workers,
+                       steps=args.steps, min_time=args.min_time, budget=args.budget,
+                       seed=args.seed),
+        "results": [],
+    }
+    for n in sizes:
+        for engine in forces:
+            for spec in integrators:
+                name, _, levels = spec.partition(":")
+                r = {"forces": engine, "integrator": spec, "n": n}
+                if engine == "direct" and n > args.direct_max:
+                    r["skipped"] = f"N > --direct-max {args.direct_max}"
+                else:
+                    sim.force_engine, sim.integrator, sim.block_levels = engine, name, int(levels or 0)
+                    r.update(run_case(sim, n, args.steps, args.min_time, args.budget, args.energy_max, args.seed))
+                report["results"].append(r)
+                print(f"  {case_key(r)}: " + (r.get("skipped") or f"{r['s_per_step'] * 1e3:.2f} ms/step"),
+                      file=sys.stderr)
+    if sim.force_pool is not None:
+        sim.force_pool.close()
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        report["baseline"] = dict(file=args.baseline, tolerance=args.tolerance, regressions=regressions)
+    print_table(report, bool(args.baseline))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if regressions:
+        print(f"{len(regressions)} regression(s) against {args.baseline}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
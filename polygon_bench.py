@@ -0,0 +1,265 @@
+# Headless benchmark of the four ball-in-rotating-polygon physics cores:
+#   gpt-5/2.py, gpt-5/4.py, gpt-oss-20b/2.py, gpt-oss-20b/4.py
+# Every core is loaded from its script, configured with the same scene and scenario
+# and stepped at its own native rate for the same simulated time. Reported per core
+# and scenario: physics steps/s, energy drift, worst wall penetration, escapes.
+# Penetration is the overlap left after a step, i.e. after the core's own correction:
+# a core that resolves contacts fully reads ~0, one that leaves the ball in the wall
+# (e.g. only pushing out while the ball still moves inwards) shows it here.
+#
+#   python polygon_bench.py [--seconds 20] [--variants 8] [--json report.json]
+
+import argparse
+import importlib.util
+import json
+import math
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Common scene: regular hexagon around (CX, CY), gravity pointing down the screen
+CX, CY = 400.0, 400.0
+R_POLY = 250.0
+SIDES = 6
+BALL_R = 12.0
+G = 1000.0
+
+# name: omega (rad/s), restitution, wall friction, start offset from center, start velocity.
+# Variants rotate the start velocity so that several trajectories are tried per scenario.
+SCENARIOS = {
+    # elastic, frictionless, static walls: total energy must be conserved
+    "elastic-static": dict(omega=0.0, restitution=1.0, mu=0.0, x0=0.0, y0=-100.0, speed=400.0),
+    # fast spin: wall points move at ~1500 px/s, the classic tunnelling case
+    "high-omega": dict(omega=6.0, restitution=0.85, mu=0.2, x0=0.0, y0=-100.0, speed=600.0),
+    # skims along the bottom edge, barely touching it
+    "grazing": dict(omega=0.3, restitution=0.85, mu=0.2, x0=-120.0, y0=None, speed=500.0, grazing=True),
+    # starts at rest on the bottom edge of a still polygon and should stay there
+    "resting": dict(omega=0.0, restitution=0.5, mu=0.3, x0=0.0, y0=None, speed=0.0),
+}
+
+
+def load_script(rel_path, name):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, rel_path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def start_state(scn, variant, variants):
+    """Initial (x, y, vx, vy) of one scenario variant, in screen coordinates."""
+    apothem = R_POLY * math.cos(math.pi / SIDES)
+    floor_y = CY + apothem - BALL_R          # ball center resting on the bottom edge
+    x = CX + scn["x0"]
+    y = floor_y if scn["y0"] is None else CY + scn["y0"]
+    if scn.get("grazing"):
+        y = floor_y - 0.5
+        # along the edge with a slight downward component, spread over +-2 degrees
+        a = math.radians(-2.0 + 4.0 * variant / max(variants - 1, 1))
+        return x, y, scn["speed"] * math.cos(a), scn["speed"] * math.sin(a)
+    a = 2 * math.pi * variant / variants
+    return x, y, scn["speed"] * math.cos(a), scn["speed"] * math.sin(a)
+
+
+# ------------------------------------------------------------------ adapters
+# Each adapter: dt, reset(scn, x, y, vx, vy), step(), state() -> (x, y, vx, vy, theta)
+# where theta is the angle of vertex 0 (vertices at theta + 2*pi*i/SIDES).
+
+class Gpt5Ccd:
+    name = "gpt-5/2.py"
+    dt = 1 / 120
+
+    def __init__(self):
+        self.m = load_script("gpt-5/2.py", "bench_gpt5_2")
+
+    def reset(self, scn, x, y, vx, vy):
+        m = self.m
+        m.CENTER = m.Vec(CX, CY)
+        m.R_POLY, m.SIDES, m.ball_r = R_POLY, SIDES, BALL_R
+        m.g, m.air_drag = G, 0.0
+        m.omega, m.restitution, m.friction_mu = scn["omega"], scn["restitution"], scn["mu"]
+        self.pos, self.vel, self.theta = m.Vec(x, y), m.Vec(vx, vy), 0.0
+
+    def step(self):
+        self.pos, self.vel, self.theta = self.m.step_ball(self.pos, self.vel, self.theta, self.dt)
+
+    def state(self):
+        return self.pos.x, self.pos.y, self.vel.x, self.vel.y, self.theta
+
+
+class Gpt5Kernel:
+    name = "gpt-5/4.py"
+
+    def __init__(self):
+        self.m = load_script("gpt-5/4.py", "bench_gpt5_4")
+        self.dt = self.m.PHYS_DT
+
+    def reset(self, scn, x, y, vx, vy):
+        m = self.m
+        m.GRAVITY = m.Vector2(0.0, G)
+        m.REST_COEFF, m.FRICTION_COEFF = scn["restitution"], scn["mu"]
+        self.ball = m.BallState(x, y, vx, vy)
+        self.hexagon = m.HexState(m.Vector2(CX, CY), R_POLY, 0.0, scn["omega"])
+
+    def step(self):
+        self.hexagon.angle += self.hexagon.omega * self.dt
+        self.m.step_ball(self.ball, self.hexagon, self.dt, BALL_R, 1.0)
+
+    def state(self):
+        b = self.ball
+        return b.x, b.y, b.vx, b.vy, self.hexagon.angle
+
+
+class OssSector:
+    name = "gpt-oss-20b/2.py"
+    dt = 1 / 60
+
+    def __init__(self):
+        self.m = load_script("gpt-oss-20b/2.py", "bench_oss_2")
+
+    def reset(self, scn, x, y, vx, vy):
+        # no wall friction in this model; air drag is switched off like everywhere else
+        self.poly = self.m.RotatingPolygon(SIDES, R_POLY, scn["omega"], CX, CY)
+        self.ball = self.m.Ball(x, y, vx, vy, r=BALL_R)
+        self.ball.restitution = scn["restitution"]
+        self.ball.friction = 0.0
+
+    def step(self):
+        self.poly.update(self.dt)
+        self.ball.update(self.dt, g=G)
+        self.poly.collide_ball(self.ball)
+
+    def state(self):
+        b = self.ball
+        return b.x, b.y, b.vx, b.vy, self.poly.angle
+
+
+class OssFrames:
+    name = "gpt-oss-20b/4.py"
+
+    def __init__(self):
+        self.m = load_script("gpt-oss-20b/4.py", "bench_oss_4")
+        self.fps = self.m.FPS
+        self.dt = 1 / self.fps
+
+    def reset(self, scn, x, y, vx, vy):
+        # this core works in frames: px/frame, px/frame^2 and degrees per frame
+        m, f = self.m, self.fps
+        m.CENTER, m.hex_radius, m.ball_radius = (CX, CY), R_POLY, BALL_R
+        m.g, m.friction, m.restitution = G / f ** 2, 1.0, scn["restitution"]
+        m.spin = math.degrees(scn["omega"]) / f
+        self.pos = m.pygame.Vector2(x, y)
+        self.vel = m.pygame.Vector2(vx / f, vy / f)
+        self.angle = 0.0
+
+    def step(self):
+        self.pos, self.vel, self.angle, _ = self.m.physics_step(self.pos, self.vel, self.angle)
+
+    def state(self):
+        return self.pos.x, self.pos.y, self.vel.x * self.fps, self.vel.y * self.fps, math.radians(self.angle)
+
+
+ADAPTERS = [Gpt5Ccd, Gpt5Kernel, OssSector, OssFrames]
+
+
+# ------------------------------------------------------------------ metrics
+def penetration(x, y, theta):
+    """Deepest overlap of the ball with any wall line after a step (> BALL_R: center outside)."""
+    apothem = R_POLY * math.cos(math.pi / SIDES)
+    dx, dy = x - CX, y - CY
+    worst = -math.inf
+    for i in range(SIDES):
+        phi = theta + 2 * math.pi * (i + 0.5) / SIDES
+        worst = max(worst, dx * math.cos(phi) + dy * math.sin(phi) + BALL_R - apothem)
+    return worst
+
+
+def energy(x, y, vx, vy):
+    # per unit mass, potential measured from the polygon center (y grows downwards)
+    return 0.5 * (vx * vx + vy * vy) - G * (y - CY)
+
+
+def run_case(adapter, scn, seconds, variants):
+    steps = int(round(seconds / adapter.dt))
+    scale = 0.5 * scn["speed"] ** 2 + G * R_POLY      # energy scale for relative drift
+    worst_pen, escapes, drift, max_drift, busy = 0.0, 0, 0.0, 0.0, 0.0
+    for v in range(variants):
+        adapter.reset(scn, *start_state(scn, v, variants))
+        e0 = energy(*adapter.state()[:4])
+        escaped = False
+        t0 = time.perf_counter()
+        for _ in range(steps):
+            adapter.step()
+        busy += time.perf_counter() - t0
+
+        # second, untimed pass for the per-step metrics so they do not skew steps/s
+        adapter.reset(scn, *start_state(scn, v, variants))
+        for _ in range(steps):
+            adapter.step()
+            x, y, vx, vy, theta = adapter.state()
+            pen = penetration(x, y, theta)
+            worst_pen = max(worst_pen, pen)
+            if pen > BALL_R:
+                escaped = True
+            if not math.isfinite(x + y + vx + vy):
+                escaped = True
+                break
+            max_drift = max(max_drift, abs(energy(x, y, vx, vy) - e0) / scale)
+        escapes += escaped
+        drift += (energy(*adapter.state()[:4]) - e0) / scale
+    return {
+        "steps_per_s": steps * variants / busy if busy > 0 else float("inf"),
+        "dt": adapter.dt,
+        "energy_drift": drift / variants,
+        "max_abs_energy_drift": max_drift,
+        "max_penetration_px": max(worst_pen, 0.0),
+        "escapes": escapes,
+        "variants": variants,
+    }
+
+
+def print_table(report):
+    head = f"{'core':<18}{'scenario':<16}{'steps/s':>11}{'dt':>8}{'dE/E':>9}{'|dE|max':>9}{'pen px':>9}{'esc':>6}"
+    print(head)
+    print("-" * len(head))
+    for core, cases in report["results"].items():
+        for scn, r in cases.items():
+            if "error" in r:
+                print(f"{core:<18}{scn:<16}  error: {r['error']}")
+                continue
+            print(f"{core:<18}{scn:<16}{r['steps_per_s']:>11,.0f}{1 / r['dt']:>6.0f}Hz"
+                  f"{r['energy_drift']:>+9.3f}{r['max_abs_energy_drift']:>9.3f}"
+                  f"{r['max_penetration_px']:>9.2f}{r['escapes']:>3}/{r['variants']:<2}")
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Benchmark the ball-in-rotating-polygon physics cores")
+    p.add_argument("--seconds", type=float, default=20.0, help="simulated seconds per run")
+    p.add_argument("--variants", type=int, default=8, help="start velocities tried per scenario")
+    p.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="limit to these scenarios")
+    p.add_argument("--json", metavar="FILE", help="also write the report as JSON")
+    args = p.parse_args(argv)
+
+    names = args.scenario or list(SCENARIOS)
+    report = {"scene": dict(center=[CX, CY], poly_radius=R_POLY, sides=SIDES, ball_radius=BALL_R, g=G),
+              "seconds": args.seconds, "scenarios": {n: SCENARIOS[n] for n in names}, "results": {}}
+    for cls in ADAPTERS:
+        try:
+            adapter = cls()
+        except (ImportError, SystemExit) as e:
+            report["results"][cls.name] = {n: {"error": f"cannot load: {e}"} for n in names}
+            continue
+        report["results"][cls.name] = {n: run_case(adapter, SCENARIOS[n], args.seconds, args.variants)
+                                       for n in names}
+
+    print_table(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+# Arbitrary rotating polygon containers (convex, concave, star) for the ball sims.
+# Standard library only.
+#
+# A container is a closed polygon given in its own (local) frame around the rotation
+# center. Its edges are put once into an AABB tree in that frame; a collision query
+# rotates the ball into the local frame and only tests the edges whose boxes overlap
+# the ball's box. For a ball in contact, whether its center is inside is decided by the
+# nearest of those edges; a ball with no edge within reach takes one ray cast through the
+# tree. A center found outside (tunnelled through a wall in one step) is put back across
+# its nearest edge. Inside the clearance circle none of this is needed. So a container
+# with thousands of edges costs about O(log edges) per step, plus the edges within reach
+# of a ball in contact.
+#
+# Vertex files: one "x y" (or "x,y") pair per line, relative to the rotation center,
+# in order along the outline, either orientation; blank lines and "#" comments skipped.
+# `python polygon_container.py star 7 200 90 -o star.txt` writes example shapes.
+
+import argparse
+import math
+import random
+import sys
+
+
+def load_vertices(path):
+    verts = []
+    with open(path) as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.split("#", 1)[0].replace(",", " ").split()
+            if not line:
+                continue
+            if len(line) != 2:
+                raise ValueError(f"{path}:{lineno}: expected 'x y', got {' '.join(line)!r}")
+            verts.append((float(line[0]), float(line[1])))
+    if verts and verts[0] == verts[-1]:
+        verts.pop()  # closed outlines repeat the first vertex
+    if len(verts) < 3:
+        raise ValueError(f"{path}: a polygon needs at least 3 vertices, got {len(verts)}")
+    return verts
+
+
+def save_vertices(path, verts):
+    out = sys.stdout if path == "-" else open(path, "w")
+    try:
+        for x, y in verts:
+            out.write(f"{x:.6f} {y:.6f}\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+class EdgeTree:
+    """
+    Bounding-volume hierarchy over the segments (ax, ay, bx, by), stored as flat lists.
+    Node k has a box (minx..maxy) and either two children left[k], right[k] or, for a
+    leaf (left[k] == -1), the edges order[start[k] : start[k] + count[k]]. Node 0 is the root.
+    """
+
+    LEAF_SIZE = 4
+
+    def __init__(self, segments):
+        self.segments = segments
+        self.minx, self.miny, self.maxx, self.maxy = [], [], [], []
+        self.left, self.right, self.start, self.count = [], [], [], []
+        self.order = list(range(len(segments)))
+        boxes = [(min(ax, bx), min(ay, by), max(ax, bx), max(ay, by)) for ax, ay, bx, by in segments]
+        self._build(boxes, 0, len(segments))
+
+    def _build(self, boxes, lo, hi):
+        # top down, median split of the box centers along the longer axis
+        part = [boxes[e] for e in self.order[lo:hi]]
+        node = len(self.left)
+        self.minx.append(min(b[0] for b in part))
+        self.miny.append(min(b[1] for b in part))
+        self.maxx.append(max(b[2] for b in part))
+        self.maxy.append(max(b[3] for b in part))
+        self.left.append(-1)
+        self.right.append(-1)
+        self.start.append(lo)
+        self.count.append(hi - lo)
+        if hi - lo > self.LEAF_SIZE:
+            axis = 0 if self.maxx[node] - self.minx[node] >= self.maxy[node] - self.miny[node] else 1
+            self.order[lo:hi] = sorted(self.order[lo:hi], key=lambda e: boxes[e][axis] + boxes[e][axis + 2])
+            mid = (lo + hi) // 2
+            self.left[node] = self._build(boxes, lo, mid)
+            self.right[node] = self._build(boxes, mid, hi)
+        return node
+
+    def nearest(self, px, py, dist2):
+        """
+        Edge with the smallest dist2(e) (squared distance of edge e to (px, py)).
+        Depth first, nearer child first; nodes whose box is farther than the best edge
+        found so far are skipped.
+        """
+        minx, miny, maxx, maxy = self.minx, self.miny, self.maxx, self.maxy
+
+        def box_d2(k):
+            dx = max(minx[k] - px, 0.0, px - maxx[k])
+            dy = max(miny[k] - py, 0.0, py - maxy[k])
+            return dx * dx + dy * dy
+
+        best, best_d2 = -1, math.inf
+        stack = [(0.0, 0)]
+        while stack:
+            d2, k = stack.pop()
+            if d2 >= best_d2:
+                continue
+            if self.left[k] < 0:
+                s = self.start[k]
+                for e in self.order[s:s + self.count[k]]:
+                    d2 = dist2(e)
+                    if d2 < best_d2:
+                        best, best_d2 = e, d2
+            else:
+                a, b = self.left[k], self.right[k]
+                da, db = box_d2(a), box_d2(b)
+                if da < db:
+                    stack.append((db, b))   # the farther one is popped last
+                    stack.append((da, a))
+                else:
+                    stack.append((da, a))
+                    stack.append((db, b))
+        return best
+
+    def query(self, minx, miny, maxx, maxy):
+        """Indices of the edges whose boxes overlap the query box."""
+        found = []
+        stack = [0]
+        while stack:
+            k = stack.pop()
+            if self.minx[k] > maxx or self.maxx[k] < minx or self.miny[k] > maxy or self.maxy[k] < miny:
+                continue
+            if self.left[k] < 0:
+                s = self.start[k]
+                found.extend(self.order[s:s + self.count[k]])
+            else:
+                stack.append(self.left[k])
+                stack.append(self.right[k])
+        return found
+
+
+class PolygonContainer:
+    """
+    Rotating container of any simple polygon shape; same interface as RotatingPolygon
+    in gpt-oss-20b/2.py (angle, update, vertices, collide_ball, outside).
+    """
+
+    def __init__(self, local_vertices, omega, cx, cy):
+        self.local = list(local_vertices)
+        self.sides = len(self.local)
+        self.omega = omega
+        self.cx = cx
+        self.cy = cy
+        self.angle = 0.0
+        self.radius = max(math.hypot(x, y) for x, y in self.local)  # bounding circle
+        n = self.sides
+        segments = [self.local[i] + self.local[(i + 1) % n] for i in range(n)]
+        self.tree = EdgeTree(segments)
+        # outward unit normals of the edges; the outline may be given in either orientation
+        area2 = sum(ax * by - bx * ay for ax, ay, bx, by in segments)
+        sign = 1.0 if area2 > 0 else -1.0
+        self.normals = []
+        for ax, ay, bx, by in segments:
+            length = math.hypot(bx - ax, by - ay) or 1.0
+            self.normals.append((sign * (by - ay) / length, sign * (ax - bx) / length))
+        # clearance: a ball closer to the center than this touches no wall (when the
+        # center itself is inside the outline, else the shortcut is simply never taken)
+        self.clearance = math.sqrt(min(self._closest(e, 0.0, 0.0)[2] for e in range(n)))
+        if not self._inside_local(0.0, 0.0):
+            self.clearance = -math.inf
+
+    def vertices(self, angle=None):
+        if angle is None:
+            angle = self.angle
+        ca, sa = math.cos(angle), math.sin(angle)
+        return [(self.cx + ca * x - sa * y, self.cy + sa * x + ca * y) for x, y in self.local]
+
+    def update(self, dt):
+        self.angle += self.omega * dt
+
+    def _closest(self, e, lx, ly):
+        """Closest point of edge e to the local point (lx, ly) and its squared distance."""
+        ax, ay, bx, by = self.tree.segments[e]
+        ex, ey = bx - ax, by - ay
+        len2 = ex * ex + ey * ey
+        t = 0.0 if len2 == 0.0 else max(0.0, min(1.0, ((lx - ax) * ex + (ly - ay) * ey) / len2))
+        qx, qy = ax + ex * t, ay + ey * t
+        return qx, qy, (lx - qx) ** 2 + (ly - qy) ** 2
+
+    def _inside_local(self, lx, ly):
+        # even-odd test with a ray towards +x; the tree narrows it down to the edges
+        # whose boxes span the ray's height
+        inside = False
+        for e in self.tree.query(lx, ly, math.inf, ly):
+            ax, ay, bx, by = self.tree.segments[e]
+            if (ay > ly) != (by > ly) and lx < ax + (ly - ay) * (bx - ax) / (by - ay):
+                inside = not inside
+        return inside
+
+    def _inner_side(self, e, lx, ly):
+        """
+        True if (lx, ly) is on the inner side of edge e. For the point's nearest edge this is
+        the same answer as _inside_local. If the nearest point is a vertex, the side is taken
+        against the sum of the two edge normals meeting there.
+        """
+        ax, ay, bx, by = self.tree.segments[e]
+        qx, qy, _ = self._closest(e, lx, ly)
+        nx, ny = self.normals[e]
+        if (qx, qy) == (ax, ay):
+            px, py = self.normals[e - 1]
+            nx, ny = nx + px, ny + py
+        elif (qx, qy) == (bx, by):
+            px, py = self.normals[(e + 1) % self.sides]
+            nx, ny = nx + px, ny + py
+        return (lx - qx) * nx + (ly - qy) * ny <= 0.0
+
+    def _inside_near(self, lx, ly):
+        # cheap close to a wall, where the nearest-edge search visits few nodes
+        return self._inner_side(self._nearest_edge(lx, ly), lx, ly)
+
+    def _nearest_edge(self, lx, ly):
+        return self.tree.nearest(lx, ly, lambda e: self._closest(e, lx, ly)[2])
+
+    def collide_ball(self, ball):
+        # Everything happens in the local frame, where the walls are at rest: position is
+        # rotated back by the current angle, velocity becomes relative to the wall point
+        # under the ball (v - omega x r). Returns the number of impacts.
+        r = ball.r
+        dx, dy = ball.x - self.cx, ball.y - self.cy
+        if math.hypot(dx, dy) + r <= self.clearance:
+            return 0  # clear of every wall
+        ca, sa = math.cos(self.angle), math.sin(self.angle)
+        lx = ca * dx + sa * dy
+        ly = -sa * dx + ca * dy
+        rvx, rvy = ball.vx + self.omega * dy, ball.vy - self.omega * dx
+        lvx = ca * rvx + sa * rvy
+        lvy = -sa * rvx + ca * rvy
+
+        impacts = 0
+        moves = []   # (nx, ny) of every push, the velocity is reflected once per contact
+        edges = self.tree.query(lx - r, ly - r, lx + r, ly + r)
+        near, near_d2 = -1, r * r
+        for e in edges:
+            d2 = self._closest(e, lx, ly)[2]
+            if d2 < near_d2:
+                near, near_d2 = e, d2
+        if near < 0:
+            # no wall within r: no contact, but the center may still have gone more than r
+            # past a wall in a single step. Far from the walls the ray cast is the cheaper
+            # test; only a center that is out pays for the nearest-edge search.
+            if self._inside_local(lx, ly):
+                return 0
+            near = self._nearest_edge(lx, ly)
+        if not self._inner_side(near, lx, ly):
+            # the center went through a wall within one step: put it back across the
+            # nearest edge, then resolve the remaining overlap like any other contact
+            qx, qy, _ = self._closest(near, lx, ly)
+            nx, ny = qx - lx, qy - ly
+            d = math.hypot(nx, ny)
+            nx, ny = (nx / d, ny / d) if d > 1e-9 else (0.0, 0.0)
+            lx, ly = qx + nx * r, qy + ny * r
+            if not self._inside_near(lx, ly):
+                lx, ly = qx + nx * 1e-3, qy + ny * 1e-3   # concave spot: just across the wall
+            moves.append((nx, ny))
+            edges = self.tree.query(lx - r, ly - r, lx + r, ly + r)
+        if not edges:
+            return 0
+        safe = lx, ly
+
+        # Inside the polygon every contact is plain circle vs segment, the normal points
+        # from the closest point on the wall to the center. A few passes, because in a
+        # narrow corner pushing out of one edge can push into another.
+        for _ in range(4):
+            moved = False
+            for e in edges:
+                qx, qy, d2 = self._closest(e, lx, ly)
+                if d2 >= r * r or d2 <= 1e-18:
+                    continue
+                d = math.sqrt(d2)
+                nx, ny = (lx - qx) / d, (ly - qy) / d
+                lx += nx * (r - d)
+                ly += ny * (r - d)
+                moves.append((nx, ny))
+                moved = True
+            if not moved:
+                break
+        if moves and not self._inside_near(lx, ly):
+            # a pocket narrower than the ball: pushing off one side went through the other,
+            # so stay wedged where the center was still inside
+            lx, ly = safe
+
+        for nx, ny in moves:
+            vdotn = lvx * nx + lvy * ny
+            if vdotn < 0:
+                lvx -= (1 + ball.restitution) * vdotn * nx
+                lvy -= (1 + ball.restitution) * vdotn * ny
+                impacts += 1
+
+        # back to the world frame; the wall velocity is taken at the corrected position
+        dx = ca * lx - sa * ly
+        dy = sa * lx + ca * ly
+        ball.x, ball.y = self.cx + dx, self.cy + dy
+        ball.vx = ca * lvx - sa * lvy - self.omega * dy
+        ball.vy = sa * lvx + ca * lvy + self.omega * dx
+        return impacts
+
+    def outside(self, ball):
+        # True once the ball's center has left the polygon
+        dx, dy = ball.x - self.cx, ball.y - self.cy
+        ca, sa = math.cos(self.angle), math.sin(self.angle)
+        return not self._inside_local(ca * dx + sa * dy, -sa * dx + ca * dy)
+
+
+# ---------------------------------------------------------------- example shapes
+def regular(sides, radius):
+    return [(radius * math.cos(2 * math.pi * i / sides), radius * math.sin(2 * math.pi * i / sides))
+            for i in range(sides)]
+
+
+def star(points, outer, inner):
+    return [((outer if i % 2 == 0 else inner) * math.cos(math.pi * i / points),
+             (outer if i % 2 == 0 else inner) * math.sin(math.pi * i / points))
+            for i in range(2 * points)]
+
+
+def blob(edges, radius, roughness=0.25, seed=1):
+    # concave star-shaped outline: a few random harmonics on the radius, many edges
+    rng = random.Random(seed)
+    waves = [(k, rng.uniform(-1, 1) * roughness / k ** 0.5, rng.uniform(0, 2 * math.pi)) for k in range(2, 9)]
+    verts = []
+    for i in range(edges):
+        a = 2 * math.pi * i / edges
+        rho = radius * (1 + sum(amp * math.sin(k * a + ph) for k, amp, ph in waves))
+        verts.append((rho * math.cos(a), rho * math.sin(a)))
+    return verts
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Write example container outlines as vertex files")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("-o", "--out", default="-", help="output file ('-' = stdout)")
+    sub = p.add_subparsers(dest="shape", required=True)
+    s = sub.add_parser("regular", parents=[common], help="regular n-gon")
+    s.add_argument("sides", type=int)
+    s.add_argument("radius", type=float)
+    s = sub.add_parser("star", parents=[common], help="star with alternating outer/inner radius")
+    s.add_argument("points", type=int)
+    s.add_argument("outer", type=float)
+    s.add_argument("inner", type=float)
+    s = sub.add_parser("blob", parents=[common], help="random concave outline with many edges")
+    s.add_argument("edges", type=int)
+    s.add_argument("radius", type=float)
+    s.add_argument("--roughness", type=float, default=0.25)
+    s.add_argument("--seed", type=int, default=1)
+    args = p.parse_args(argv)
+
+    if args.shape == "regular":
+        verts = regular(args.sides, args.radius)
+    elif args.shape == "star":
+        verts = star(args.points, args.outer, args.inner)
+    else:
+        verts = blob(args.edges, args.radius, args.roughness, args.seed)
+    save_vertices(args.out, verts)
+
+
+if __name__ == "__main__":
+    main()
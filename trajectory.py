@@ -0,0 +1,141 @@
+# Compact binary trajectory files shared by the ball-in-rotating-polygon sims
+# (gpt-5/2.py, gpt-5/4.py, gpt-oss-20b/2.py). Standard library only.
+#
+# Layout (little endian):
+#   header, 64 bytes: magic b"TRJ1", version u16, sides u16, reserved u32,
+#                     cx, cy, poly_radius, ball_radius, dt f64, 12 bytes padding
+#   records, 28 bytes each, one per physics step:
+#                     t f64, x, y, vx, vy, angle f32
+# `dt` is the nominal physics step (0 when the step varies); `t` is always exact.
+# The record count is implied by the file size, so a writer only ever appends and a
+# crashed recording is still readable up to its last complete record.
+# Only the reader is memory-mapped. A map cannot grow with the file, so a mapped writer
+# would have to preallocate and trim on close, and a crash would leave zero-filled
+# records that the size-implied count reads as real steps.
+
+import math
+import mmap
+import os
+import struct
+
+MAGIC = b"TRJ1"
+VERSION = 1
+HEADER = struct.Struct("<4sHHI5d12x")
+RECORD = struct.Struct("<d5f")
+
+
+class TrajectoryWriter:
+    """Streams one record per physics step; writes go through a small OS buffer only."""
+
+    def __init__(self, path, cx, cy, poly_radius, ball_radius, sides, dt=0.0):
+        self.f = open(path, "wb")
+        self.f.write(HEADER.pack(MAGIC, VERSION, sides, 0, cx, cy, poly_radius, ball_radius, dt))
+        self.count = 0
+
+    def append(self, t, x, y, vx, vy, angle):
+        # angle is stored wrapped so float32 keeps its precision on long runs
+        self.f.write(RECORD.pack(t, x, y, vx, vy, math.fmod(angle, 2 * math.pi)))
+        self.count += 1
+
+    def close(self):
+        if not self.f.closed:
+            self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TrajectoryReader:
+    """
+    Memory-mapped view of a trajectory file: records are decoded on access, so only the
+    pages that are actually looked at are ever read from disk.
+    reader[i] -> (t, x, y, vx, vy, angle); reader.index_at(t) seeks by time.
+    """
+
+    def __init__(self, path):
+        # checked before mapping: mmap refuses an empty file with its own, less helpful error
+        if os.path.getsize(path) < HEADER.size:
+            raise ValueError(f"{path}: not a trajectory file (too short)")
+        self.f = open(path, "rb")
+        self.mm = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.sides, _, self.cx, self.cy, self.poly_radius, self.ball_radius, self.dt = \
+            HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path}: not a trajectory file (magic {magic!r}, version {version})")
+        self.count = (len(self.mm) - HEADER.size) // RECORD.size
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        return RECORD.unpack_from(self.mm, HEADER.size + i * RECORD.size)
+
+    def time(self, i):
+        return struct.unpack_from("<d", self.mm, HEADER.size + i * RECORD.size)[0]
+
+    @property
+    def duration(self):
+        return self.time(self.count - 1) if self.count else 0.0
+
+    def index_at(self, t):
+        """Last record with time <= t (binary search over the mapped file)."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.time(mid) <= t:
+                lo = mid + 1
+            else:
+                hi = mid
+        return max(lo - 1, 0)
+
+    def close(self):
+        self.mm.close()
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ReplayClock:
+    """
+    Playback position for a replay window: pause, seek and speed, no physics.
+    advance(frame_dt) moves the playhead and returns the record to draw.
+    """
+
+    def __init__(self, reader):
+        if not len(reader):
+            raise ValueError("empty trajectory: nothing to replay")
+        self.reader = reader
+        self.t = reader.time(0)
+        self.speed = 1.0
+        self.paused = False
+
+    def advance(self, frame_dt):
+        if not self.paused:
+            self.seek(self.t + frame_dt * self.speed)
+        return self.reader[self.reader.index_at(self.t)]
+
+    def seek(self, t):
+        self.t = min(max(t, self.reader.time(0)), self.reader.duration)
+
+    def faster(self):
+        self.speed = min(self.speed * 2.0, 256.0)
+
+    def slower(self):
+        self.speed = max(self.speed / 2.0, 1.0 / 16.0)
+
+    def status(self):
+        state = "paused" if self.paused else f"x{self.speed:g}"
+        return f"replay {self.t:8.2f} / {self.reader.duration:.2f} s   {state}"
+